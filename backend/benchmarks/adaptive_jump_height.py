@@ -0,0 +1,76 @@
+"""
+Speed of the adaptive (stride + ROI) jump height mode.
+
+Runs full-rate and adaptive tracking on every bundled sample video and
+reports the speedup and the air time difference. The accuracy check itself
+is tests/test_adaptive_jump_height.py.
+
+Run from backend/:  python -m benchmarks.adaptive_jump_height [--stride 3]
+"""
+import argparse
+import math
+import time
+from pathlib import Path
+
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR, load_frames
+from helper.find_jump_height import (
+    ADAPTIVE_AIR_TIME_TOLERANCE_FRAMES,
+    ADAPTIVE_STRIDE,
+    G,
+    JumpHeightTracker,
+    iter_person_keypoints,
+    load_yolo_model,
+    track_adaptive,
+)
+
+
+def air_time(height):
+    return math.sqrt(8 * height / G) if height is not None else None
+
+
+def run_full(frames, fps, model):
+    tracker = JumpHeightTracker(fps)
+    for frame_index, kpts in enumerate(iter_person_keypoints(iter(frames), model, 1)):
+        tracker.push(frame_index, kpts)
+    return tracker.best_jump_height()
+
+
+def run_adaptive(frames, fps, model, stride):
+    tracker = JumpHeightTracker(fps)
+    track_adaptive(iter(frames), model, tracker, stride=stride)
+    return tracker.best_jump_height()
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive jump height speed")
+    parser.add_argument("--videos-dir", default=str(SAMPLE_VIDEOS_DIR))
+    parser.add_argument("--stride", type=int, default=ADAPTIVE_STRIDE)
+    args = parser.parse_args()
+
+    model = load_yolo_model()
+    for video_path in sorted(Path(args.videos_dir).glob("*.mp4")):
+        frames, fps = load_frames(video_path)
+        full_height, full_seconds = timed(run_full, frames, fps, model)
+        adaptive_height, adaptive_seconds = timed(run_adaptive, frames, fps, model, args.stride)
+
+        if full_height is None or adaptive_height is None:
+            ok = full_height is None and adaptive_height is None
+            diff_frames = None
+        else:
+            diff_frames = abs(air_time(full_height) - air_time(adaptive_height)) * fps
+            ok = diff_frames <= ADAPTIVE_AIR_TIME_TOLERANCE_FRAMES
+
+        print(f"{video_path.name}")
+        print(f"  full:     height={full_height}  {len(frames) / full_seconds:.1f} frames/sec")
+        print(f"  adaptive: height={adaptive_height}  {len(frames) / adaptive_seconds:.1f} frames/sec")
+        print(f"  air time diff: {diff_frames} frames  -> {'OK' if ok else 'FAIL'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-stage timings and overall frames/sec of analyze_jump, sequential vs threaded.
+
+Run from backend/:  python -m benchmarks.analyze_pipeline [--model PATH] [--videos-dir DIR]
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR
+from helper.analyze_scores import analyze_jump
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[1] / "helper" / "pose_landmarker_heavy.task"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyze_jump pipeline")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--videos-dir", default=str(SAMPLE_VIDEOS_DIR))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for video_path in sorted(Path(args.videos_dir).glob("*.mp4")):
+            print(video_path.name)
+            for threaded in (False, True):
+                output = analyze_jump(
+                    model_path=args.model,
+                    input_source=str(video_path),
+                    output_dir=output_dir,
+                    threaded=threaded,
+                )
+                timings = output["timings"]
+                stages = "  ".join(
+                    f"{stage}={stats['seconds']:.2f}s"
+                    for stage, stats in sorted(timings["stages"].items())
+                )
+                label = "threaded  " if threaded else "sequential"
+                print(
+                    f"  {label} {timings['frames']} frames  "
+                    f"{timings['frames_per_second']:.1f} frames/sec  {stages}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-frame cost of calculate_frame_angles versus the original per-joint
+calculate_angle code. Production computes angles one frame at a time as
+poses arrive, so that is what is timed.
+
+Equivalence with the per-joint code is checked by tests/test_angle_calculation.py.
+
+Run from backend/:  python -m benchmarks.angle_calculation [--frames 5000]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from helper.angle_calculation import (
+    JOINT_ANGLES,
+    MIN_VISIBILITY,
+    VISIBILITY,
+    calculate_angle,
+    calculate_frame_angles,
+)
+
+
+def per_joint_angles(landmarks):
+    """The original extract_landmarks logic: one calculate_angle call per joint."""
+    row = []
+    for _, _, (a, b, c) in JOINT_ANGLES:
+        if min(landmarks[a][VISIBILITY], landmarks[b][VISIBILITY], landmarks[c][VISIBILITY]) < MIN_VISIBILITY:
+            row.append(None)
+            continue
+        angle = calculate_angle(
+            (landmarks[a][0], landmarks[a][1]),
+            (landmarks[b][0], landmarks[b][1]),
+            (landmarks[c][0], landmarks[c][1]),
+        )
+        row.append(float(angle) if math.isfinite(angle) else None)
+    return row
+
+
+def random_landmarks(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    landmarks = np.empty((frames, 33, 4))
+    landmarks[..., 0] = rng.uniform(0, 1920, (frames, 33))
+    landmarks[..., 1] = rng.uniform(0, 1080, (frames, 33))
+    landmarks[..., 2] = rng.normal(0, 0.2, (frames, 33))
+    landmarks[..., 3] = rng.uniform(0, 1, (frames, 33))
+    return landmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark joint-angle calculation")
+    parser.add_argument("--frames", type=int, default=5000)
+    args = parser.parse_args()
+
+    landmarks = random_landmarks(args.frames)
+    rows = landmarks.tolist()
+
+    started = time.perf_counter()
+    for row in rows:
+        per_joint_angles(row)
+    per_joint_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for frame in landmarks:
+        calculate_frame_angles(frame)
+    single_pose_seconds = time.perf_counter() - started
+
+    def per_frame_us(seconds):
+        return seconds / args.frames * 1e6
+
+    print(f"{args.frames} frames, {len(JOINT_ANGLES)} angles per frame")
+    print(f"  per-joint calculate_angle: {per_frame_us(per_joint_seconds):8.2f} us/frame")
+    print(f"  calculate_frame_angles:    {per_frame_us(single_pose_seconds):8.2f} us/frame")
+    print(f"  speedup:                   {per_joint_seconds / single_pose_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Accuracy and speed of pose / jump-height inference at reduced resolution.
+
+For every bundled sample video, runs analyze_jump and find_jumps on the
+full-resolution frames and again with frames shrunk to each short side.
+Reports frames/sec and the error against full resolution: landmark pixels
+and joint angles per frame, the phase metrics and the jump height. Exits
+non-zero if the default short side (DEFAULT_INFERENCE_SHORT_SIDE) moves a
+metric beyond the tolerances below.
+
+Run from backend/:  python -m benchmarks.inference_resolution [--short-sides 1080 720 480]
+"""
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.analyze_pipeline import DEFAULT_MODEL_PATH
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR, load_frames
+from helper.analyze_scores import analyze_jump
+from helper.angle_calculation import MIN_VISIBILITY
+from helper.find_jump_height import best_jump_height, find_jumps, load_yolo_model
+from helper.frame_pipeline import DEFAULT_INFERENCE_SHORT_SIDE
+
+DEFAULT_SHORT_SIDES = (1080, DEFAULT_INFERENCE_SHORT_SIDE, 480, 360)
+HEIGHT_TOLERANCE_M = 0.02
+MIN_FLEXION_TOLERANCE_DEG = 3.0
+
+
+def run(frames, fps, pose_model_path, yolo_model, short_side):
+    started = time.perf_counter()
+    output = analyze_jump(
+        model_path=pose_model_path,
+        input_source=None,
+        output_dir=None,
+        frames=iter(frames),
+        fps=fps,
+        render=False,
+        deterministic=True,
+        inference_short_side=short_side,
+    )
+    pose_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    jumps = find_jumps(
+        None,
+        frames=iter(frames),
+        fps=fps,
+        model=yolo_model,
+        deterministic=True,
+        inference_short_side=short_side,
+    )
+    yolo_seconds = time.perf_counter() - started
+    return output, best_jump_height(jumps), pose_seconds, yolo_seconds
+
+
+def primary_rows(store):
+    primary = store.primary()
+    return {
+        frame_index: row
+        for row, frame_index in zip(np.flatnonzero(primary), store.frame_index[primary].tolist())
+    }
+
+
+def landmark_errors(reference, candidate):
+    """Mean landmark distance (pixels) and mean absolute angle difference over frames posed in both."""
+    reference_rows = primary_rows(reference)
+    candidate_rows = primary_rows(candidate)
+    common = sorted(reference_rows.keys() & candidate_rows.keys())
+    if not common:
+        return None, None
+    ref = np.array([reference_rows[f] for f in common])
+    cand = np.array([candidate_rows[f] for f in common])
+
+    ref_landmarks = reference.landmarks[ref]
+    cand_landmarks = candidate.landmarks[cand]
+    visible = (ref_landmarks[..., 3] >= MIN_VISIBILITY) & (cand_landmarks[..., 3] >= MIN_VISIBILITY)
+    distances = np.linalg.norm(ref_landmarks[..., :2] - cand_landmarks[..., :2], axis=-1)
+    pixel_error = float(distances[visible].mean()) if visible.any() else None
+
+    angle_diff = np.abs(reference.angles[ref] - candidate.angles[cand])
+    angle_error = float(np.nanmean(angle_diff)) if np.isfinite(angle_diff).any() else None
+    return pixel_error, angle_error
+
+
+def difference(reference, candidate):
+    if reference is None or candidate is None:
+        return 0.0 if reference is None and candidate is None else math.inf
+    return abs(reference - candidate)
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference resolution accuracy/speed trade-off")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--videos-dir", default=str(SAMPLE_VIDEOS_DIR))
+    parser.add_argument("--short-sides", type=int, nargs="+", default=list(DEFAULT_SHORT_SIDES))
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    yolo_model = load_yolo_model()
+    failures = 0
+    for video_path in sorted(Path(args.videos_dir).glob("*.mp4")):
+        frames, fps = load_frames(video_path, args.max_frames)
+        frame_height, frame_width = frames[0].shape[:2]
+        print(f"{video_path.name}: {len(frames)} frames, {frame_width}x{frame_height} @ {fps:.1f} fps")
+        print(
+            f"  {'short side':>10}  {'pose f/s':>8}  {'yolo f/s':>8}  {'px err':>7}  {'angle err':>9}"
+            f"  {'hip min':>8}  {'knee min':>8}  {'ang vel':>8}  {'height m':>8}"
+        )
+
+        find_jumps(None, frames=iter(frames[:8]), fps=fps, model=yolo_model)  # warm-up
+        reference_run = run(frames, fps, args.model, yolo_model, None)
+        reference, reference_height = reference_run[:2]
+        for short_side in [None, *args.short_sides]:
+            if short_side is not None and short_side >= min(frame_height, frame_width):
+                continue
+            if short_side is None:
+                output, height, pose_seconds, yolo_seconds = reference_run
+                pixel_error = angle_error = 0.0
+            else:
+                output, height, pose_seconds, yolo_seconds = run(
+                    frames, fps, args.model, yolo_model, short_side
+                )
+                pixel_error, angle_error = landmark_errors(reference["landmarks"], output["landmarks"])
+
+            metrics = output["metrics"]
+            print(
+                f"  {short_side or 'full':>10}  {len(frames) / pose_seconds:>8.1f}"
+                f"  {len(frames) / yolo_seconds:>8.1f}  {fmt(pixel_error, '7.2f')}"
+                f"  {fmt(angle_error, '9.2f')}"
+                f"  {fmt(metrics['smallest_loading_min_hip_flexion'], '8.2f')}"
+                f"  {fmt(metrics['smallest_loading_min_knee_flexion'], '8.2f')}"
+                f"  {fmt(metrics['angular_velocity'], '8.1f')}  {fmt(height, '8.3f')}"
+            )
+
+            if short_side == DEFAULT_INFERENCE_SHORT_SIDE:
+                reference_metrics = reference["metrics"]
+                ok = difference(reference_height, height) <= HEIGHT_TOLERANCE_M and all(
+                    difference(reference_metrics[name], metrics[name]) <= MIN_FLEXION_TOLERANCE_DEG
+                    for name in ("smallest_loading_min_hip_flexion", "smallest_loading_min_knee_flexion")
+                )
+                failures += not ok
+                print(f"  default short side {short_side}: {'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Replay a sample video into the /ws/live endpoint as a fake camera.
+
+Frames are JPEG-encoded and sent in real time at the video's frame rate from
+one thread while another reads the events. Reports the jumps found, frames
+analyzed and dropped, and the latency of the frame events, so the drop
+policy can be checked against a running server.
+
+Needs the optional websockets client: pip install websockets
+
+Run from backend/ with the API running:
+    python -m benchmarks.live_replay [--video PATH] [--url ws://localhost:8000/ws/live]
+"""
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR, load_frames
+
+DEFAULT_URL = "ws://localhost:8000/ws/live"
+JPEG_QUALITY = 85
+
+
+def send_frames(websocket, frames, fps):
+    started = time.perf_counter()
+    for frame_index, frame in enumerate(frames):
+        delay = started + frame_index / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            websocket.send(encoded.tobytes())
+    websocket.send("end")
+
+
+def main():
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        raise RuntimeError("The live replay client needs websockets: pip install websockets")
+
+    parser = argparse.ArgumentParser(description="Replay a video into /ws/live as a fake camera")
+    parser.add_argument("--video", default=str(SAMPLE_VIDEOS_DIR / "MJ Dunk.mp4"))
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    frames, fps = load_frames(args.video, args.max_frames)
+    print(f"{Path(args.video).name}: {len(frames)} frames @ {fps:.1f} fps")
+
+    latencies = []
+    summary = None
+    with connect(f"{args.url}?fps={fps}", max_size=None) as websocket:
+        sender = threading.Thread(target=send_frames, args=(websocket, frames, fps), daemon=True)
+        sender.start()
+        for message in websocket:
+            event = json.loads(message)
+            if event["type"] == "frame":
+                latencies.append(event["latency_ms"])
+            elif event["type"] == "jump":
+                height = event["jump_height"]
+                print(
+                    f"  jump {event['jump_index']}: takeoff frame {event['takeoff_frame']}, "
+                    f"height {height:.3f} m, latency {event['latency_ms']:.0f} ms"
+                )
+            elif event["type"] == "summary":
+                summary = event
+            elif event["type"] == "error":
+                print(f"  error: {event['detail']}")
+        sender.join()
+
+    if summary is None:
+        print("No summary received (connection closed early).")
+        return
+    print(f"  frames received / analyzed / dropped: {summary['frames_received']} / "
+          f"{summary['frames_analyzed']} / {summary['frames_dropped']}")
+    if latencies:
+        p50, p95, worst = np.percentile(latencies, [50, 95, 100])
+        print(f"  frame latency ms p50 / p95 / max:     {p50:.0f} / {p95:.0f} / {worst:.0f}")
+    height = summary["jump_height"]
+    print(f"  best jump height:                      {height:.3f} m" if height is not None
+          else "  best jump height:                      none")
+
+
+if __name__ == "__main__":
+    main()
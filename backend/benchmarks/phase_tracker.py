@@ -0,0 +1,311 @@
+"""
+Per-frame cost of the __slots__ JumpPhaseTracker versus the original
+dict-based tracker, on synthetic jump sessions.
+
+Also reports whether push() and push_row() reproduce the original phases,
+display sides and reps frame for frame; tests/test_phase_tracker.py is the
+check that runs under pytest.
+
+Run from backend/:  python -m benchmarks.phase_tracker [--sessions 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from helper.angle_calculation import JOINT_ANGLES
+from helper.jump_phases import (
+    DRAMATIC_INCREASE_DEG,
+    LANDING_DROP_DEG,
+    LOADING_HIP_FLEXION_DEG,
+    REBOUND_MARGIN_DEG,
+    STANDING_HIP_FLEXION_DEG,
+    JumpPhaseTracker,
+    _new_rep,
+)
+from helper.pose_extraction import angles_to_dict
+
+FPS = 30.0
+
+
+def _min(current, value):
+    return value if current is None or value < current else current
+
+
+class ReferencePhaseTracker:
+    """The original dict-based tracker: push(frame_index, timestamp, angles)."""
+
+    def __init__(
+        self,
+        loading_hip_flexion_deg=LOADING_HIP_FLEXION_DEG,
+        dramatic_increase_deg=DRAMATIC_INCREASE_DEG,
+        rebound_margin_deg=REBOUND_MARGIN_DEG,
+        landing_drop_deg=LANDING_DROP_DEG,
+        standing_hip_flexion_deg=STANDING_HIP_FLEXION_DEG,
+    ):
+        self.loading_hip_flexion_deg = loading_hip_flexion_deg
+        self.dramatic_increase_deg = dramatic_increase_deg
+        self.rebound_margin_deg = rebound_margin_deg
+        self.landing_drop_deg = landing_drop_deg
+        self.standing_hip_flexion_deg = standing_hip_flexion_deg
+        self.phase_state = "approach"
+        self.prev_avg_hip_flexion = None
+        self.loading_min_hip_flexion = None
+        self.takeoff_peak_hip_flexion = None
+        self.analysis_side = None
+        self.side_locked = False
+        self.left_shoulder_valid_count = 0
+        self.right_shoulder_valid_count = 0
+        self.display_side = None
+        self.reps = []
+        self.rep = None
+
+    def _dominant_side(self, left_shoulder, right_shoulder):
+        if left_shoulder is not None and right_shoulder is None:
+            return "left"
+        if right_shoulder is not None and left_shoulder is None:
+            return "right"
+        if left_shoulder is not None and right_shoulder is not None:
+            return (
+                "left"
+                if self.left_shoulder_valid_count >= self.right_shoulder_valid_count
+                else "right"
+            )
+        return None
+
+    def _start_loading(self, frame_index, avg_hip_flexion):
+        self.phase_state = "loading"
+        self.loading_min_hip_flexion = avg_hip_flexion
+        self.rep = _new_rep(frame_index)
+        self.reps.append(self.rep)
+
+    def _track_loading(self, avg_hip_flexion, knee_flexion):
+        rep = self.rep
+        rep["smallest_loading_min_hip_flexion"] = _min(
+            rep["smallest_loading_min_hip_flexion"], avg_hip_flexion
+        )
+        if knee_flexion is not None:
+            rep["smallest_loading_min_knee_flexion"] = _min(
+                rep["smallest_loading_min_knee_flexion"], knee_flexion
+            )
+
+    def push(self, frame_index, timestamp, angles):
+        """
+        Advance the state machine by one frame and return the current phase,
+        or None when hip flexion was not detected in this frame.
+        """
+        right_angles = angles["right"]
+        left_angles = angles["left"]
+        hip_flexion_values = [
+            value
+            for value in [right_angles["hip_flexion"], left_angles["hip_flexion"]]
+            if value is not None
+        ]
+        knee_flexion_values = [
+            value
+            for value in [right_angles["knee_flexion"], left_angles["knee_flexion"]]
+            if value is not None
+        ]
+        left_shoulder = left_angles["shoulder_angle"]
+        right_shoulder = right_angles["shoulder_angle"]
+
+        if left_shoulder is not None:
+            self.left_shoulder_valid_count += 1
+        if right_shoulder is not None:
+            self.right_shoulder_valid_count += 1
+
+        if not self.side_locked:
+            self.analysis_side = (
+                self._dominant_side(left_shoulder, right_shoulder) or self.analysis_side
+            )
+
+        if self.analysis_side == "left":
+            selected_shoulder_angle = left_shoulder
+        elif self.analysis_side == "right":
+            selected_shoulder_angle = right_shoulder
+        else:
+            selected_shoulder_angle = (
+                left_shoulder if left_shoulder is not None else right_shoulder
+            )
+
+        self.display_side = self.analysis_side or self._dominant_side(
+            left_shoulder, right_shoulder
+        )
+
+        if not hip_flexion_values:
+            return None
+
+        avg_hip_flexion = sum(hip_flexion_values) / len(hip_flexion_values)
+        knee_flexion = min(knee_flexion_values) if knee_flexion_values else None
+        prev_avg_hip_flexion = self.prev_avg_hip_flexion
+        state = self.phase_state
+
+        if state == "approach":
+            if avg_hip_flexion <= self.loading_hip_flexion_deg:
+                self._start_loading(frame_index, avg_hip_flexion)
+                self._track_loading(avg_hip_flexion, knee_flexion)
+        elif state == "loading":
+            self.loading_min_hip_flexion = min(self.loading_min_hip_flexion, avg_hip_flexion)
+            self._track_loading(avg_hip_flexion, knee_flexion)
+            if (
+                prev_avg_hip_flexion is not None
+                and avg_hip_flexion >= self.loading_min_hip_flexion + self.rebound_margin_deg
+                and avg_hip_flexion - prev_avg_hip_flexion >= self.dramatic_increase_deg
+            ):
+                self.phase_state = "takeoff"
+                self.takeoff_peak_hip_flexion = avg_hip_flexion
+                self.rep["takeoff_frame"] = frame_index
+        elif state == "takeoff":
+            self.takeoff_peak_hip_flexion = max(self.takeoff_peak_hip_flexion, avg_hip_flexion)
+            if avg_hip_flexion <= self.takeoff_peak_hip_flexion - self.landing_drop_deg:
+                self.phase_state = "landing"
+                self.rep["landing_frame"] = frame_index
+        elif state == "landing":
+            if avg_hip_flexion >= self.standing_hip_flexion_deg:
+                self.phase_state = "approach"
+                self.rep["end_frame"] = frame_index
+
+        self.prev_avg_hip_flexion = avg_hip_flexion
+        rep = self.rep
+
+        if self.phase_state == "loading" and not self.side_locked and self.analysis_side is not None:
+            self.side_locked = True
+
+        if self.phase_state == "loading" and selected_shoulder_angle is not None:
+            if (
+                rep["largest_loading_max_shoulder_angle"] is None
+                or selected_shoulder_angle > rep["largest_loading_max_shoulder_angle"]
+            ):
+                rep["largest_loading_max_shoulder_angle"] = selected_shoulder_angle
+                rep["loading_max_shoulder_timestamp"] = timestamp
+
+        if self.phase_state == "takeoff" and selected_shoulder_angle is not None:
+            if (
+                rep["largest_takeoff_max_shoulder_angle"] is None
+                or selected_shoulder_angle > rep["largest_takeoff_max_shoulder_angle"]
+            ):
+                rep["largest_takeoff_max_shoulder_angle"] = selected_shoulder_angle
+                rep["takeoff_max_shoulder_timestamp"] = timestamp
+
+        return self.phase_state
+
+
+def synthetic_session(rng, jumps=3):
+    """
+    calculate_frame_angles-style rows for an athlete standing, squatting,
+    jumping and landing a few times, with noise and dropped joints (NaN).
+    """
+    keyframes = [(0, 170.0)]
+    frame = 0
+    for _ in range(jumps):
+        frame += int(rng.integers(10, 40))
+        keyframes.append((frame, 170.0))
+        frame += int(rng.integers(8, 25))
+        keyframes.append((frame, rng.uniform(50, 100)))
+        frame += int(rng.integers(3, 10))
+        keyframes.append((frame, rng.uniform(160, 185)))
+        frame += int(rng.integers(8, 20))
+        keyframes.append((frame, rng.uniform(80, 130)))
+        frame += int(rng.integers(8, 20))
+        keyframes.append((frame, rng.uniform(150, 175)))
+    frame += 20
+    keyframes.append((frame, 170.0))
+
+    frames, values = zip(*keyframes)
+    hip = np.interp(np.arange(frame), frames, values)
+    rows = np.empty((frame, len(JOINT_ANGLES)))
+    for column, (side, name, _) in enumerate(JOINT_ANGLES):
+        if name == "hip_flexion":
+            base = hip
+        elif name == "knee_flexion":
+            base = hip + 15
+        elif name == "shoulder_angle":
+            base = np.linspace(20, 160, frame) + (30 if side == "left" else 0)
+        else:
+            base = np.full(frame, 100.0)
+        rows[:, column] = base + rng.normal(0, 2, frame)
+    rows[rng.random(rows.shape) < 0.1] = np.nan
+    return rows
+
+
+def run_reference(rows):
+    tracker = ReferencePhaseTracker()
+    trace = []
+    for frame_index, row in enumerate(rows):
+        phase = tracker.push(frame_index, frame_index / FPS, angles_to_dict(row))
+        trace.append((phase, tracker.display_side))
+    return trace, tracker.reps
+
+
+def run_dict(rows):
+    tracker = JumpPhaseTracker()
+    trace = []
+    for frame_index, row in enumerate(rows):
+        phase = tracker.push(frame_index / FPS, angles_to_dict(row), frame_index)
+        trace.append((phase, tracker.display_side))
+    return trace, tracker.reps
+
+
+def run_row(rows):
+    tracker = JumpPhaseTracker()
+    trace = []
+    for frame_index, row in enumerate(rows):
+        phase = tracker.push_row(frame_index / FPS, row, frame_index)
+        trace.append((phase, tracker.display_side))
+    return trace, tracker.reps
+
+
+def timed(run, sessions):
+    started = time.perf_counter()
+    results = [run(rows) for rows in sessions]
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the jump phase tracker")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sessions = [synthetic_session(rng) for _ in range(args.sessions)]
+    row_sessions = [rows.tolist() for rows in sessions]
+    frames = sum(len(rows) for rows in sessions)
+
+    expected, reference_seconds = timed(run_reference, sessions)
+    from_dicts, dict_seconds = timed(run_dict, sessions)
+    from_rows, row_seconds = timed(run_row, row_sessions)
+
+    # Time the trackers alone, without building the angle dicts.
+    dict_sessions = [[angles_to_dict(row) for row in rows] for rows in sessions]
+    started = time.perf_counter()
+    for angles_list in dict_sessions:
+        tracker = ReferencePhaseTracker()
+        for frame_index, angles in enumerate(angles_list):
+            tracker.push(frame_index, frame_index / FPS, angles)
+    reference_only_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for angles_list in dict_sessions:
+        tracker = JumpPhaseTracker()
+        for frame_index, angles in enumerate(angles_list):
+            tracker.push(frame_index / FPS, angles, frame_index)
+    dict_only_seconds = time.perf_counter() - started
+
+    matches = expected == from_dicts == from_rows
+    reps = sum(len(session_reps) for _, session_reps in expected)
+
+    def per_frame_us(seconds):
+        return seconds / frames * 1e6
+
+    print(f"{args.sessions} sessions, {frames} frames, {reps} reps")
+    print(f"  original, push(dict) incl. dicts: {per_frame_us(reference_seconds):8.2f} us/frame")
+    print(f"  slots,    push(dict) incl. dicts: {per_frame_us(dict_seconds):8.2f} us/frame")
+    print(f"  original, push(dict) only:        {per_frame_us(reference_only_seconds):8.2f} us/frame")
+    print(f"  slots,    push(dict) only:        {per_frame_us(dict_only_seconds):8.2f} us/frame")
+    print(f"  slots,    push_row:               {per_frame_us(row_seconds):8.2f} us/frame")
+    print(f"  speedup (push_row vs original):   {reference_seconds / row_seconds:8.1f}x")
+    print(f"  phases and reps match:             {matches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Wall time of analyze_long_video as the worker count grows, on a long video
+made by looping one of the bundled samples.
+
+Prints seconds, speedup over one worker and parallel efficiency (speedup /
+workers) for each worker count, and whether every run found the same jumps.
+Segments are independent, so scaling should stay close to linear until
+workers outnumber physical cores or segments; the efficiency column shows
+where it stops.
+
+Run from backend/:  python -m benchmarks.segment_parallel [--minutes 5] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import cv2
+
+from benchmarks.analyze_pipeline import DEFAULT_MODEL_PATH
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR
+from helper.frame_pipeline import iter_video_frames, open_video
+from helper.segment_parallel import DEFAULT_SEGMENT_SECONDS, analyze_long_video
+
+
+def loop_video(source_path, output_path, minutes):
+    """Write source_path back to back until output_path is at least minutes long."""
+    cap = open_video(str(source_path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frames = list(iter_video_frames(cap))
+    finally:
+        cap.release()
+    frame_height, frame_width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(
+        str(output_path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (frame_width, frame_height)
+    )
+    try:
+        target = int(minutes * 60 * fps)
+        for frame_index in range(target):
+            writer.write(frames[frame_index % len(frames)])
+    finally:
+        writer.release()
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark segment-parallel analysis scaling")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--video", default=str(next(Path(SAMPLE_VIDEOS_DIR).glob("*.mp4"))))
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--segment-seconds", type=float, default=DEFAULT_SEGMENT_SECONDS)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        long_video = Path(tmp) / "long.mp4"
+        frames = loop_video(args.video, long_video, args.minutes)
+        print(f"{Path(args.video).name} looped to {args.minutes:g} min ({frames} frames), "
+              f"{os.cpu_count()} CPUs")
+
+        baseline = None
+        jump_frames = set()
+        # One worker first: it is the baseline for speedup.
+        for workers in sorted(set(args.workers) | {1}):
+            report = analyze_long_video(
+                long_video,
+                pose_model_path=args.model,
+                workers=workers,
+                segment_seconds=args.segment_seconds,
+            )
+            seconds = report["total_seconds"]
+            baseline = baseline or seconds
+            speedup = baseline / seconds
+            jump_frames.add(tuple(jump["takeoff_frame"] for jump in report["jumps"]))
+            print(
+                f"  {report['workers']:2d} workers  {len(report['segments']):3d} segments  "
+                f"{seconds:8.1f}s  {frames / seconds:7.1f} frames/sec  "
+                f"speedup {speedup:5.2f}x  efficiency {speedup / report['workers']:4.0%}"
+            )
+        print(f"  same jumps for every worker count: {len(jump_frames) == 1}")
+
+
+if __name__ == "__main__":
+    main()
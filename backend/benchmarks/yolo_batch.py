@@ -0,0 +1,63 @@
+"""
+Frames/sec of YOLO ankle tracking on CPU for several batch sizes.
+
+Run from backend/:  CUDA_VISIBLE_DEVICES= python -m benchmarks.yolo_batch [--video PATH] [--batch-sizes 1 4 8 16]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+
+from helper.find_jump_height import (
+    JumpHeightTracker,
+    iter_person_keypoints,
+    load_yolo_model,
+)
+from helper.frame_pipeline import iter_video_frames, open_video
+
+SAMPLE_VIDEOS_DIR = Path(__file__).resolve().parents[2] / "frontend" / "public" / "videos"
+
+
+def load_frames(video_path, max_frames=None):
+    cap = open_video(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    frames = []
+    for frame in iter_video_frames(cap):
+        frames.append(frame)
+        if max_frames is not None and len(frames) >= max_frames:
+            break
+    cap.release()
+    return frames, fps
+
+
+def run(frames, fps, model, batch_size):
+    tracker = JumpHeightTracker(fps)
+    started = time.perf_counter()
+    for frame_index, kpts in enumerate(iter_person_keypoints(iter(frames), model, batch_size)):
+        tracker.push(frame_index, kpts)
+    elapsed = time.perf_counter() - started
+    return len(frames) / elapsed, tracker.best_jump_height()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched YOLO inference")
+    parser.add_argument("--video", default=str(SAMPLE_VIDEOS_DIR / "MJ Dunk.mp4"))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    frames, fps = load_frames(args.video, args.max_frames)
+    model = load_yolo_model()
+    run(frames[:16], fps, model, 1)  # warm-up
+
+    print(f"{Path(args.video).name}: {len(frames)} frames @ {fps:.1f} fps")
+    print(f"{'batch':>5}  {'frames/sec':>10}  {'jump height (m)':>15}")
+    for batch_size in args.batch_sizes:
+        fps_measured, height = run(frames, fps, model, batch_size)
+        height_text = f"{height:.4f}" if height is not None else "none"
+        print(f"{batch_size:>5}  {fps_measured:>10.2f}  {height_text:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import math
+
 import numpy as np
 
 def calculate_angle(a, b, c):
@@ -19,4 +21,54 @@ def calculate_angle(a, b, c):
     angle_rad = np.arccos(dot_product / magnitude)
     angle_deg = np.degrees(angle_rad)
 
-    return angle_deg
\ No newline at end of file
+    return angle_deg
+
+
+# Landmark array layout used by calculate_frame_angles: (33, 4) with columns
+# x_pixel, y_pixel, z, visibility.
+X, Y, Z, VISIBILITY = range(4)
+MIN_VISIBILITY = 0.5
+
+# (side, angle name, (a, b, c)) with MediaPipe landmark indices; the angle is at b.
+JOINT_ANGLES = [
+    ("left", "knee_flexion", (23, 25, 27)),
+    ("left", "hip_flexion", (11, 23, 25)),
+    ("left", "ankle_angle", (25, 27, 31)),
+    ("left", "shoulder_angle", (23, 11, 13)),
+    ("right", "knee_flexion", (24, 26, 28)),
+    ("right", "hip_flexion", (12, 24, 26)),
+    ("right", "ankle_angle", (26, 28, 32)),
+    ("right", "shoulder_angle", (24, 12, 14)),
+]
+
+
+def calculate_frame_angles(landmarks):
+    """
+    calculate_angle for every joint in JOINT_ANGLES of one pose.
+
+    landmarks is one (33, 4) array or nested list (x_pixel, y_pixel, z,
+    visibility). Returns a list of len(JOINT_ANGLES) floats in degrees, NaN
+    where any of the three landmarks has visibility below MIN_VISIBILITY or
+    the angle is undefined (e.g. coincident points). Angles are computed one
+    frame at a time as poses arrive, so this is plain float arithmetic; see
+    benchmarks/angle_calculation.py.
+    """
+    rows = landmarks.tolist() if isinstance(landmarks, np.ndarray) else landmarks
+    angles = []
+    for _, _, (a, b, c) in JOINT_ANGLES:
+        ax, ay, _, a_visibility = rows[a]
+        bx, by, _, b_visibility = rows[b]
+        cx, cy, _, c_visibility = rows[c]
+        if not (
+            a_visibility >= MIN_VISIBILITY
+            and b_visibility >= MIN_VISIBILITY
+            and c_visibility >= MIN_VISIBILITY
+        ):
+            angles.append(math.nan)
+            continue
+        bax, bay = ax - bx, ay - by
+        bcx, bcy = cx - bx, cy - by
+        magnitude = math.sqrt(bax * bax + bay * bay) * math.sqrt(bcx * bcx + bcy * bcy)
+        cosine = (bax * bcx + bay * bcy) / magnitude if magnitude else math.nan
+        angles.append(math.degrees(math.acos(cosine)) if -1.0 <= cosine <= 1.0 else math.nan)
+    return angles
@@ -0,0 +1,149 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+from helper.telemetry import span
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that remembers which server-side prepared statements it holds."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class Database:
+    """
+    Threaded psycopg2 connection pool.
+
+    Checkouts block (up to timeout) when every connection is in use instead
+    of failing, and the time spent waiting is recorded for metrics().
+    Statements registered with prepare() are PREPAREd once per connection
+    and run with execute_prepared().
+    """
+
+    def __init__(
+        self,
+        minconn=DEFAULT_MIN_CONNECTIONS,
+        maxconn=DEFAULT_MAX_CONNECTIONS,
+        timeout=DEFAULT_CHECKOUT_TIMEOUT,
+        **connect_kwargs,
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self.statements = {}
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+
+        self.checkouts = 0
+        self.in_use = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.minconn,
+                    self.maxconn,
+                    connection_factory=PreparedConnection,
+                    **self.connect_kwargs,
+                )
+            return self._pool
+
+    def prepare(self, name, param_types, sql):
+        """Register a statement. param_types is a Postgres type list like "(uuid, text)"."""
+        self.statements[name] = (param_types, sql)
+
+    @contextmanager
+    def connection(self):
+        pool = self._get_pool()
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise RuntimeError(
+                f"No database connection available after waiting {self.timeout:.0f}s"
+            )
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        conn = None
+        broken = False
+        try:
+            conn = pool.getconn()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None:
+                broken = conn.closed != 0
+                if not broken:
+                    conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                pool.putconn(conn, close=broken)
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def cursor(self):
+        with span("postgres"):
+            with self.connection() as conn:
+                cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+
+    def execute_prepared(self, cur, name, params=()):
+        conn = cur.connection
+        if name not in conn.prepared:
+            param_types, sql = self.statements[name]
+            cur.execute(f"PREPARE {name} {param_types} AS {sql}")
+            conn.prepared.add(name)
+        placeholders = ", ".join(["%s"] * len(params))
+        if placeholders:
+            cur.execute(f"EXECUTE {name} ({placeholders})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "min_connections": self.minconn,
+                "max_connections": self.maxconn,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "avg_wait_seconds": (
+                    self.wait_seconds_total / self.checkouts if self.checkouts else None
+                ),
+                "max_wait_seconds": self.wait_seconds_max,
+                "timeouts": self.timeouts,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
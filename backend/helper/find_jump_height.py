@@ -1,14 +1,41 @@
 from ultralytics import YOLO
 import cv2
+import math
+import numpy as np
+import torch
 import os
+import time
 from collections import deque
 
+from helper.frame_pipeline import iter_video_frames, open_video, resize_for_inference
+from helper.telemetry import FRAME_SECONDS, FRAMES_PROCESSED
+
 # ── Constants ────────────────────────────────────────────────────────────────
 G = 9.81
 SIDE_DETECT_FRAMES = 5
 GROUND_CALIBRATION_FRAMES = 30
 AIRBORNE_THRESHOLD = 7
 SMOOTH_WINDOW = 5
+YOLO_MODEL_PATH = 'yolov8n-pose.pt'
+DEFAULT_BATCH_SIZE = 8
+HEIGHT_DECIMALS = 6
+# Deterministic mode runs YOLO on the CPU with this many torch threads, a
+# fixed count rather than the core count so every machine splits work alike.
+DETERMINISTIC_DEVICE = "cpu"
+DETERMINISTIC_TORCH_THREADS = 4
+
+# Adaptive mode: sample every ADAPTIVE_STRIDE-th frame while calibrating or
+# standing still, go back to every frame once the ankle rises by
+# RISE_TRIGGER_FRACTION of AIRBORNE_THRESHOLD, and run YOLO on a box around
+# the athlete padded by ROI_PADDING of its size on each side.
+ADAPTIVE_STRIDE = 3
+RISE_TRIGGER_FRACTION = 0.5
+ROI_PADDING = 0.5
+ROI_MIN_SIZE = 96
+YOLO_IMGSZ = 640
+# Air time from adaptive mode stays within this many frames of full-rate mode
+# (checked by tests/test_adaptive_jump_height.py on the bundled sample videos).
+ADAPTIVE_AIR_TIME_TOLERANCE_FRAMES = 1
 
 LEFT_ANKLE  = 16
 RIGHT_ANKLE = 17
@@ -39,6 +66,35 @@ def smooth_y(buffer, new_y, frame_num):
     buffer.append((new_y, frame_num))
 
 
+def use_deterministic_torch(num_threads=DETERMINISTIC_TORCH_THREADS):
+    """
+    Process-wide torch settings for repeatable inference: deterministic
+    kernels (warning where an op has none), no cuDNN autotuning and a fixed
+    intra-op thread count.
+    """
+    torch.use_deterministic_algorithms(True, warn_only=True)
+    torch.backends.cudnn.benchmark = False
+    torch.backends.cudnn.deterministic = True
+    torch.set_num_threads(num_threads)
+
+
+def load_yolo_model(
+    model_path: str = YOLO_MODEL_PATH,
+    deterministic: bool = False,
+    num_threads: int = DETERMINISTIC_TORCH_THREADS,
+):
+    """
+    YOLO pose model. With deterministic=True every prediction is pinned to
+    DETERMINISTIC_DEVICE and torch is set up by use_deterministic_torch.
+    """
+    model = YOLO(model_path)
+    if deterministic:
+        use_deterministic_torch(num_threads)
+        # Model.predict merges overrides into every call's arguments.
+        model.overrides["device"] = DETERMINISTIC_DEVICE
+    return model
+
+
 def find_max_y(buffer):
     max_y, frame_num = float('-inf'), None
     for y, f in buffer:
@@ -47,84 +103,329 @@ def find_max_y(buffer):
     return max_y, frame_num
 
 
-def find_jump_height(video_path: str) -> float | None:
-    """Analyze a video and return the best jump height in meters, or None if no jump detected."""
-    model = YOLO('yolov8n-pose.pt')
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Cannot open video: {video_path}")
+class JumpHeightTracker:
+    """
+    SIDE_DETECT -> CALIBRATING -> STANDING <-> AIRBORNE ankle state machine.
 
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    Feed it one frame at a time, in order, with push(frame_index, keypoints),
+    where keypoints is the first person's (17, 2) YOLO keypoint array or None.
+    frame_index may start anywhere (e.g. at a segment's first frame); side
+    detection counts the frames actually pushed. Every detected jump is kept
+    in jumps with its takeoff/landing frames and air time.
+    """
 
-    ground_y = None
-    calibration_ys = []
-    ankle_y_buffer = deque(maxlen=SMOOTH_WINDOW)
-    state = 'SIDE_DETECT'
-    jump_results = []
-    side_detect_votes = []
-    use_left_ankle = None
-    y1 = None
-    max_frame1 = None
-    processed = 0
+    def __init__(self, fps):
+        self.fps = fps
+        self.ground_y = None
+        self.calibration_ys = []
+        self.ankle_y_buffer = deque(maxlen=SMOOTH_WINDOW)
+        self.state = 'SIDE_DETECT'
+        self.jump_results = []
+        self.side_detect_votes = []
+        self.use_left_ankle = None
+        self.y1 = None
+        self.max_frame1 = None
+        self.frames_seen = 0
+        self.jumps = []
 
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-
-        results = model(frame, conf=0.5, verbose=False)
+    def push(self, frame_index, person_kpts):
+        frames_before = self.frames_seen
+        self.frames_seen += 1
 
         ankle_y_raw = None
-        person_kpts = None
-        if results[0].keypoints is not None and len(results[0].keypoints.xy) > 0:
-            person_kpts = results[0].keypoints.xy[0].cpu().numpy()
-            if use_left_ankle is not None:
-                ankle_y_raw = get_ankle_y_single(person_kpts, use_left_ankle)
+        if person_kpts is not None and self.use_left_ankle is not None:
+            ankle_y_raw = get_ankle_y_single(person_kpts, self.use_left_ankle)
 
-        if state == 'SIDE_DETECT':
+        if self.state == 'SIDE_DETECT':
             if person_kpts is not None:
                 vote = isLeftSide(person_kpts)
                 if vote is not None:
-                    side_detect_votes.append(vote)
-            if processed >= SIDE_DETECT_FRAMES - 1:
-                use_left_ankle = (side_detect_votes.count(True) >= side_detect_votes.count(False)) if side_detect_votes else True
-                state = 'CALIBRATING'
+                    self.side_detect_votes.append(vote)
+            if frames_before >= SIDE_DETECT_FRAMES - 1:
+                votes = self.side_detect_votes
+                self.use_left_ankle = (votes.count(True) >= votes.count(False)) if votes else True
+                self.state = 'CALIBRATING'
 
-        elif state == 'CALIBRATING':
+        elif self.state == 'CALIBRATING':
             if ankle_y_raw is not None:
-                calibration_ys.append(ankle_y_raw)
-            if len(calibration_ys) >= GROUND_CALIBRATION_FRAMES:
-                ground_y = sum(calibration_ys) / len(calibration_ys)
-                state = 'STANDING'
+                self.calibration_ys.append(ankle_y_raw)
+            if len(self.calibration_ys) >= GROUND_CALIBRATION_FRAMES:
+                self.ground_y = sum(self.calibration_ys) / len(self.calibration_ys)
+                self.state = 'STANDING'
 
         elif ankle_y_raw is not None:
-            smooth_y(ankle_y_buffer, ankle_y_raw, processed)
+            smooth_y(self.ankle_y_buffer, ankle_y_raw, frame_index)
 
-            if state == 'STANDING':
-                is_airborne = ankle_y_raw < (ground_y - AIRBORNE_THRESHOLD)
-            elif state == 'AIRBORNE':
-                is_airborne = ankle_y_raw <= y1
+            if self.state == 'STANDING':
+                is_airborne = ankle_y_raw < (self.ground_y - AIRBORNE_THRESHOLD)
+            elif self.state == 'AIRBORNE':
+                is_airborne = ankle_y_raw <= self.y1
             else:
                 is_airborne = False
 
-            if state == 'STANDING' and is_airborne:
-                y1, max_frame1 = find_max_y(ankle_y_buffer)
-                state = 'AIRBORNE'
+            if self.state == 'STANDING' and is_airborne:
+                self.y1, self.max_frame1 = find_max_y(self.ankle_y_buffer)
+                self.state = 'AIRBORNE'
 
-            elif state == 'AIRBORNE' and not is_airborne:
-                state = 'STANDING'
-                air_frames = processed - max_frame1
-                t = air_frames / fps
+            elif self.state == 'AIRBORNE' and not is_airborne:
+                self.state = 'STANDING'
+                air_frames = frame_index - self.max_frame1
+                t = air_frames / self.fps
                 h = G * t**2 / 8
-                ankle_y_buffer.clear()
-                y1 = None
-                max_frame1 = None
+                takeoff_frame = self.max_frame1
+                self.ankle_y_buffer.clear()
+                self.y1 = None
+                self.max_frame1 = None
                 if h >= 0.05:
-                    jump_results.append(h)
+                    self.jump_results.append(h)
+                    self.jumps.append({
+                        "takeoff_frame": takeoff_frame,
+                        "landing_frame": frame_index,
+                        "air_time": t,
+                        "height": h,
+                    })
+
+    def needs_every_frame(self, person_kpts):
+        """True while a takeoff may be under way, so no frame can be skipped."""
+        if self.state in ('SIDE_DETECT', 'AIRBORNE'):
+            return True
+        if self.state != 'STANDING' or person_kpts is None:
+            return False
+        ankle_y_raw = get_ankle_y_single(person_kpts, self.use_left_ankle)
+        if ankle_y_raw is None:
+            return False
+        return ankle_y_raw < self.ground_y - AIRBORNE_THRESHOLD * RISE_TRIGGER_FRACTION
+
+    def best_jump_height(self):
+        return max(self.jump_results) if self.jump_results else None
+
+
+def iter_batches(frames, batch_size):
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def has_person(result):
+    return result.keypoints is not None and len(result.keypoints.xy) > 0
+
+
+def _to_frame_pixels(person_kpts, scale):
+    """Map keypoints found on a resize_for_inference frame back to the original; (0, 0) stays undetected."""
+    if scale == (1.0, 1.0):
+        return person_kpts
+    return person_kpts / np.array(scale, dtype=person_kpts.dtype)
+
+
+def iter_person_keypoints(frames, model, batch_size=DEFAULT_BATCH_SIZE, short_side=None):
+    """
+    Run YOLO pose over frames batch_size at a time and yield the first person's
+    keypoints (or None) for every frame, in frame order.
+
+    The keypoints of a whole batch are stacked and copied to the CPU in one
+    transfer instead of once per frame. With short_side, frames are shrunk to
+    it first (see frame_pipeline.resize_for_inference) and the keypoints are
+    returned in original frame pixels.
+    """
+    for batch in iter_batches(frames, batch_size):
+        started = time.perf_counter()
+        resized = [resize_for_inference(frame, short_side) for frame in batch]
+        results = model([frame for frame, _ in resized], conf=0.5, verbose=False)
+
+        found = [has_person(r) for r in results]
+        if any(found):
+            keypoints = iter(torch.stack(
+                [r.keypoints.xy[0] for r, has in zip(results, found) if has]
+            ).cpu().numpy())
+        FRAME_SECONDS.observe(
+            "yolo_inference", value=(time.perf_counter() - started) / len(batch), count=len(batch)
+        )
+
+        for (_, scale), has in zip(resized, found):
+            yield _to_frame_pixels(next(keypoints), scale) if has else None
+
+
+def athlete_roi(person_kpts, frame_shape, padding=ROI_PADDING):
+    """Padded (x0, y0, x1, y1) box around the detected keypoints, clipped to the frame."""
+    frame_height, frame_width = frame_shape[:2]
+    valid = person_kpts[(person_kpts[:, 0] > 0) & (person_kpts[:, 1] > 0)]
+    if len(valid) == 0:
+        return None
+    (min_x, min_y), (max_x, max_y) = valid.min(axis=0), valid.max(axis=0)
+    pad_x = max((max_x - min_x) * padding, ROI_MIN_SIZE / 2)
+    pad_y = max((max_y - min_y) * padding, ROI_MIN_SIZE / 2)
+    x0, y0 = max(0, int(min_x - pad_x)), max(0, int(min_y - pad_y))
+    x1, y1 = min(frame_width, int(max_x + pad_x)), min(frame_height, int(max_y + pad_y))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return x0, y0, x1, y1
+
+
+def detect_person_keypoints(model, frame, roi=None, short_side=None):
+    """
+    First person's keypoints in full-frame pixels, running YOLO only inside
+    roi when given, on a copy shrunk to short_side when given.
+    """
+    started = time.perf_counter()
+    if roi is None:
+        frame, scale = resize_for_inference(frame, short_side)
+        result = model(frame, conf=0.5, verbose=False)[0]
+        FRAME_SECONDS.observe("yolo_inference", value=time.perf_counter() - started)
+        if not has_person(result):
+            return None
+        return _to_frame_pixels(result.keypoints.xy[0].cpu().numpy(), scale)
+
+    x0, y0, x1, y1 = roi
+    crop, scale = resize_for_inference(frame[y0:y1, x0:x1], short_side)
+    imgsz = min(YOLO_IMGSZ, math.ceil(max(crop.shape[:2]) / 32) * 32)
+    result = model(crop, conf=0.5, imgsz=imgsz, verbose=False)[0]
+    FRAME_SECONDS.observe("yolo_roi_inference", value=time.perf_counter() - started)
+    if not has_person(result):
+        return None
+    person_kpts = _to_frame_pixels(result.keypoints.xy[0].cpu().numpy(), scale)
+    detected = (person_kpts[:, 0] > 0) & (person_kpts[:, 1] > 0)
+    person_kpts[detected] += np.array([x0, y0], dtype=person_kpts.dtype)
+    return person_kpts
+
+
+def track_adaptive(
+    frames, model, tracker, stride=ADAPTIVE_STRIDE, padding=ROI_PADDING, short_side=None
+):
+    """
+    Feed tracker with strided, ROI-cropped YOLO inference.
+
+    The frames skipped since the last sample are kept in a small buffer. When
+    a sample shows the ankle rising, those frames are inferred and pushed
+    first, so the tracker sees every frame around takeoff and landing just as
+    in full-rate mode.
+    """
+    skipped = deque(maxlen=max(stride - 1, 0))
+    roi = None
+
+    def infer(frame):
+        nonlocal roi
+        person_kpts = detect_person_keypoints(model, frame, roi, short_side)
+        if person_kpts is None and roi is not None:
+            person_kpts = detect_person_keypoints(model, frame, short_side=short_side)
+        roi = athlete_roi(person_kpts, frame.shape, padding) if person_kpts is not None else None
+        return person_kpts
+
+    dense = True
+    for frame_index, frame in enumerate(frames):
+        if not dense and skipped.maxlen and len(skipped) < skipped.maxlen:
+            skipped.append((frame_index, frame))
+            continue
+
+        person_kpts = infer(frame)
+        if not dense and tracker.needs_every_frame(person_kpts):
+            for skipped_index, skipped_frame in skipped:
+                tracker.push(skipped_index, infer(skipped_frame))
+            if person_kpts is not None:
+                roi = athlete_roi(person_kpts, frame.shape, padding)
+        skipped.clear()
+
+        tracker.push(frame_index, person_kpts)
+        dense = tracker.needs_every_frame(person_kpts)
+
+
+def find_jumps(
+    video_path: str,
+    frames=None,
+    fps: float | None = None,
+    model=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    adaptive: bool = False,
+    stride: int = ADAPTIVE_STRIDE,
+    deterministic: bool = False,
+    inference_short_side: int | None = None,
+) -> list[dict]:
+    """Analyze a video and return every detected jump, in order.
+
+    Each jump is a dict with takeoff_frame, landing_frame, air_time (seconds)
+    and height (meters). Arguments are as for find_jump_height.
+    """
+    if model is None:
+        model = load_yolo_model(deterministic=deterministic)
+
+    cap = None
+    if frames is None:
+        cap = open_video(video_path)
+        frames = iter_video_frames(cap)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+    fps = fps or 30
+
+    tracker = JumpHeightTracker(fps)
+    if adaptive:
+        track_adaptive(frames, model, tracker, stride=stride, short_side=inference_short_side)
+    else:
+        keypoints = iter_person_keypoints(frames, model, batch_size, inference_short_side)
+        for frame_index, person_kpts in enumerate(keypoints):
+            tracker.push(frame_index, person_kpts)
+
+    if cap is not None:
+        cap.release()
+    FRAMES_PROCESSED.inc("jump_height", amount=tracker.frames_seen)
+    if deterministic:
+        return [
+            {**jump, "height": round(jump["height"], HEIGHT_DECIMALS)}
+            for jump in tracker.jumps
+        ]
+    return tracker.jumps
+
+
+def best_jump_height(jumps):
+    return max((jump["height"] for jump in jumps), default=None)
+
+
+def find_jump_height(
+    video_path: str,
+    frames=None,
+    fps: float | None = None,
+    model=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    adaptive: bool = False,
+    stride: int = ADAPTIVE_STRIDE,
+    deterministic: bool = False,
+    inference_short_side: int | None = None,
+) -> float | None:
+    """Analyze a video and return the best jump height in meters, or None if no jump detected.
+
+    When frames is given (an iterator of BGR frames, e.g. from
+    frame_pipeline.run_shared_decode) it is consumed instead of decoding video_path.
+    When model is given (e.g. checked out of a model_registry pool) it is used
+    instead of loading YOLO_MODEL_PATH. batch_size frames are sent to YOLO per
+    call; batch_size=1 runs one frame at a time.
+
+    With adaptive=True, frames are sampled every stride frames until the ankle
+    starts rising and YOLO runs on a crop around the athlete (see
+    track_adaptive); batch_size is not used in that mode.
 
-        processed += 1
+    With deterministic=True the model should come from
+    load_yolo_model(deterministic=True), which pins YOLO to the CPU and makes
+    torch deterministic; that is what makes repeated runs agree. The height
+    is then also rounded to HEIGHT_DECIMALS to keep float noise out of the
+    stored value, but rounding alone cannot make runs on different devices
+    or thread counts agree: a value near a rounding boundary still flips.
+    Machines agree only with the same model files, library versions and CPU
+    instruction set.
 
-    cap.release()
-    return max(jump_results) if jump_results else None
+    With inference_short_side, YOLO sees frames (or ROI crops) shrunk to that
+    short side; keypoints are mapped back to original pixels, so the
+    pixel thresholds keep their meaning.
+    """
+    return best_jump_height(find_jumps(
+        video_path,
+        frames=frames,
+        fps=fps,
+        model=model,
+        batch_size=batch_size,
+        adaptive=adaptive,
+        stride=stride,
+        deterministic=deterministic,
+        inference_short_side=inference_short_side,
+    ))
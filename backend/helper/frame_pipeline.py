@@ -0,0 +1,279 @@
+import itertools
+import queue
+import threading
+import time
+
+import cv2
+
+from helper.telemetry import FRAME_SECONDS, run_in_context
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_QUEUE_SIZE = 8
+PUT_POLL_SECONDS = 0.1
+# Frames are shrunk to this short side (pixels) before pose inference; both
+# models resize to well below it internally, so larger frames only cost time.
+# See benchmarks/inference_resolution.py for the accuracy trade-off.
+DEFAULT_INFERENCE_SHORT_SIDE = 720
+
+_END_OF_STREAM = object()
+
+
+def open_video(input_source):
+    cap = cv2.VideoCapture(input_source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open input source: {input_source}")
+    return cap
+
+
+def iter_video_frames(cap):
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+
+
+def resize_for_inference(frame, short_side):
+    """
+    (frame, (scale_x, scale_y)): frame shrunk with INTER_AREA so its short
+    side is at most short_side, and the factors it was scaled by. Pixel
+    coordinates found on the returned frame map back to the original by
+    dividing by them. The frame is returned as-is (scale 1.0) when it already
+    fits or short_side is None; normalized coordinates need no mapping.
+    """
+    frame_height, frame_width = frame.shape[:2]
+    if not short_side or min(frame_height, frame_width) <= short_side:
+        return frame, (1.0, 1.0)
+    scale = short_side / min(frame_height, frame_width)
+    size = (max(1, round(frame_width * scale)), max(1, round(frame_height * scale)))
+    resized = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return resized, (size[0] / frame_width, size[1] / frame_height)
+
+
+def _iter_queue(frame_queue):
+    while True:
+        item = frame_queue.get()
+        if item is _END_OF_STREAM:
+            return
+        yield item
+
+
+class _Consumer:
+    def __init__(self, name, fn, queue_size):
+        self.name = name
+        self.fn = fn
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = None
+
+    def run(self, fps):
+        try:
+            self.result = self.fn(_iter_queue(self.queue), fps)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.closed.set()
+
+    def put(self, item):
+        # Blocks while the queue is full (backpressure on the decoder), but
+        # gives up once the consumer has stopped reading.
+        while not self.closed.is_set():
+            try:
+                self.queue.put(item, timeout=PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+
+def run_shared_decode(
+    input_source,
+    consumers,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    start_frame=0,
+    stop_frame=None,
+):
+    """
+    Decode input_source once and fan every frame out to each consumer.
+
+    consumers maps a name to a callable (frames, fps) -> result, where frames
+    is an iterator over BGR frames. Each consumer runs in its own thread and
+    reads from a bounded queue, so at most queue_size frames per consumer are
+    held in memory. Frames are shared between consumers and must not be
+    modified in place.
+
+    start_frame / stop_frame limit decoding to the frames in
+    [start_frame, stop_frame), e.g. one segment of a long recording.
+
+    Returns a dict mapping each consumer name to its result. If any consumer
+    raises, the first error is re-raised after all threads have stopped.
+    """
+    cap = open_video(input_source)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frames = iter_video_frames(cap)
+    if stop_frame is not None:
+        frames = itertools.islice(frames, max(0, stop_frame - start_frame))
+
+    workers = [_Consumer(name, fn, queue_size) for name, fn in consumers.items()]
+    for worker in workers:
+        worker.thread = threading.Thread(
+            target=run_in_context(worker.run), args=(fps,), name=f"frame-consumer-{worker.name}", daemon=True
+        )
+        worker.thread.start()
+
+    try:
+        for frame in frames:
+            active = [worker for worker in workers if not worker.closed.is_set()]
+            if not active:
+                break
+            for worker in active:
+                worker.put(frame)
+    finally:
+        cap.release()
+        for worker in workers:
+            worker.put(_END_OF_STREAM)
+        for worker in workers:
+            worker.thread.join()
+
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
+
+    return {worker.name: worker.result for worker in workers}
+
+
+class StageTimer:
+    """
+    Accumulates wall time and item counts per pipeline stage.
+
+    Every add() also lands in the process-wide per-frame histogram
+    (telemetry.FRAME_SECONDS) under the same stage name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = {}
+        self.counts = {}
+
+    def add(self, stage, seconds, count=1):
+        FRAME_SECONDS.observe(stage, value=seconds / count, count=count)
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def summary(self):
+        with self._lock:
+            return {
+                stage: {"seconds": seconds, "count": self.counts[stage]}
+                for stage, seconds in self.seconds.items()
+            }
+
+
+def iter_timed(iterable, timer, stage="decode"):
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        timer.add(stage, time.perf_counter() - started)
+        yield item
+
+
+def iter_threaded(iterable, queue_size=DEFAULT_QUEUE_SIZE, timer=None, stage="decode"):
+    """
+    Pull items from iterable on a background thread through a bounded queue.
+
+    Items are yielded in order. An exception raised by the iterable is
+    re-raised in the consuming thread. If the consumer stops early, the
+    producer notices on its next put and exits.
+    """
+    items = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    errors = []
+
+    def produce():
+        try:
+            iterator = iter(iterable)
+            while not stopped.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                if timer is not None:
+                    timer.add(stage, time.perf_counter() - started)
+                while not stopped.is_set():
+                    try:
+                        items.put(item, timeout=PUT_POLL_SECONDS)
+                        break
+                    except queue.Full:
+                        continue
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            while not stopped.is_set():
+                try:
+                    items.put(_END_OF_STREAM, timeout=PUT_POLL_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+
+    thread = threading.Thread(
+        target=run_in_context(produce), name=f"{stage}-producer", daemon=True
+    )
+    thread.start()
+    try:
+        yield from _iter_queue(items)
+    finally:
+        stopped.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+class ThreadedSink:
+    """
+    Run fn(item) for each put() item, in order, on a background thread.
+
+    The queue is bounded so a slow sink applies backpressure to the caller.
+    close() waits for the queue to drain and re-raises the first error fn hit.
+    """
+
+    def __init__(self, fn, queue_size=DEFAULT_QUEUE_SIZE, timer=None, stage="encode"):
+        self.fn = fn
+        self.timer = timer
+        self.stage = stage
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(
+            target=run_in_context(self._run), name=f"{stage}-sink", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self):
+        for item in _iter_queue(self.queue):
+            if self.error is not None:
+                continue
+            started = time.perf_counter()
+            try:
+                self.fn(item)
+            except BaseException as e:
+                self.error = e
+            if self.timer is not None:
+                self.timer.add(self.stage, time.perf_counter() - started)
+
+    def put(self, item):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(item)
+
+    def close(self):
+        self.queue.put(_END_OF_STREAM)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,225 @@
+import itertools
+import json
+import queue
+import threading
+import traceback
+import uuid
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+from helper.telemetry import FAILURES, JOBS_FINISHED
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 100
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED_STATUSES = {DONE, FAILED}
+
+_STOP = object()
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobStore:
+    """Persistent job table in Postgres, accessed through a pooled helper.db.Database."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def _execute(self, sql, params=(), fetch=None):
+        with self.db.cursor() as cur:
+            cur.execute(sql, params)
+            if fetch == "one":
+                return cur.fetchone()
+            if fetch == "all":
+                return cur.fetchall()
+            return None
+
+    def create_table(self):
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id              UUID PRIMARY KEY,
+                input_video_id  UUID REFERENCES input_videos(id),
+                status          TEXT NOT NULL,
+                priority        INT NOT NULL DEFAULT 0,
+                payload         JSONB NOT NULL,
+                result          JSONB,
+                error           TEXT,
+                created_at      TIMESTAMP NOT NULL,
+                started_at      TIMESTAMP,
+                finished_at     TIMESTAMP
+            )
+        """)
+
+    def create(self, payload, priority=0, input_video_id=None):
+        return self._execute("""
+            INSERT INTO jobs (id, input_video_id, status, priority, payload, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING *
+        """, (
+            str(uuid.uuid4()),
+            input_video_id,
+            QUEUED,
+            priority,
+            json.dumps(payload, default=str),
+            datetime.utcnow(),
+        ), fetch="one")
+
+    def create_many(self, jobs):
+        """Insert (payload, priority, input_video_id) jobs in one statement, returned in order."""
+        if not jobs:
+            return []
+        now = datetime.utcnow()
+        with self.db.cursor() as cur:
+            return execute_values(
+                cur,
+                """
+                    INSERT INTO jobs (id, input_video_id, status, priority, payload, created_at)
+                    VALUES %s
+                    RETURNING *
+                """,
+                [
+                    (
+                        str(uuid.uuid4()),
+                        input_video_id,
+                        QUEUED,
+                        priority,
+                        json.dumps(payload, default=str),
+                        now,
+                    )
+                    for payload, priority, input_video_id in jobs
+                ],
+                fetch=True,
+            )
+
+    def get(self, job_id):
+        return self._execute("SELECT * FROM jobs WHERE id = %s", (job_id,), fetch="one")
+
+    def get_many(self, job_ids):
+        return self._execute(
+            "SELECT * FROM jobs WHERE id = ANY(%s::uuid[])", (list(job_ids),), fetch="all"
+        )
+
+    def list_unfinished(self):
+        return self._execute("""
+            SELECT * FROM jobs
+            WHERE status IN (%s, %s)
+            ORDER BY priority DESC, created_at
+        """, (QUEUED, RUNNING), fetch="all")
+
+    def mark_running(self, job_id):
+        self._execute(
+            "UPDATE jobs SET status = %s, started_at = %s WHERE id = %s",
+            (RUNNING, datetime.utcnow(), job_id),
+        )
+
+    def mark_done(self, job_id, result):
+        self._execute(
+            "UPDATE jobs SET status = %s, result = %s, finished_at = %s WHERE id = %s",
+            (DONE, json.dumps(result, default=str), datetime.utcnow(), job_id),
+        )
+
+    def mark_failed(self, job_id, error):
+        self._execute(
+            "UPDATE jobs SET status = %s, error = %s, finished_at = %s WHERE id = %s",
+            (FAILED, error, datetime.utcnow(), job_id),
+        )
+
+
+class JobQueue:
+    """
+    Bounded in-process worker pool over a persistent JobStore.
+
+    Jobs with a higher priority run first; equal priorities run in submission
+    order. handler(payload) -> result runs on a worker thread and its return
+    value is stored as the job result. Unfinished jobs are re-queued by
+    start(), so a restart does not lose work.
+    """
+
+    def __init__(self, store, handler, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._threads = []
+
+    def _enqueue(self, job):
+        self._queue.put((-job["priority"], next(self._counter), job["id"], job["payload"]))
+
+    def start(self):
+        for job in self.store.list_unfinished():
+            self._enqueue(job)
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put((float("-inf"), next(self._counter), None, _STOP))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, payload, priority=0, input_video_id=None):
+        if self.pending() >= self.max_pending:
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+        job = self.store.create(payload, priority=priority, input_video_id=input_video_id)
+        self._enqueue(job)
+        return job
+
+    def submit_many(self, jobs):
+        """
+        Submit (payload, priority, input_video_id) jobs with a single insert.
+
+        Either all of them are queued or, if they would not fit under
+        max_pending, none are.
+        """
+        if self.pending() + len(jobs) > self.max_pending:
+            raise QueueFullError(
+                f"Job queue cannot take {len(jobs)} more jobs "
+                f"({self.pending()} of {self.max_pending} pending)"
+            )
+        created = self.store.create_many(jobs)
+        for job in created:
+            self._enqueue(job)
+        return created
+
+    def _work(self):
+        while True:
+            _, _, job_id, payload = self._queue.get()
+            if payload is _STOP:
+                return
+            # Nothing may escape: a dead worker thread would stall the queue.
+            try:
+                self._run(job_id, payload)
+            except Exception as e:
+                traceback.print_exc()
+                FAILURES.inc("job_queue")
+                print(f"❌ Job {job_id} could not be recorded: {e}")
+
+    def _run(self, job_id, payload):
+        try:
+            self.store.mark_running(job_id)
+            result = self.handler(payload)
+        except Exception as e:
+            traceback.print_exc()
+            JOBS_FINISHED.inc(FAILED)
+            self.store.mark_failed(job_id, str(e))
+        else:
+            JOBS_FINISHED.inc(DONE)
+            self.store.mark_done(job_id, result)
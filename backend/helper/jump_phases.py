@@ -0,0 +1,356 @@
+from helper.angle_calculation import JOINT_ANGLES
+
+# ── Constants ────────────────────────────────────────────────────────────────
+# Average hip flexion at or below this starts the loading phase.
+LOADING_HIP_FLEXION_DEG = 90.0
+# Loading ends in takeoff once the hip opens this much in a single frame...
+DRAMATIC_INCREASE_DEG = 6.0
+# ...and is at least this far above its loading minimum.
+REBOUND_MARGIN_DEG = 4.0
+# After takeoff, a drop of this much from the hip's peak extension is the
+# landing, and the rep ends once the athlete stands back up to
+# STANDING_HIP_FLEXION_DEG. Only then can the next loading phase start, so
+# the landing squat is not counted as a new rep.
+LANDING_DROP_DEG = 30.0
+STANDING_HIP_FLEXION_DEG = 150.0
+# A phase rep and an airborne jump from the ankle tracker are the same jump
+# when their takeoff frames are at most this far apart.
+MATCH_WINDOW_SECONDS = 1.0
+
+
+# Columns of a calculate_frame_angles row that the tracker reads.
+_ANGLE_COLUMNS = {(side, name): i for i, (side, name, _) in enumerate(JOINT_ANGLES)}
+LEFT_HIP = _ANGLE_COLUMNS["left", "hip_flexion"]
+RIGHT_HIP = _ANGLE_COLUMNS["right", "hip_flexion"]
+LEFT_KNEE = _ANGLE_COLUMNS["left", "knee_flexion"]
+RIGHT_KNEE = _ANGLE_COLUMNS["right", "knee_flexion"]
+LEFT_SHOULDER = _ANGLE_COLUMNS["left", "shoulder_angle"]
+RIGHT_SHOULDER = _ANGLE_COLUMNS["right", "shoulder_angle"]
+
+
+def _new_rep(frame_index):
+    return {
+        "start_frame": frame_index,
+        "takeoff_frame": None,
+        "landing_frame": None,
+        "end_frame": None,
+        "smallest_loading_min_hip_flexion": None,
+        "smallest_loading_min_knee_flexion": None,
+        "largest_loading_max_shoulder_angle": None,
+        "loading_max_shoulder_timestamp": None,
+        "largest_takeoff_max_shoulder_angle": None,
+        "takeoff_max_shoulder_timestamp": None,
+    }
+
+
+def _angle(value):
+    """NaN (not detected) in an angle row becomes None."""
+    return value if value == value else None
+
+
+class JumpPhaseTracker:
+    """
+    approach -> loading -> takeoff -> landing -> approach state machine over
+    joint angles.
+
+    Feed it one frame at a time, in order: push(timestamp, angles) with the
+    primary pose's angles_to_dict() output, or push_row(timestamp, row) with
+    a calculate_frame_angles row (e.g. replayed from a LandmarkStore).
+    frame_index defaults to the number of frames pushed so far.
+
+    Every loading phase opens a rep in reps with its start/takeoff/landing/end
+    frames, hip and knee minima and the shoulder peaks used for angular
+    velocity. The thresholds default to the module constants; a scoring
+    config's "phases" entry overrides them.
+    """
+
+    __slots__ = (
+        "loading_hip_flexion_deg",
+        "dramatic_increase_deg",
+        "rebound_margin_deg",
+        "landing_drop_deg",
+        "standing_hip_flexion_deg",
+        "phase_state",
+        "prev_avg_hip_flexion",
+        "loading_min_hip_flexion",
+        "takeoff_peak_hip_flexion",
+        "analysis_side",
+        "side_locked",
+        "left_shoulder_valid_count",
+        "right_shoulder_valid_count",
+        "display_side",
+        "frames_pushed",
+        "reps",
+        "rep",
+    )
+
+    def __init__(
+        self,
+        loading_hip_flexion_deg=LOADING_HIP_FLEXION_DEG,
+        dramatic_increase_deg=DRAMATIC_INCREASE_DEG,
+        rebound_margin_deg=REBOUND_MARGIN_DEG,
+        landing_drop_deg=LANDING_DROP_DEG,
+        standing_hip_flexion_deg=STANDING_HIP_FLEXION_DEG,
+    ):
+        self.loading_hip_flexion_deg = loading_hip_flexion_deg
+        self.dramatic_increase_deg = dramatic_increase_deg
+        self.rebound_margin_deg = rebound_margin_deg
+        self.landing_drop_deg = landing_drop_deg
+        self.standing_hip_flexion_deg = standing_hip_flexion_deg
+        self.phase_state = "approach"
+        self.prev_avg_hip_flexion = None
+        self.loading_min_hip_flexion = None
+        self.takeoff_peak_hip_flexion = None
+        self.analysis_side = None
+        self.side_locked = False
+        self.left_shoulder_valid_count = 0
+        self.right_shoulder_valid_count = 0
+        self.display_side = None
+        self.frames_pushed = 0
+        self.reps = []
+        self.rep = None
+
+    def push(self, timestamp, angles, frame_index=None):
+        """
+        Advance the state machine by one frame and return the current phase,
+        or None when hip flexion was not detected in this frame.
+        """
+        left = angles["left"]
+        right = angles["right"]
+        return self.push_values(
+            timestamp,
+            left["hip_flexion"],
+            right["hip_flexion"],
+            left["knee_flexion"],
+            right["knee_flexion"],
+            left["shoulder_angle"],
+            right["shoulder_angle"],
+            frame_index,
+        )
+
+    def push_row(self, timestamp, row, frame_index=None):
+        """push() for one calculate_frame_angles row, as a list of floats (NaN = not detected)."""
+        return self.push_values(
+            timestamp,
+            _angle(row[LEFT_HIP]),
+            _angle(row[RIGHT_HIP]),
+            _angle(row[LEFT_KNEE]),
+            _angle(row[RIGHT_KNEE]),
+            _angle(row[LEFT_SHOULDER]),
+            _angle(row[RIGHT_SHOULDER]),
+            frame_index,
+        )
+
+    def push_values(
+        self,
+        timestamp,
+        left_hip,
+        right_hip,
+        left_knee,
+        right_knee,
+        left_shoulder,
+        right_shoulder,
+        frame_index=None,
+    ):
+        """push() with the six angles it reads passed directly (None = not detected)."""
+        if frame_index is None:
+            frame_index = self.frames_pushed
+        self.frames_pushed += 1
+
+        if left_shoulder is not None:
+            self.left_shoulder_valid_count += 1
+        if right_shoulder is not None:
+            self.right_shoulder_valid_count += 1
+
+        if left_shoulder is None:
+            dominant_side = "right" if right_shoulder is not None else None
+        elif right_shoulder is None:
+            dominant_side = "left"
+        elif self.left_shoulder_valid_count >= self.right_shoulder_valid_count:
+            dominant_side = "left"
+        else:
+            dominant_side = "right"
+
+        if not self.side_locked:
+            self.analysis_side = dominant_side or self.analysis_side
+        analysis_side = self.analysis_side
+
+        if analysis_side == "left":
+            selected_shoulder_angle = left_shoulder
+        elif analysis_side == "right":
+            selected_shoulder_angle = right_shoulder
+        else:
+            selected_shoulder_angle = (
+                left_shoulder if left_shoulder is not None else right_shoulder
+            )
+
+        self.display_side = analysis_side or dominant_side
+
+        if right_hip is None:
+            if left_hip is None:
+                return None
+            avg_hip_flexion = left_hip
+        elif left_hip is None:
+            avg_hip_flexion = right_hip
+        else:
+            avg_hip_flexion = (right_hip + left_hip) / 2
+
+        if right_knee is None:
+            knee_flexion = left_knee
+        elif left_knee is None or right_knee <= left_knee:
+            knee_flexion = right_knee
+        else:
+            knee_flexion = left_knee
+
+        prev_avg_hip_flexion = self.prev_avg_hip_flexion
+        self.prev_avg_hip_flexion = avg_hip_flexion
+        state = self.phase_state
+        rep = self.rep
+
+        if state == "approach":
+            if avg_hip_flexion <= self.loading_hip_flexion_deg:
+                state = self.phase_state = "loading"
+                self.loading_min_hip_flexion = avg_hip_flexion
+                rep = self.rep = _new_rep(frame_index)
+                self.reps.append(rep)
+                rep["smallest_loading_min_hip_flexion"] = avg_hip_flexion
+                rep["smallest_loading_min_knee_flexion"] = knee_flexion
+        elif state == "loading":
+            if avg_hip_flexion < self.loading_min_hip_flexion:
+                self.loading_min_hip_flexion = avg_hip_flexion
+            if avg_hip_flexion < rep["smallest_loading_min_hip_flexion"]:
+                rep["smallest_loading_min_hip_flexion"] = avg_hip_flexion
+            if knee_flexion is not None:
+                smallest_knee = rep["smallest_loading_min_knee_flexion"]
+                if smallest_knee is None or knee_flexion < smallest_knee:
+                    rep["smallest_loading_min_knee_flexion"] = knee_flexion
+            if (
+                prev_avg_hip_flexion is not None
+                and avg_hip_flexion >= self.loading_min_hip_flexion + self.rebound_margin_deg
+                and avg_hip_flexion - prev_avg_hip_flexion >= self.dramatic_increase_deg
+            ):
+                state = self.phase_state = "takeoff"
+                self.takeoff_peak_hip_flexion = avg_hip_flexion
+                rep["takeoff_frame"] = frame_index
+        elif state == "takeoff":
+            if avg_hip_flexion > self.takeoff_peak_hip_flexion:
+                self.takeoff_peak_hip_flexion = avg_hip_flexion
+            if avg_hip_flexion <= self.takeoff_peak_hip_flexion - self.landing_drop_deg:
+                state = self.phase_state = "landing"
+                rep["landing_frame"] = frame_index
+        elif state == "landing":
+            if avg_hip_flexion >= self.standing_hip_flexion_deg:
+                state = self.phase_state = "approach"
+                rep["end_frame"] = frame_index
+
+        if state == "loading":
+            if not self.side_locked and analysis_side is not None:
+                self.side_locked = True
+            if selected_shoulder_angle is not None:
+                largest = rep["largest_loading_max_shoulder_angle"]
+                if largest is None or selected_shoulder_angle > largest:
+                    rep["largest_loading_max_shoulder_angle"] = selected_shoulder_angle
+                    rep["loading_max_shoulder_timestamp"] = timestamp
+        elif state == "takeoff" and selected_shoulder_angle is not None:
+            largest = rep["largest_takeoff_max_shoulder_angle"]
+            if largest is None or selected_shoulder_angle > largest:
+                rep["largest_takeoff_max_shoulder_angle"] = selected_shoulder_angle
+                rep["takeoff_max_shoulder_timestamp"] = timestamp
+
+        return state
+
+
+def _jump_record(rep, jump):
+    rep = rep or {}
+    jump = jump or {}
+    takeoff_frame = jump.get("takeoff_frame", rep.get("takeoff_frame"))
+    return {
+        "start_frame": rep.get("start_frame", takeoff_frame),
+        "end_frame": rep.get("end_frame") or jump.get("landing_frame"),
+        "takeoff_frame": takeoff_frame,
+        "landing_frame": jump.get("landing_frame", rep.get("landing_frame")),
+        "air_time": jump.get("air_time"),
+        "jump_height": jump.get("height"),
+        "hip_normalized_score": rep.get("hip_normalized_score"),
+        "smallest_loading_min_hip_flexion": rep.get("smallest_loading_min_hip_flexion"),
+        "knee_normalized_score": rep.get("knee_normalized_score"),
+        "smallest_loading_min_knee_flexion": rep.get("smallest_loading_min_knee_flexion"),
+        "angular_velocity": rep.get("angular_velocity"),
+        "angular_velocity_score": rep.get("angular_velocity_score"),
+    }
+
+
+class JumpRecordMerger:
+    """
+    Incremental merge_jump_records, for streams where jumps land one at a time.
+
+    add_jump() pairs each airborne jump from JumpHeightTracker with the
+    closest rep whose takeoff frame is within window_seconds and that no
+    earlier jump took, and remembers the pairing. reps is the phase tracker's
+    rep list so far (scored or not, same order every call); it may only grow.
+
+    Records are ordered by start frame. A rep or jump that starts later than
+    the frame being processed sorts after every record that exists already,
+    so the jump_index of a record never changes once it has been reported.
+    """
+
+    def __init__(self, fps, window_seconds=MATCH_WINDOW_SECONDS):
+        self.window_frames = window_seconds * fps
+        self.jumps = []
+        # Position in reps of the rep paired with each jump, or None.
+        self.rep_positions = []
+
+    def add_jump(self, reps, jump):
+        """Pair jump with a rep; returns its position, for jump_record()."""
+        paired = set(self.rep_positions)
+        position = min(
+            (
+                position for position, rep in enumerate(reps)
+                if position not in paired
+                and rep["takeoff_frame"] is not None
+                and abs(rep["takeoff_frame"] - jump["takeoff_frame"]) <= self.window_frames
+            ),
+            key=lambda position: abs(reps[position]["takeoff_frame"] - jump["takeoff_frame"]),
+            default=None,
+        )
+        self.jumps.append(jump)
+        self.rep_positions.append(position)
+        return len(self.jumps) - 1
+
+    def _records(self, reps):
+        """Records in pairing order (jumps first, then unpaired reps), numbered."""
+        paired = set(self.rep_positions)
+        records = [
+            _jump_record(None if position is None else reps[position], jump)
+            for position, jump in zip(self.rep_positions, self.jumps)
+        ]
+        records.extend(
+            _jump_record(rep, None) for position, rep in enumerate(reps) if position not in paired
+        )
+        for jump_index, record in enumerate(sorted(records, key=lambda record: record["start_frame"])):
+            record["jump_index"] = jump_index
+        return records
+
+    def records(self, reps):
+        """One record per jump and per rep that never left the ground, by jump_index."""
+        return sorted(self._records(reps), key=lambda record: record["jump_index"])
+
+    def jump_record(self, reps, jump_position):
+        """The record of the jump add_jump() returned jump_position for."""
+        return self._records(reps)[jump_position]
+
+
+def merge_jump_records(reps, jumps, fps, window_seconds=MATCH_WINDOW_SECONDS):
+    """
+    Pair phase reps (with their scored metrics) and airborne jumps from
+    JumpHeightTracker into one record per jump, ordered by start frame.
+
+    A rep and a jump are paired when their takeoff frames are within
+    window_seconds (see JumpRecordMerger); reps that never left the ground
+    and jumps without a detected loading phase still get a record, with the
+    missing half None.
+    """
+    merger = JumpRecordMerger(fps, window_seconds)
+    for jump in jumps:
+        merger.add_jump(reps, jump)
+    return merger.records(reps)
@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import numpy as np
+
+from helper.angle_calculation import JOINT_ANGLES
+from helper.pose_extraction import KEYPOINT_NAMES
+
+# ── Constants ────────────────────────────────────────────────────────────────
+NUM_KEYPOINTS = 33
+LANDMARK_FIELDS = ("x_pixel", "y_pixel", "z", "visibility")
+ANGLE_COLUMNS = [f"{side}_{name}" for side, name, _ in JOINT_ANGLES]
+DEFAULT_CAPACITY = 1024
+
+_COLUMNS = ("frame_index", "pose_index", "timestamp", "landmarks", "angles")
+
+
+class LandmarkStore:
+    """
+    Growable columnar buffer of per-frame pose landmarks and joint angles.
+
+    One row per detected pose per frame. Columns are preallocated NumPy arrays
+    (float32 for coordinates and timestamps) that double in size when full.
+    Angles are float64, the values the live phase tracker saw, so a replay
+    (see rescore.replay_landmarks) reproduces the live metrics. The column
+    properties return views of the filled rows, so slicing never copies. fps,
+    when known, is the source frame rate (timestamps are frame_index / fps).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, fps=None):
+        self._size = 0
+        self.fps = fps
+        self._frame_index = np.empty(capacity, dtype=np.int32)
+        self._pose_index = np.empty(capacity, dtype=np.int8)
+        self._timestamp = np.empty(capacity, dtype=np.float32)
+        self._landmarks = np.empty((capacity, NUM_KEYPOINTS, len(LANDMARK_FIELDS)), dtype=np.float32)
+        self._angles = np.empty((capacity, len(JOINT_ANGLES)), dtype=np.float64)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        capacity = max(1, len(self._frame_index) * 2)
+        for name in _COLUMNS:
+            old = getattr(self, f"_{name}")
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, f"_{name}", new)
+
+    def append(self, frame_index, timestamp, landmarks, angles, pose_index=0):
+        """landmarks is a (33, 4) array, angles one row of joint angles (calculate_frame_angles)."""
+        if self._size == len(self._frame_index):
+            self._grow()
+        row = self._size
+        self._frame_index[row] = frame_index
+        self._pose_index[row] = pose_index
+        self._timestamp[row] = timestamp
+        self._landmarks[row] = landmarks
+        self._angles[row] = angles
+        self._size += 1
+
+    @property
+    def frame_index(self):
+        return self._frame_index[: self._size]
+
+    @property
+    def pose_index(self):
+        return self._pose_index[: self._size]
+
+    @property
+    def timestamp(self):
+        return self._timestamp[: self._size]
+
+    @property
+    def landmarks(self):
+        return self._landmarks[: self._size]
+
+    @property
+    def angles(self):
+        return self._angles[: self._size]
+
+    def primary(self):
+        """Boolean mask of the rows for the first detected pose in each frame."""
+        return self.pose_index == 0
+
+    def angle(self, side, name):
+        return self.angles[:, ANGLE_COLUMNS.index(f"{side}_{name}")]
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _COLUMNS)
+
+    def save_npy(self, directory):
+        """Write each column to <directory>/<column>.npy, and fps to fps.npy when set."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _COLUMNS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        if self.fps is not None:
+            np.save(directory / "fps.npy", np.float64(self.fps))
+        return directory
+
+    @classmethod
+    def load_npy(cls, directory, mmap_mode=None):
+        directory = Path(directory)
+        store = cls(capacity=0)
+        columns = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in _COLUMNS}
+        for name, values in columns.items():
+            setattr(store, f"_{name}", values)
+        store._size = len(columns["frame_index"])
+        fps_path = directory / "fps.npy"
+        if fps_path.exists():
+            store.fps = float(np.load(fps_path))
+        return store
+
+    def save_parquet(self, path):
+        """Write one flat row per pose (requires the optional pyarrow dependency)."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+        columns = {
+            "frame_index": self.frame_index,
+            "pose_index": self.pose_index,
+            "timestamp": self.timestamp,
+        }
+        for keypoint_idx, keypoint in enumerate(KEYPOINT_NAMES):
+            for field_idx, field in enumerate(LANDMARK_FIELDS):
+                columns[f"{keypoint}_{field}"] = self.landmarks[:, keypoint_idx, field_idx]
+        for angle_idx, name in enumerate(ANGLE_COLUMNS):
+            columns[name] = self.angles[:, angle_idx]
+
+        pq.write_table(pa.table(columns), str(path))
+        return Path(path)
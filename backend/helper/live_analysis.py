@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import deque
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from helper.analyze_scores import frame_timestamp_ms
+from helper.angle_calculation import calculate_frame_angles
+from helper.find_jump_height import JumpHeightTracker, detect_person_keypoints
+from helper.frame_pipeline import resize_for_inference
+from helper.jump_phases import JumpPhaseTracker, JumpRecordMerger
+from helper.pose_extraction import angles_to_dict, landmarks_to_array
+from helper.scoring import get_scoring_config, score_rep, score_session
+from helper.telemetry import FRAME_SECONDS, FRAMES_PROCESSED, LIVE_FRAMES_DROPPED
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_LIVE_FPS = 30.0
+# Frames waiting for inference. Any more and the oldest is dropped, so the
+# result for a frame is never more than this many inference times behind.
+DEFAULT_MAX_PENDING_FRAMES = 1
+
+
+def decode_frame(data):
+    """BGR frame from one encoded image (JPEG, PNG, ...), or None if it does not decode."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class LiveFrameBuffer:
+    """
+    Frames received from a live client, waiting for inference.
+
+    Lives on the event loop: the socket reader put()s every frame and the
+    inference loop awaits get(). At most max_pending frames wait; a new frame
+    beyond that drops the oldest one, so inference always works on recent
+    frames instead of building a backlog. Frames keep the index they arrived
+    with, so dropped frames leave gaps and timing stays frame_index / fps.
+    """
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING_FRAMES):
+        # maxlen=0 would drop every frame and leave get() waiting forever.
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self._frames = deque(maxlen=max_pending)
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, data):
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+            LIVE_FRAMES_DROPPED.inc()
+        self._frames.append((self.received, data, time.perf_counter()))
+        self.received += 1
+        self._ready.set()
+
+    def close(self):
+        """No more frames will come; get() returns None once the buffer is empty."""
+        self.closed = True
+        self._ready.set()
+
+    async def get(self):
+        """Oldest pending (frame_index, data, received_at), or None when closed and empty."""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+
+class LiveSession:
+    """
+    Incremental analysis of one live stream.
+
+    process() runs pose inference, the jump phase tracker and the jump height
+    tracker on one frame and returns the events for it: always a "frame"
+    event, plus a "jump" event for every jump that landed on this frame.
+    Jumps are paired with reps once, as they land (JumpRecordMerger), so a
+    jump event carries the same record and jump_index as summary().
+    detector must be a fresh VIDEO-mode landmarker (see model_registry), and
+    frames must come in increasing frame_index order.
+    """
+
+    def __init__(
+        self,
+        detector,
+        yolo_model,
+        fps=DEFAULT_LIVE_FPS,
+        scoring=None,
+        deterministic=False,
+        inference_short_side=None,
+    ):
+        self.detector = detector
+        self.yolo_model = yolo_model
+        self.fps = fps
+        self.scoring = scoring or get_scoring_config()
+        self.deterministic = deterministic
+        self.inference_short_side = inference_short_side
+        self.phase_tracker = JumpPhaseTracker(**self.scoring["phases"])
+        self.height_tracker = JumpHeightTracker(fps)
+        self.merger = JumpRecordMerger(fps)
+        self.frames_analyzed = 0
+        self.last_timestamp_ms = -1
+
+    def scored_reps(self):
+        return [
+            {**rep, **score_rep(rep, self.deterministic, self.scoring)}
+            for rep in self.phase_tracker.reps
+        ]
+
+    def process(self, frame_index, data):
+        started = time.perf_counter()
+        frame = decode_frame(data)
+        if frame is None:
+            return [{"type": "error", "frame_index": frame_index, "detail": "Could not decode frame"}]
+
+        timestamp = frame_index / self.fps
+        timestamp_ms = max(frame_timestamp_ms(frame_index, self.fps), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        inference_frame, _ = resize_for_inference(frame, self.inference_short_side)
+        frame_rgb = cv2.cvtColor(inference_frame, cv2.COLOR_BGR2RGB)
+        detection_results = self.detector.detect_for_video(
+            mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb), timestamp_ms
+        )
+
+        angles = None
+        phase = None
+        if detection_results.pose_landmarks:
+            frame_height, frame_width, _ = frame.shape
+            landmark_array = landmarks_to_array(
+                detection_results.pose_landmarks[0], frame_height, frame_width
+            )
+            angles = angles_to_dict(calculate_frame_angles(landmark_array))
+            phase = self.phase_tracker.push(timestamp, angles, frame_index)
+
+        jumps_before = len(self.height_tracker.jumps)
+        self.height_tracker.push(
+            frame_index,
+            detect_person_keypoints(self.yolo_model, frame, short_side=self.inference_short_side),
+        )
+        self.frames_analyzed += 1
+
+        events = [{
+            "type": "frame",
+            "frame_index": frame_index,
+            "timestamp": timestamp,
+            "phase": phase,
+            "display_side": self.phase_tracker.display_side,
+            "angles": angles,
+        }]
+        new_jumps = self.height_tracker.jumps[jumps_before:]
+        if new_jumps:
+            reps = self.scored_reps()
+            for jump in new_jumps:
+                position = self.merger.add_jump(reps, jump)
+                events.append({"type": "jump", **self.merger.jump_record(reps, position)})
+
+        FRAMES_PROCESSED.inc("live")
+        FRAME_SECONDS.observe("live_frame", value=time.perf_counter() - started)
+        return events
+
+    def summary(self):
+        """
+        Per-jump records of the whole stream, and the metrics, jump height
+        and score of its best jump (scoring.score_session), as stored for
+        uploads.
+        """
+        jumps = self.merger.records(self.scored_reps())
+        session = score_session(jumps, self.scoring)
+        return {
+            "frames_analyzed": self.frames_analyzed,
+            "metrics": session["metrics"],
+            "jump_height": session["jump_height"],
+            "score": session["score"],
+            "best_jump_index": session["jump_index"],
+            "jumps": jumps,
+        }
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+from helper.scoring import get_scoring_config
+from helper.telemetry import FAILURES
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_MODEL = "gpt-4.1-mini"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+# Decimals each value is rounded to for the report cache key; a negative
+# value rounds to tens. Metrics this close produce the same advice, so their
+# report is reused instead of calling the LLM again.
+REPORT_KEY_DECIMALS = {
+    "smallest_loading_min_hip_flexion": 0,
+    "hip_normalized_score": 0,
+    "smallest_loading_min_knee_flexion": 0,
+    "knee_normalized_score": 0,
+    "angular_velocity": -1,
+    "angular_velocity_score": 0,
+    "jump_height": 2,
+}
+
+
+def build_report_prompt(metrics, jump_height, config=None):
+    """The ideal ranges come from the scoring config, so reports match the stored scores."""
+    config = config or get_scoring_config()
+    knee_min, knee_max = config["knee_range_deg"]
+    return f"""
+## Here is the reference to ideal ranges of 3 metrics:
+smallest_loading_min_hip_flexion: {config['hip_target_deg']:g}° exactly
+smallest_loading_min_knee_flexion: {knee_min:g}° – {knee_max:g}°
+angular_velocity: ≥ {config['angular_velocity_target']:g}
+
+## Athlete's Metrics:
+- smallest_loading_min_hip_flexion: {metrics['smallest_loading_min_hip_flexion']}
+- hip_normalized_score: {metrics['hip_normalized_score']}
+- smallest_loading_min_knee_flexion: {metrics['smallest_loading_min_knee_flexion']}
+- knee_normalized_score: {metrics['knee_normalized_score']}
+- angular_velocity: {metrics['angular_velocity']}
+- angular_velocity_score: {metrics['angular_velocity_score']}
+- jump_height: {jump_height}
+
+## Instruction: Write me a report that includes:
+
+### 1. Performance Summary (2–3 sentences)
+Brief, encouraging overview of this jump's performance.
+
+### 2. Top 3 Strengths
+What the jumper is doing well biomechanically.
+
+### 3. Top 3 Areas to Improve (Priority Order)
+Be specific — reference exact metrics and what the ideal looks like.
+
+### 4. Drill Recommendations
+For each improvement area, give 1–2 specific drills or exercises (name them, explain briefly).
+
+Keep the tone motivational but honest. Be specific, not generic.
+"""
+
+
+def report_key(metrics, jump_height):
+    values = {**metrics, "jump_height": jump_height}
+    return tuple(
+        None if values.get(name) is None else round(float(values[name]), decimals)
+        for name, decimals in REPORT_KEY_DECIMALS.items()
+    )
+
+
+# ── Backends ─────────────────────────────────────────────────────────────────
+class OpenAIBackend:
+    """
+    Responses API through one shared AsyncOpenAI client (and its connection pool).
+
+    The client is created on the first report, not at startup, so a missing
+    OPENAI_API_KEY or openai package only fails the reports (stored as None)
+    and never keeps the API from starting.
+    """
+
+    def __init__(self, model=DEFAULT_MODEL, api_key=None):
+        self.model = model
+        self.api_key = api_key
+        self.client = None
+
+    def _client(self):
+        if self.client is None:
+            try:
+                from openai import AsyncOpenAI
+            except ImportError:
+                raise RuntimeError("The openai LLM backend needs openai: pip install openai")
+            self.client = AsyncOpenAI(api_key=self.api_key)
+        return self.client
+
+    async def generate(self, prompt):
+        response = await self._client().responses.create(model=self.model, input=prompt)
+        return response.output_text
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+
+
+class StubBackend:
+    """Offline backend for tests and local development: no network, fixed text."""
+
+    async def generate(self, prompt):
+        metrics = prompt.split("## Athlete's Metrics:")[1].split("## Instruction:")[0]
+        return f"### 1. Performance Summary\nStub report (no LLM configured).\n\n### Metrics\n{metrics.strip()}\n"
+
+    async def close(self):
+        pass
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+
+def create_backend(name, **kwargs):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend '{name}'; expected one of: {', '.join(BACKENDS)}")
+    return backend_class(**kwargs)
+
+
+# ── Service ──────────────────────────────────────────────────────────────────
+class ReportService:
+    """
+    LLM report generation on a private asyncio loop.
+
+    At most max_concurrency backend calls run at once. Reports are cached
+    (LRU, cache_size entries) by report_key, and concurrent requests for the
+    same key share one backend call. submit() works from any thread and
+    returns a concurrent.futures.Future; a failed or timed-out call resolves
+    to None and is not cached. Prompts use the targets of the scoring config
+    (default: the current version), which the cached reports are tied to.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        cache_size=DEFAULT_CACHE_SIZE,
+        timeout=DEFAULT_TIMEOUT_SECONDS,
+        scoring=None,
+    ):
+        self.backend = backend
+        self.scoring = scoring or get_scoring_config()
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.backend_calls = 0
+        self.failures = 0
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="llm-reports", daemon=True
+        )
+        self._thread.start()
+
+    def _cached(self, key):
+        with self._lock:
+            report = self._cache.get(key)
+            if report is not None:
+                self._cache.move_to_end(key)
+            return report
+
+    def _store(self, key, report):
+        with self._lock:
+            self._cache[key] = report
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _call_backend(self, key, prompt):
+        async with self._semaphore:
+            self.backend_calls += 1
+            try:
+                report = await asyncio.wait_for(self.backend.generate(prompt), self.timeout)
+            except Exception as e:
+                self.failures += 1
+                FAILURES.inc("llm_report")
+                print(f"❌ LLM report failed: {e}")
+                return None
+        self._store(key, report)
+        return report
+
+    async def _report(self, metrics, jump_height, on_done):
+        self.requests += 1
+        key = report_key(metrics, jump_height)
+        report = self._cached(key)
+        if report is not None:
+            self.cache_hits += 1
+        else:
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                task = self.loop.create_task(
+                    self._call_backend(key, build_report_prompt(metrics, jump_height, self.scoring))
+                )
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            report = await asyncio.shield(task)
+
+        if on_done is not None:
+            # Callbacks usually write to the database; keep them off the loop.
+            await asyncio.to_thread(on_done, report)
+        return report
+
+    def submit(self, metrics, jump_height, on_done=None):
+        """
+        Queue a report. on_done(report), if given, runs on a worker thread
+        once the report is ready; use it to fill in a deferred llm_report.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._report(metrics, jump_height, on_done), self.loop
+        )
+
+    def generate(self, metrics, jump_height):
+        """Blocking variant for worker threads."""
+        return self.submit(metrics, jump_height).result()
+
+    async def agenerate(self, metrics, jump_height):
+        """Awaitable variant for request handlers; never blocks the caller's loop."""
+        return await asyncio.wrap_future(self.submit(metrics, jump_height))
+
+    def metrics(self):
+        with self._lock:
+            cached_reports = len(self._cache)
+        return {
+            "backend": type(self.backend).__name__,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "backend_calls": self.backend_calls,
+            "failures": self.failures,
+            "cached_reports": cached_reports,
+        }
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.backend.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
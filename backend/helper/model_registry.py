@@ -0,0 +1,320 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from helper.analyze_scores import create_pose_landmarker
+from helper.find_jump_height import YOLO_MODEL_PATH, load_yolo_model
+from helper.telemetry import FAILURES, record_span
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_POOL_SIZE = 2
+DEFAULT_CHECKOUT_TIMEOUT = 120.0
+# A failed background rebuild is retried after this many seconds, doubling
+# up to REFILL_RETRY_MAX_SECONDS, so the pool never loses a slot for good.
+REFILL_RETRY_SECONDS = 1.0
+REFILL_RETRY_MAX_SECONDS = 60.0
+
+# Model tiers, fastest and least accurate first. Each tier pairs a MediaPipe
+# pose landmarker bundle with YOLO pose weights.
+MODEL_TIERS = ("lite", "full", "heavy")
+DEFAULT_MODEL_TIER = "heavy"
+POSE_MODEL_FILES = {
+    "lite": "pose_landmarker_lite.task",
+    "full": "pose_landmarker_full.task",
+    "heavy": "pose_landmarker_heavy.task",
+}
+# Pending jobs at which work without an explicitly requested tier drops to a
+# faster tier. A tier missing here is never chosen automatically.
+DEFAULT_DOWNGRADE_DEPTHS = {"full": 10, "lite": 40}
+
+
+def tier_model_paths(pose_model_dir, yolo_model_paths=None):
+    """
+    {tier: (pose_model_path, yolo_model_path)} for every tier, with the pose
+    bundles under pose_model_dir. Every tier uses YOLO_MODEL_PATH unless
+    yolo_model_paths overrides it.
+    """
+    yolo_model_paths = yolo_model_paths or {}
+    return {
+        tier: (
+            Path(pose_model_dir) / POSE_MODEL_FILES[tier],
+            yolo_model_paths.get(tier) or YOLO_MODEL_PATH,
+        )
+        for tier in MODEL_TIERS
+    }
+
+
+class DetectorPool:
+    """
+    Fixed-size pool of ready model instances with checkout/checkin.
+
+    With recycle=True every checked-in instance is closed and replaced by a
+    freshly built one on a background thread. MediaPipe VIDEO-mode landmarkers
+    keep timestamp and tracking state, so they are never handed to a second
+    video; the rebuild happens off the request path and is retried with
+    backoff until it succeeds. A failed warm_up() raises and is retried by
+    the next call, which builds only the instances still missing.
+    """
+
+    def __init__(self, name, factory, size=DEFAULT_POOL_SIZE, recycle=False):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.recycle = recycle
+        self._available = queue.Queue()
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warmed = False
+        self._warm_built = 0
+        self._closed = threading.Event()
+        self._refill_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"refill-{name}")
+            if recycle
+            else None
+        )
+
+        self.warmup_seconds = None
+        self.instances_created = 0
+        self.build_failures = 0
+        self.build_seconds_total = 0.0
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.in_use = 0
+
+    def _build(self):
+        started = time.perf_counter()
+        try:
+            instance = self.factory()
+        except Exception:
+            with self._lock:
+                self.build_failures += 1
+            FAILURES.inc(f"{self.name}_build")
+            raise
+        elapsed = time.perf_counter() - started
+        record_span(f"{self.name}_load", started, elapsed)
+        with self._lock:
+            self.instances_created += 1
+            self.build_seconds_total += elapsed
+        return instance
+
+    def _refill(self):
+        delay = REFILL_RETRY_SECONDS
+        while not self._closed.is_set():
+            try:
+                self._available.put(self._build())
+                return
+            except Exception as e:
+                traceback.print_exc()
+                print(f"❌ Rebuilding a '{self.name}' model failed, retrying in {delay:g}s: {e}")
+            self._closed.wait(delay)
+            delay = min(delay * 2, REFILL_RETRY_MAX_SECONDS)
+
+    def warm_up(self):
+        with self._warm_lock:
+            if self._warmed:
+                return
+            started = time.perf_counter()
+            while self._warm_built < self.size:
+                self._available.put(self._build())
+                self._warm_built += 1
+            self.warmup_seconds = time.perf_counter() - started
+            self._warmed = True
+
+    @contextmanager
+    def checkout(self, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        self.warm_up()
+        started = time.perf_counter()
+        try:
+            instance = self._available.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                f"No '{self.name}' model available after waiting {timeout:.0f}s"
+            )
+        waited = time.perf_counter() - started
+        record_span(f"{self.name}_checkout", started, waited)
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.in_use += 1
+
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            if self.recycle:
+                close = getattr(instance, "close", None)
+                if close is not None:
+                    close()
+                self._refill_executor.submit(self._refill)
+            else:
+                self._available.put(instance)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "pool_size": self.size,
+                "available": self._available.qsize(),
+                "in_use": self.in_use,
+                "warmup_seconds": self.warmup_seconds,
+                "instances_created": self.instances_created,
+                "build_failures": self.build_failures,
+                "avg_build_seconds": (
+                    self.build_seconds_total / self.instances_created
+                    if self.instances_created
+                    else None
+                ),
+                "checkouts": self.checkouts,
+                "avg_wait_seconds": (
+                    self.wait_seconds_total / self.checkouts if self.checkouts else None
+                ),
+                "max_wait_seconds": self.wait_seconds_max,
+            }
+
+    def close(self):
+        self._closed.set()
+        if self._refill_executor is not None:
+            self._refill_executor.shutdown(wait=True)
+        while True:
+            try:
+                instance = self._available.get_nowait()
+            except queue.Empty:
+                break
+            close = getattr(instance, "close", None)
+            if close is not None:
+                close()
+
+
+class ModelRegistry:
+    """
+    Process-wide pools for the MediaPipe pose landmarker and the YOLO pose
+    model, per model tier.
+
+    tiers maps each tier to its (pose_model_path, yolo_model_path); a tier
+    whose pose bundle is not on disk is unavailable. Pools are built on first
+    use of a tier, and tiers with the same YOLO weights share one YOLO pool.
+    warm_up() loads the default tier and every tier select_tier() may
+    downgrade to, so a backlog does not also pay for model loading.
+    """
+
+    def __init__(
+        self,
+        tiers,
+        default_tier=DEFAULT_MODEL_TIER,
+        downgrade_depths=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        deterministic=False,
+    ):
+        if default_tier not in tiers:
+            raise ValueError(
+                f"Unknown model tier '{default_tier}'; expected one of: {', '.join(tiers)}"
+            )
+        self.tiers = {tier: (str(pose), str(yolo)) for tier, (pose, yolo) in tiers.items()}
+        self.default_tier = default_tier
+        self.downgrade_depths = (
+            DEFAULT_DOWNGRADE_DEPTHS if downgrade_depths is None else downgrade_depths
+        )
+        self.pool_size = pool_size
+        self.deterministic = deterministic
+        self._pose_pools = {}
+        self._yolo_pools = {}
+        self._lock = threading.Lock()
+
+    def available_tiers(self):
+        return [tier for tier, (pose, _) in self.tiers.items() if Path(pose).exists()]
+
+    def check_tier(self, tier):
+        """tier itself, or ValueError if it is unknown or its pose model is not installed."""
+        if tier not in self.tiers:
+            raise ValueError(
+                f"Unknown model tier '{tier}'; expected one of: {', '.join(self.tiers)}"
+            )
+        if tier != self.default_tier and not Path(self.tiers[tier][0]).exists():
+            raise ValueError(
+                f"Model tier '{tier}' is not installed ({Path(self.tiers[tier][0]).name} missing)"
+            )
+        return tier
+
+    def _downgrade_tiers(self):
+        """Available tiers faster than the default that have a downgrade depth, fastest first."""
+        if self.default_tier not in MODEL_TIERS:
+            return []
+        available = self.available_tiers()
+        return [
+            tier for tier in MODEL_TIERS[:MODEL_TIERS.index(self.default_tier)]
+            if self.downgrade_depths.get(tier) and tier in available
+        ]
+
+    def select_tier(self, requested=None, queue_depth=0):
+        """
+        Tier to analyze with. A requested tier is used as is; otherwise the
+        default tier, or the fastest installed tier whose downgrade depth
+        queue_depth (pending jobs) has reached.
+        """
+        if requested is not None:
+            return self.check_tier(requested)
+        for tier in self._downgrade_tiers():
+            if queue_depth >= self.downgrade_depths[tier]:
+                return tier
+        return self.default_tier
+
+    def _pools(self, tier):
+        pose_model_path, yolo_model_path = self.tiers[self.check_tier(tier)]
+        with self._lock:
+            pose_pool = self._pose_pools.get(tier)
+            if pose_pool is None:
+                pose_pool = self._pose_pools[tier] = DetectorPool(
+                    f"pose_landmarker_{tier}",
+                    lambda: create_pose_landmarker(
+                        pose_model_path, deterministic=self.deterministic
+                    ),
+                    size=self.pool_size,
+                    recycle=True,
+                )
+            yolo_pool = self._yolo_pools.get(yolo_model_path)
+            if yolo_pool is None:
+                yolo_pool = self._yolo_pools[yolo_model_path] = DetectorPool(
+                    f"yolo_{Path(yolo_model_path).stem}",
+                    lambda: load_yolo_model(yolo_model_path, deterministic=self.deterministic),
+                    size=self.pool_size,
+                )
+        return pose_pool, yolo_pool
+
+    def pose_model_path(self, tier=None):
+        return self.tiers[tier or self.default_tier][0]
+
+    def warm_up(self):
+        started = time.perf_counter()
+        for tier in [self.default_tier, *self._downgrade_tiers()]:
+            for pool in self._pools(tier):
+                pool.warm_up()
+        return time.perf_counter() - started
+
+    def pose_landmarker(self, tier=None, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        return self._pools(tier or self.default_tier)[0].checkout(timeout)
+
+    def yolo_model(self, tier=None, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        return self._pools(tier or self.default_tier)[1].checkout(timeout)
+
+    def metrics(self):
+        with self._lock:
+            pose_pools = dict(self._pose_pools)
+            yolo_pools = dict(self._yolo_pools)
+        return {
+            "default_tier": self.default_tier,
+            "available_tiers": self.available_tiers(),
+            "pose_landmarker": {tier: pool.metrics() for tier, pool in pose_pools.items()},
+            "yolo_pose": {Path(path).name: pool.metrics() for path, pool in yolo_pools.items()},
+        }
+
+    def close(self):
+        with self._lock:
+            pools = [*self._pose_pools.values(), *self._yolo_pools.values()]
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,163 @@
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.components.containers import landmark as landmark_module
+from mediapipe.tasks.python.vision import drawing_styles
+from mediapipe.tasks.python.vision import drawing_utils
+
+from helper.frame_pipeline import iter_video_frames, open_video
+
+OVERLAYS_FILENAME = "overlays.json"
+
+
+def draw_landmarks_on_image(rgb_image, detection_result):
+    pose_landmarks_list = detection_result.pose_landmarks
+    annotated_image = np.copy(rgb_image)
+
+    pose_landmark_style = drawing_styles.get_default_pose_landmarks_style()
+    pose_connection_style = drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2)
+
+    for pose_landmarks in pose_landmarks_list:
+        drawing_utils.draw_landmarks(
+            image=annotated_image,
+            landmark_list=pose_landmarks,
+            connections=vision.PoseLandmarksConnections.POSE_LANDMARKS,
+            landmark_drawing_spec=pose_landmark_style,
+            connection_drawing_spec=pose_connection_style,
+        )
+    return annotated_image
+
+
+def draw_overlay_text(frame_bgr, phase_text, angle_lines):
+    frame_height, frame_width = frame_bgr.shape[:2]
+    min_frame_dim = min(frame_height, frame_width)
+    phase_font_scale = max(0.4, min(1.2, min_frame_dim / 900.0))
+    metric_font_scale = max(0.35, min(1.0, min_frame_dim / 1100.0))
+    phase_text_thickness = max(1, int(round(phase_font_scale * 2)))
+    metric_text_thickness = max(1, int(round(metric_font_scale * 2)))
+    metric_line_spacing = max(18, int(round(26 * metric_font_scale)))
+    phase_y = max(22, int(round(35 * phase_font_scale)))
+    metrics_start_y = phase_y + max(20, int(round(30 * metric_font_scale)))
+
+    cv2.putText(
+        frame_bgr,
+        phase_text,
+        (10, phase_y),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        phase_font_scale,
+        (0, 255, 255),
+        phase_text_thickness,
+        cv2.LINE_AA,
+    )
+
+    for idx, text in enumerate(angle_lines):
+        cv2.putText(
+            frame_bgr,
+            text,
+            (10, metrics_start_y + idx * metric_line_spacing),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            metric_font_scale,
+            (255, 255, 255),
+            metric_text_thickness,
+            cv2.LINE_AA,
+        )
+    return frame_bgr
+
+
+class AnnotatedVideoWriter:
+    """Draws skeletons and overlay text on RGB frames and encodes them to an MP4."""
+
+    def __init__(self, output_video_path, fps):
+        self.output_video_path = output_video_path
+        self.fps = fps
+        self.writer = None
+
+    def write(self, item):
+        frame_rgb, detection_result, phase_text, angle_lines = item
+        annotated_frame = draw_landmarks_on_image(frame_rgb, detection_result)
+        annotated_frame_BGR = cv2.cvtColor(annotated_frame, cv2.COLOR_RGB2BGR)
+        draw_overlay_text(annotated_frame_BGR, phase_text, angle_lines)
+
+        if self.writer is None:
+            frame_height, frame_width = annotated_frame_BGR.shape[:2]
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+            self.writer = cv2.VideoWriter(
+                str(self.output_video_path), fourcc, self.fps, (frame_width, frame_height)
+            )
+        self.writer.write(annotated_frame_BGR)
+        return annotated_frame_BGR
+
+    def release(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+def save_overlays(directory, overlays):
+    path = Path(directory) / OVERLAYS_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump([[phase_text, list(angle_lines)] for phase_text, angle_lines in overlays], f)
+    return path
+
+
+def load_overlays(directory):
+    with open(Path(directory) / OVERLAYS_FILENAME) as f:
+        return [(phase_text, tuple(angle_lines)) for phase_text, angle_lines in json.load(f)]
+
+
+class _StoredDetection:
+    """Just enough of a PoseLandmarkerResult for draw_landmarks_on_image."""
+
+    def __init__(self, pose_landmarks):
+        self.pose_landmarks = pose_landmarks
+
+
+def _stored_pose_landmarks(landmarks, frame_height, frame_width):
+    return [
+        landmark_module.NormalizedLandmark(
+            x=x_pixel / frame_width,
+            y=y_pixel / frame_height,
+            z=z,
+            visibility=visibility,
+        )
+        for x_pixel, y_pixel, z, visibility in landmarks.tolist()
+    ]
+
+
+def render_annotated_video(input_source, landmark_store, overlays, output_video_path, fps=None):
+    """
+    Re-create analyze_jump's annotated video from stored results.
+
+    The source video is decoded again, but no pose inference runs: skeletons
+    come from landmark_store and the text from overlays (one entry per frame,
+    as returned by analyze_jump).
+    """
+    cap = open_video(input_source)
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30
+
+    rows_by_frame = {}
+    for row, frame_index in enumerate(landmark_store.frame_index.tolist()):
+        rows_by_frame.setdefault(frame_index, []).append(row)
+
+    video_writer = AnnotatedVideoWriter(output_video_path, fps)
+    try:
+        for frame_index, frame in enumerate(iter_video_frames(cap)):
+            if frame_index >= len(overlays):
+                break
+            frame_height, frame_width = frame.shape[:2]
+            detection = _StoredDetection([
+                _stored_pose_landmarks(landmark_store.landmarks[row], frame_height, frame_width)
+                for row in rows_by_frame.get(frame_index, [])
+            ])
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            phase_text, angle_lines = overlays[frame_index]
+            video_writer.write((frame_rgb, detection, phase_text, angle_lines))
+    finally:
+        cap.release()
+        video_writer.release()
+
+    return str(output_video_path)
@@ -0,0 +1,634 @@
+import base64
+import uuid
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+from helper.db import Database
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# output_videos.render_status: the annotated video at file_path is still
+# being rendered (deferred), exists, or could not be rendered.
+RENDER_PENDING = "pending"
+RENDER_DONE = "done"
+RENDER_FAILED = "failed"
+
+INPUT_VIDEO_FIELDS = (
+    "id",
+    "original_filename",
+    "file_path",
+    "content_type",
+    "file_size",
+    "content_sha256",
+    "uploaded_at",
+)
+OUTPUT_VIDEO_FIELDS = (
+    "id",
+    "original_filename",
+    "file_path",
+    "hip_normalized_score",
+    "smallest_loading_min_hip_flexion",
+    "knee_normalized_score",
+    "smallest_loading_min_knee_flexion",
+    "angular_velocity",
+    "angular_velocity_score",
+    "jump_height",
+    "llm_report",
+    "score",
+    "scoring_version",
+    "model_tier",
+    "render_status",
+    "created_at",
+    "jumps",
+)
+# The LLM report is by far the largest column; list it in fields to get it.
+DEFAULT_OUTPUT_VIDEO_FIELDS = tuple(
+    field for field in OUTPUT_VIDEO_FIELDS if field != "llm_report"
+)
+
+# ── Prepared statements ──────────────────────────────────────────────────────
+INSERT_INPUT_VIDEO = """
+    INSERT INTO input_videos (
+        original_filename, file_path, content_type, file_size, content_sha256, uploaded_at
+    )
+    VALUES ($1, $2, $3, $4, $5, $6)
+    RETURNING *
+"""
+
+INSERT_OUTPUT_VIDEO = """
+    INSERT INTO output_videos (
+        id, original_filename, file_path,
+        hip_normalized_score, smallest_loading_min_hip_flexion,
+        knee_normalized_score, smallest_loading_min_knee_flexion,
+        angular_velocity, angular_velocity_score, jump_height, llm_report, score,
+        scoring_version, model_tier, render_status
+    )
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+    RETURNING *
+"""
+SELECT_INPUT_VIDEO = "SELECT * FROM input_videos WHERE id = $1"
+
+SELECT_JUMPS = """
+    SELECT * FROM output_video_jumps
+    WHERE output_video_id = ANY($1)
+    ORDER BY output_video_id, jump_index
+"""
+
+# Unfiltered list pages with the default fields have a fixed shape, so they
+# are prepared too; filtered or projected pages are built per request.
+LIST_PAGE = """
+    SELECT {columns} FROM {table}
+    ORDER BY {sort_column} DESC, id DESC
+    LIMIT $1
+"""
+LIST_PAGE_AFTER = """
+    SELECT {columns} FROM {table}
+    WHERE ({sort_column}, id) < ($1, $2)
+    ORDER BY {sort_column} DESC, id DESC
+    LIMIT $3
+"""
+
+# Per-jump columns of output_video_jumps, in insert order.
+JUMP_COLUMNS = (
+    "jump_index",
+    "start_frame",
+    "end_frame",
+    "takeoff_frame",
+    "landing_frame",
+    "air_time",
+    "jump_height",
+    "hip_normalized_score",
+    "smallest_loading_min_hip_flexion",
+    "knee_normalized_score",
+    "smallest_loading_min_knee_flexion",
+    "angular_velocity",
+    "angular_velocity_score",
+)
+# Metric columns of output_videos, as produced by scoring.score_rep.
+METRIC_COLUMNS = (
+    "hip_normalized_score",
+    "smallest_loading_min_hip_flexion",
+    "knee_normalized_score",
+    "smallest_loading_min_knee_flexion",
+    "angular_velocity",
+    "angular_velocity_score",
+)
+
+
+def encode_cursor(sort_value, record_id):
+    """Opaque keyset cursor for the row after which the next page starts."""
+    raw = f"{sort_value.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        sort_value, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(sort_value), str(uuid.UUID(record_id))
+    except (UnicodeError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def select_fields(fields, allowed, default):
+    """Validate a requested field list, keeping the order of allowed."""
+    if not fields:
+        return default
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in allowed if field in fields)
+
+
+class VideoRepository:
+    """All reads and writes of input_videos / output_videos go through here."""
+
+    def __init__(self, db: Database, stats=None):
+        self.db = db
+        self.stats = stats
+        db.prepare(
+            "insert_input_video",
+            "(text, text, text, bigint, text, timestamp)",
+            INSERT_INPUT_VIDEO,
+        )
+        db.prepare(
+            "insert_output_video",
+            "(uuid, text, text, float8, float8, float8, float8, float8, float8, float8, text, float8, int, text, text)",
+            INSERT_OUTPUT_VIDEO,
+        )
+        db.prepare("select_input_video", "(uuid)", SELECT_INPUT_VIDEO)
+        db.prepare("select_jumps", "(uuid[])", SELECT_JUMPS)
+        for table, sort_column, fields in (
+            ("input_videos", "uploaded_at", INPUT_VIDEO_FIELDS),
+            ("output_videos", "created_at", DEFAULT_OUTPUT_VIDEO_FIELDS),
+        ):
+            columns = ", ".join(
+                dict.fromkeys(("id", sort_column, *(f for f in fields if f != "jumps")))
+            )
+            db.prepare(
+                f"list_{table}",
+                "(int)",
+                LIST_PAGE.format(columns=columns, table=table, sort_column=sort_column),
+            )
+            db.prepare(
+                f"list_{table}_after",
+                "(timestamp, uuid, int)",
+                LIST_PAGE_AFTER.format(columns=columns, table=table, sort_column=sort_column),
+            )
+
+    def create_tables(self):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS input_videos (
+                    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    original_filename TEXT NOT NULL,
+                    file_path         TEXT NOT NULL,
+                    content_type      TEXT NOT NULL,
+                    file_size         BIGINT NOT NULL,
+                    uploaded_at       TIMESTAMP NOT NULL
+                )
+            """)
+            cur.execute("""
+                ALTER TABLE input_videos ADD COLUMN IF NOT EXISTS content_sha256 TEXT
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS output_videos (
+                    id                              UUID PRIMARY KEY REFERENCES input_videos(id),
+                    original_filename               TEXT NOT NULL,
+                    file_path                       TEXT NOT NULL,
+                    hip_normalized_score            FLOAT,
+                    smallest_loading_min_hip_flexion FLOAT,
+                    knee_normalized_score           FLOAT,
+                    smallest_loading_min_knee_flexion FLOAT,
+                    angular_velocity                FLOAT,
+                    angular_velocity_score          FLOAT,
+                    jump_height                     FLOAT,
+                    llm_report                      TEXT,
+                    score                           FLOAT
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS output_video_jumps (
+                    output_video_id                 UUID NOT NULL REFERENCES output_videos(id) ON DELETE CASCADE,
+                    jump_index                      INT NOT NULL,
+                    start_frame                     INT,
+                    end_frame                       INT,
+                    takeoff_frame                   INT,
+                    landing_frame                   INT,
+                    air_time                        FLOAT,
+                    jump_height                     FLOAT,
+                    hip_normalized_score            FLOAT,
+                    smallest_loading_min_hip_flexion FLOAT,
+                    knee_normalized_score           FLOAT,
+                    smallest_loading_min_knee_flexion FLOAT,
+                    angular_velocity                FLOAT,
+                    angular_velocity_score          FLOAT,
+                    PRIMARY KEY (output_video_id, jump_index)
+                )
+            """)
+
+            # created_at was added after the first release; older rows take
+            # their input video's upload time.
+            cur.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'output_videos' AND column_name = 'created_at'
+            """)
+            if cur.fetchone() is None:
+                cur.execute("ALTER TABLE output_videos ADD COLUMN created_at TIMESTAMP")
+                cur.execute("""
+                    UPDATE output_videos o SET created_at = i.uploaded_at
+                    FROM input_videos i
+                    WHERE o.id = i.id
+                """)
+                cur.execute("""
+                    ALTER TABLE output_videos
+                    ALTER COLUMN created_at SET DEFAULT (now() AT TIME ZONE 'utc'),
+                    ALTER COLUMN created_at SET NOT NULL
+                """)
+
+            # Rows from before versioned scoring stay NULL until re-scored.
+            cur.execute("""
+                ALTER TABLE output_videos ADD COLUMN IF NOT EXISTS scoring_version INT
+            """)
+            # Pose model tier (lite/full/heavy) the row was analyzed with;
+            # NULL for rows from before model tiers.
+            cur.execute("""
+                ALTER TABLE output_videos ADD COLUMN IF NOT EXISTS model_tier TEXT
+            """)
+            # Rows from before deferred rendering was tracked stay NULL.
+            cur.execute("""
+                ALTER TABLE output_videos ADD COLUMN IF NOT EXISTS render_status TEXT
+            """)
+
+            # Keyset pagination walks these newest-first.
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS input_videos_uploaded_at_id_idx
+                ON input_videos (uploaded_at DESC, id DESC)
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS output_videos_created_at_id_idx
+                ON output_videos (created_at DESC, id DESC)
+            """)
+            # Re-scoring finds earlier uploads of the same file by hash.
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS input_videos_content_sha256_idx
+                ON input_videos (content_sha256)
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS output_videos_score_idx
+                ON output_videos (score)
+            """)
+
+    def insert_input_video(
+        self, original_filename, file_path, content_type, file_size, content_sha256, uploaded_at
+    ):
+        with self.db.cursor() as cur:
+            self.db.execute_prepared(cur, "insert_input_video", (
+                original_filename, str(file_path), content_type, file_size, content_sha256, uploaded_at,
+            ))
+            return dict(cur.fetchone())
+
+    def insert_input_videos(self, rows):
+        """
+        Insert many input_videos rows in one statement.
+
+        rows are (original_filename, file_path, content_type, file_size,
+        content_sha256, uploaded_at) tuples; the records come back in the same
+        order.
+        """
+        if not rows:
+            return []
+        with self.db.cursor() as cur:
+            records = execute_values(
+                cur,
+                """
+                    INSERT INTO input_videos (
+                        original_filename, file_path, content_type, file_size,
+                        content_sha256, uploaded_at
+                    )
+                    VALUES %s
+                    RETURNING *
+                """,
+                [
+                    (original_filename, str(file_path), content_type, file_size, content_sha256, uploaded_at)
+                    for original_filename, file_path, content_type, file_size, content_sha256, uploaded_at in rows
+                ],
+                fetch=True,
+            )
+            return [dict(r) for r in records]
+
+    def delete_input_videos(self, input_video_ids):
+        """Delete input_videos rows that have no output, e.g. uploads the job queue refused."""
+        if not input_video_ids:
+            return
+        with self.db.cursor() as cur:
+            cur.execute(
+                "DELETE FROM input_videos WHERE id = ANY(%s::uuid[])",
+                ([str(input_video_id) for input_video_id in input_video_ids],),
+            )
+
+    def get_input_video(self, input_video_id):
+        with self.db.cursor() as cur:
+            self.db.execute_prepared(cur, "select_input_video", (str(input_video_id),))
+            record = cur.fetchone()
+            return dict(record) if record is not None else None
+
+    def _list_page(
+        self, table, sort_column, columns, filters, params, limit, cursor, prepared=False
+    ):
+        """
+        One keyset page of table, newest first by (sort_column, id).
+
+        The id and sort_column are always selected so the next cursor can be
+        built; the caller removes them if they were not asked for. Returns
+        (records, next_cursor), next_cursor being None on the last page.
+        prepared=True runs the list_<table> prepared statement instead; only
+        for unfiltered pages of the default columns.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+
+        with self.db.cursor() as cur:
+            if prepared and after is not None:
+                self.db.execute_prepared(cur, f"list_{table}_after", (*after, limit + 1))
+            elif prepared:
+                self.db.execute_prepared(cur, f"list_{table}", (limit + 1,))
+            else:
+                filters, params = list(filters), list(params)
+                if after is not None:
+                    filters.append(f"({sort_column}, id) < (%s, %s)")
+                    params.extend(after)
+                selected = dict.fromkeys(("id", sort_column, *columns))
+                where = f"WHERE {' AND '.join(filters)}" if filters else ""
+                cur.execute(f"""
+                    SELECT {", ".join(selected)} FROM {table}
+                    {where}
+                    ORDER BY {sort_column} DESC, id DESC
+                    LIMIT %s
+                """, (*params, limit + 1))
+            records = [dict(r) for r in cur.fetchall()]
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = encode_cursor(last[sort_column], last["id"])
+        return records, next_cursor
+
+    @staticmethod
+    def _project(records, fields):
+        return [{field: record[field] for field in fields} for record in records]
+
+    def list_input_videos(
+        self, limit=DEFAULT_PAGE_SIZE, cursor=None, since=None, until=None, fields=None
+    ):
+        """
+        One page of input videos, newest first.
+
+        since/until bound uploaded_at, fields picks the returned columns (all
+        by default). Raises ValueError for unknown fields or a bad cursor.
+        """
+        fields = select_fields(fields, INPUT_VIDEO_FIELDS, INPUT_VIDEO_FIELDS)
+        filters, params = [], []
+        if since is not None:
+            filters.append("uploaded_at >= %s")
+            params.append(since)
+        if until is not None:
+            filters.append("uploaded_at < %s")
+            params.append(until)
+
+        records, next_cursor = self._list_page(
+            "input_videos", "uploaded_at", fields, filters, params, limit, cursor,
+            prepared=not filters and fields == INPUT_VIDEO_FIELDS,
+        )
+        return self._project(records, fields), next_cursor
+
+    def insert_output_video(
+        self,
+        input_video_id,
+        original_filename,
+        file_path,
+        metrics,
+        jump_height,
+        llm_report,
+        score,
+        jumps=(),
+        scoring_version=None,
+        model_tier=None,
+        render_status=RENDER_DONE,
+    ):
+        """
+        Insert an output_videos row and its per-jump rows in one transaction,
+        updating the stats summaries (see video_stats.VideoStats) with it.
+        """
+        with self.db.cursor() as cur:
+            self.db.execute_prepared(cur, "insert_output_video", (
+                input_video_id,
+                original_filename,
+                file_path,
+                metrics["hip_normalized_score"],
+                metrics["smallest_loading_min_hip_flexion"],
+                metrics["knee_normalized_score"],
+                metrics["smallest_loading_min_knee_flexion"],
+                metrics["angular_velocity"],
+                metrics["angular_velocity_score"],
+                jump_height,
+                llm_report,
+                score,
+                scoring_version,
+                model_tier,
+                render_status,
+            ))
+            record = dict(cur.fetchone())
+            record["jumps"] = self._insert_jumps(cur, input_video_id, jumps)
+            if self.stats is not None:
+                self.stats.record(cur, record)
+            return record
+
+    def _insert_jumps(self, cur, output_video_id, jumps):
+        if not jumps:
+            return []
+        rows = execute_values(
+            cur,
+            f"""
+                INSERT INTO output_video_jumps (output_video_id, {", ".join(JUMP_COLUMNS)})
+                VALUES %s
+                RETURNING *
+            """,
+            [
+                (str(output_video_id), *(jump[column] for column in JUMP_COLUMNS))
+                for jump in jumps
+            ],
+            fetch=True,
+        )
+        return [dict(r) for r in rows]
+
+    def update_llm_report(self, output_video_id, llm_report):
+        with self.db.cursor() as cur:
+            cur.execute(
+                "UPDATE output_videos SET llm_report = %s WHERE id = %s",
+                (llm_report, str(output_video_id)),
+            )
+
+    def list_stale_scores(self, scoring_version, after_id=None, limit=MAX_PAGE_SIZE):
+        """
+        Output videos not yet scored with scoring_version, in id order. Pass
+        the last id of a page as after_id to get the next one.
+
+        source_ids lists the other analyzed uploads of the same file and model
+        tier, oldest first: a result-cache hit has no landmarks of its own,
+        but one of them has the ones its result came from.
+        """
+        filters, params = ["o.scoring_version IS DISTINCT FROM %s"], [scoring_version]
+        if after_id is not None:
+            filters.append("o.id > %s")
+            params.append(str(after_id))
+        with self.db.cursor() as cur:
+            cur.execute(f"""
+                SELECT o.id, ARRAY(
+                    SELECT s.id::text
+                    FROM input_videos s JOIN output_videos so ON so.id = s.id
+                    WHERE s.content_sha256 = i.content_sha256
+                      AND s.id <> o.id
+                      AND so.model_tier IS NOT DISTINCT FROM o.model_tier
+                    ORDER BY s.uploaded_at, s.id
+                ) AS source_ids
+                FROM output_videos o JOIN input_videos i ON i.id = o.id
+                WHERE {' AND '.join(filters)}
+                ORDER BY o.id
+                LIMIT %s
+            """, (*params, limit))
+            return [dict(r) for r in cur.fetchall()]
+
+    def update_scores(self, rows, scoring_version):
+        """
+        Re-scored results for many output videos in one transaction. rows are
+        (output_video_id, metrics, jump_height, score, jumps); each video's
+        jump rows are replaced. The stats summaries are not touched: call
+        VideoStats.rebuild() once the whole re-score is done.
+        """
+        if not rows:
+            return 0
+        with self.db.cursor() as cur:
+            execute_values(
+                cur,
+                f"""
+                    UPDATE output_videos AS o SET
+                        {", ".join(f"{column} = v.{column}" for column in METRIC_COLUMNS)},
+                        jump_height = v.jump_height,
+                        score = v.score,
+                        scoring_version = v.scoring_version
+                    FROM (VALUES %s) AS v (
+                        id, {", ".join(METRIC_COLUMNS)}, jump_height, score, scoring_version
+                    )
+                    WHERE o.id = v.id
+                """,
+                [
+                    (
+                        str(output_video_id),
+                        *(metrics[column] for column in METRIC_COLUMNS),
+                        jump_height,
+                        score,
+                        scoring_version,
+                    )
+                    for output_video_id, metrics, jump_height, score, _ in rows
+                ],
+                template=f"(%s::uuid, {', '.join(['%s::float8'] * (len(METRIC_COLUMNS) + 2))}, %s::int)",
+                page_size=len(rows),
+            )
+            cur.execute(
+                "DELETE FROM output_video_jumps WHERE output_video_id = ANY(%s::uuid[])",
+                ([str(row[0]) for row in rows],),
+            )
+            jump_rows = [
+                (str(output_video_id), *(jump[column] for column in JUMP_COLUMNS))
+                for output_video_id, _, _, _, jumps in rows
+                for jump in jumps
+            ]
+            if jump_rows:
+                execute_values(cur, f"""
+                    INSERT INTO output_video_jumps (output_video_id, {", ".join(JUMP_COLUMNS)})
+                    VALUES %s
+                """, jump_rows, page_size=1000)
+        return len(rows)
+
+    def list_jumps(self, output_video_ids):
+        """Per-jump rows for the given output videos, keyed by output_video_id."""
+        jumps = {str(output_video_id): [] for output_video_id in output_video_ids}
+        if not jumps:
+            return jumps
+        with self.db.cursor() as cur:
+            # An array literal, so Postgres reads it as the declared uuid[].
+            self.db.execute_prepared(cur, "select_jumps", ("{" + ",".join(jumps) + "}",))
+            for r in cur.fetchall():
+                jumps[str(r["output_video_id"])].append(dict(r))
+        return jumps
+
+    def update_output_video_file(self, output_video_id, original_filename, file_path):
+        """Point the row at a freshly rendered annotated video."""
+        with self.db.cursor() as cur:
+            cur.execute("""
+                UPDATE output_videos
+                SET original_filename = %s, file_path = %s, render_status = %s
+                WHERE id = %s
+                RETURNING *
+            """, (original_filename, str(file_path), RENDER_DONE, str(output_video_id)))
+            record = cur.fetchone()
+            return dict(record) if record is not None else None
+
+    def update_render_status(self, output_video_id, render_status):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                UPDATE output_videos SET render_status = %s WHERE id = %s
+            """, (render_status, str(output_video_id)))
+
+    def list_output_videos(
+        self,
+        limit=DEFAULT_PAGE_SIZE,
+        cursor=None,
+        since=None,
+        until=None,
+        min_score=None,
+        max_score=None,
+        model_tier=None,
+        fields=None,
+    ):
+        """
+        One page of output videos, newest first.
+
+        since/until bound created_at, min_score/max_score the overall score
+        and model_tier keeps rows analyzed with that tier. fields picks the returned columns; by default every column but
+        llm_report, plus the per-jump records under "jumps". Raises ValueError
+        for unknown fields or a bad cursor.
+        """
+        fields = select_fields(fields, OUTPUT_VIDEO_FIELDS, DEFAULT_OUTPUT_VIDEO_FIELDS)
+        filters, params = [], []
+        if since is not None:
+            filters.append("created_at >= %s")
+            params.append(since)
+        if until is not None:
+            filters.append("created_at < %s")
+            params.append(until)
+        if min_score is not None:
+            filters.append("score >= %s")
+            params.append(min_score)
+        if max_score is not None:
+            filters.append("score <= %s")
+            params.append(max_score)
+        if model_tier is not None:
+            filters.append("model_tier = %s")
+            params.append(model_tier)
+
+        columns = [field for field in fields if field != "jumps"]
+        records, next_cursor = self._list_page(
+            "output_videos", "created_at", columns, filters, params, limit, cursor,
+            prepared=not filters and fields == DEFAULT_OUTPUT_VIDEO_FIELDS,
+        )
+        if "jumps" in fields:
+            jumps = self.list_jumps([record["id"] for record in records])
+            for record in records:
+                record["jumps"] = jumps[str(record["id"])]
+        return self._project(records, fields), next_cursor
@@ -0,0 +1,212 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from helper.jump_phases import JumpPhaseTracker, merge_jump_records
+from helper.landmark_store import LandmarkStore
+from helper.scoring import (
+    CURRENT_SCORING_VERSION,
+    get_scoring_config,
+    score_rep,
+    score_session,
+)
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_LANDMARKS_DIR = Path(__file__).parent.parent / "landmarks"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FPS = 30
+
+
+def estimate_fps(store):
+    """Frame rate from the saved timestamps, for landmarks saved without fps.npy."""
+    frame_index = store.frame_index
+    timestamp = store.timestamp
+    if len(frame_index) and timestamp[-1] > 0:
+        return float(frame_index[-1]) / float(timestamp[-1])
+    return DEFAULT_FPS
+
+
+def replay_landmarks(store, scoring=None, deterministic=True):
+    """
+    Run the phase tracker and scoring over the primary pose of every frame in
+    a LandmarkStore, the way analyze_jump does live but without decoding or
+    pose inference. Timestamps are frame_index / fps as in analyze_jump, so
+    under the same config a store saved with fps and float64 angles gives
+    the live metrics exactly. Stores saved before angles were float64 agree
+    to within float32 rounding (about 1e-5 degrees).
+    Returns "reps", "metrics" (first rep) and "fps".
+    """
+    scoring = scoring or get_scoring_config()
+    fps = store.fps or estimate_fps(store)
+    primary = store.primary()
+    tracker = JumpPhaseTracker(**scoring["phases"])
+    frame_indices = store.frame_index[primary].tolist()
+    angle_rows = store.angles[primary].tolist()
+    for frame_index, angle_row in zip(frame_indices, angle_rows):
+        tracker.push_row(frame_index / fps, angle_row, frame_index)
+
+    return {
+        "reps": [{**rep, **score_rep(rep, deterministic, scoring)} for rep in tracker.reps],
+        "metrics": score_rep(tracker.reps[0] if tracker.reps else None, deterministic, scoring),
+        "fps": fps,
+    }
+
+
+def landmark_dirs(landmarks_dir, video):
+    """
+    Where a video's landmarks may be saved, in order: its own directory, then
+    those of earlier uploads of the same file (list_stale_scores source_ids).
+    Result-cache hits are stored without landmarks of their own and are
+    replayed from the upload they were cached from.
+    """
+    return [landmarks_dir / str(video["id"])] + [
+        landmarks_dir / str(source_id) for source_id in video.get("source_ids") or ()
+    ]
+
+
+def replay_video(landmarks_dirs, scoring_version, deterministic):
+    """Worker entry point: replay the first of landmarks_dirs with saved landmarks, or None."""
+    for landmarks_dir in landmarks_dirs:
+        if (Path(landmarks_dir) / "angles.npy").exists():
+            store = LandmarkStore.load_npy(landmarks_dir, mmap_mode="r")
+            return replay_landmarks(store, get_scoring_config(scoring_version), deterministic)
+    return None
+
+
+def rescored_row(output_video, replay, stored_jumps, scoring):
+    """
+    (output_video_id, metrics, jump_height, score, jumps) for
+    VideoRepository.update_scores.
+
+    Jump heights come from YOLO and do not depend on the scoring config, so
+    the stored airborne jumps are paired with the replayed reps again. The
+    best jump under the new config (scoring.score_session) may differ from
+    the stored one, so the headline jump height is replaced too.
+    """
+    jumps = [
+        {
+            "takeoff_frame": jump["takeoff_frame"],
+            "landing_frame": jump["landing_frame"],
+            "air_time": jump["air_time"],
+            "height": jump["jump_height"],
+        }
+        for jump in stored_jumps
+        if jump["air_time"] is not None
+    ]
+    records = merge_jump_records(replay["reps"], jumps, replay["fps"])
+    session = score_session(records, scoring)
+    return (
+        output_video["id"], session["metrics"], session["jump_height"], session["score"], records
+    )
+
+
+def rescore_all(
+    videos,
+    stats,
+    landmarks_dir=DEFAULT_LANDMARKS_DIR,
+    scoring_version=CURRENT_SCORING_VERSION,
+    workers=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    deterministic=True,
+):
+    """
+    Re-score every output video not yet at scoring_version from its saved
+    landmarks, batch_size videos per database round trip, then rebuild the
+    stats summaries. Cache hits use the landmarks of the upload they were
+    cached from (see landmark_dirs); videos without any saved landmarks are
+    left as they are.
+    LLM reports are not regenerated.
+    """
+    scoring = get_scoring_config(scoring_version)
+    workers = workers or os.cpu_count() or 1
+    landmarks_dir = Path(landmarks_dir)
+    rescored = 0
+    missing_landmarks = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        after_id = None
+        while True:
+            page = videos.list_stale_scores(scoring_version, after_id, batch_size)
+            if not page:
+                break
+            after_id = page[-1]["id"]
+            stored_jumps = videos.list_jumps([video["id"] for video in page])
+            replays = executor.map(
+                replay_video,
+                [landmark_dirs(landmarks_dir, video) for video in page],
+                repeat(scoring_version),
+                repeat(deterministic),
+                chunksize=max(1, len(page) // (workers * 4)),
+            )
+
+            rows = []
+            for video, replay in zip(page, replays):
+                if replay is None:
+                    missing_landmarks += 1
+                    continue
+                rows.append(rescored_row(video, replay, stored_jumps[str(video["id"])], scoring))
+            rescored += videos.update_scores(rows, scoring_version)
+            print(f"✅ Re-scored {rescored} videos ({missing_landmarks} without landmarks)")
+
+    if rescored:
+        stats.rebuild()
+    return {
+        "scoring_version": scoring_version,
+        "rescored": rescored,
+        "missing_landmarks": missing_landmarks,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from helper.db import Database
+    from helper.repository import VideoRepository
+    from helper.video_stats import VideoStats
+
+    parser = argparse.ArgumentParser(
+        description="Re-score stored videos from their saved landmarks"
+    )
+    parser.add_argument("--scoring-version", type=int, default=CURRENT_SCORING_VERSION)
+    parser.add_argument("--landmarks-dir", default=str(DEFAULT_LANDMARKS_DIR))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = Database(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+    )
+    stats = VideoStats(db)
+    videos = VideoRepository(db, stats=stats)
+    videos.create_tables()
+    try:
+        result = rescore_all(
+            videos,
+            stats,
+            landmarks_dir=args.landmarks_dir,
+            scoring_version=args.scoring_version,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            deterministic=os.getenv("DETERMINISTIC_ANALYSIS", "1") == "1",
+        )
+    finally:
+        db.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
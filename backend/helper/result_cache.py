@@ -0,0 +1,227 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from helper.telemetry import CACHE_REQUESTS
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_MAX_CACHE_BYTES = 5 * 1024 * 1024 * 1024
+
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst (no extra disk space), falling back to a copy across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def cache_version(
+    pose_model_path,
+    yolo_model_path,
+    scoring_version,
+    inference_short_side=None,
+    adaptive=False,
+    deterministic=True,
+):
+    """
+    Version string for cached results; changes whenever a model, the scoring
+    config, the inference resolution, adaptive jump height tracking or
+    deterministic analysis does, since each changes the stored results.
+    """
+    version = f"{Path(pose_model_path).name}|{Path(yolo_model_path).name}|scoring-{scoring_version}"
+    if inference_short_side:
+        version += f"|short-side-{inference_short_side}"
+    version += f"|adaptive-{int(bool(adaptive))}|deterministic-{int(bool(deterministic))}"
+    return version
+
+
+class ResultCache:
+    """
+    Content-addressed cache of analysis results, keyed by (video SHA-256, version).
+
+    Each entry keeps its own hard link to the annotated video under cache_dir,
+    so evicting an entry never removes a file an output_videos row points at.
+    Entries are evicted least-recently-used first once their annotated files
+    exceed max_bytes, and rows from other versions are dropped by
+    invalidate_stale().
+    """
+
+    def __init__(self, db, cache_dir, version, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        self.db = db
+        self.cache_dir = Path(cache_dir)
+        self.version = version
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._evict_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def create_table(self):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    content_sha256        TEXT NOT NULL,
+                    version               TEXT NOT NULL,
+                    metrics               JSONB NOT NULL,
+                    jump_height           FLOAT,
+                    llm_report            TEXT,
+                    score                 FLOAT,
+                    annotated_video_path  TEXT NOT NULL,
+                    annotated_video_bytes BIGINT NOT NULL,
+                    created_at            TIMESTAMP NOT NULL,
+                    last_hit_at           TIMESTAMP NOT NULL,
+                    hits                  INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (content_sha256, version)
+                )
+            """)
+            cur.execute("""
+                ALTER TABLE result_cache ADD COLUMN IF NOT EXISTS jumps JSONB NOT NULL DEFAULT '[]'
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS result_cache_last_hit_idx
+                ON result_cache (last_hit_at)
+            """)
+
+    def get(self, content_sha256):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                UPDATE result_cache
+                SET last_hit_at = %s, hits = hits + 1
+                WHERE content_sha256 = %s AND version = %s
+                RETURNING *
+            """, (datetime.utcnow(), content_sha256, self.version))
+            entry = cur.fetchone()
+
+        if entry is not None and not os.path.exists(entry["annotated_video_path"]):
+            self._delete([entry])
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc("miss")
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.inc("hit")
+        return dict(entry)
+
+    def put(
+        self, content_sha256, metrics, jump_height, llm_report, score, annotated_video_path, jumps=()
+    ):
+        cached_path = self.cache_dir / f"{content_sha256[:16]}_{uuid.uuid4().hex}.mp4"
+        link_or_copy(annotated_video_path, cached_path)
+        now = datetime.utcnow()
+        with self.db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO result_cache (
+                    content_sha256, version, metrics, jump_height, llm_report, score,
+                    annotated_video_path, annotated_video_bytes, created_at, last_hit_at, jumps
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (content_sha256, version) DO NOTHING
+                RETURNING content_sha256
+            """, (
+                content_sha256,
+                self.version,
+                json.dumps(metrics),
+                jump_height,
+                llm_report,
+                score,
+                str(cached_path),
+                os.path.getsize(cached_path),
+                now,
+                now,
+                json.dumps(list(jumps)),
+            ))
+            inserted = cur.fetchone() is not None
+
+        if not inserted:
+            os.remove(cached_path)
+        self.evict()
+
+    def update_llm_report(self, content_sha256, llm_report):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                UPDATE result_cache SET llm_report = %s
+                WHERE content_sha256 = %s AND version = %s
+            """, (llm_report, content_sha256, self.version))
+
+    def materialize(self, entry, output_dir):
+        """Give a cache hit its own annotated file in output_dir and return the new path."""
+        output_path = Path(output_dir) / f"annotated_{uuid.uuid4().hex}.mp4"
+        link_or_copy(entry["annotated_video_path"], output_path)
+        return str(output_path)
+
+    def evict(self):
+        """
+        Delete the least recently hit entries past max_bytes. Postgres finds
+        the cutoff with a running total, so only the deleted rows come back.
+        """
+        with self._evict_lock:
+            with self.db.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM result_cache r
+                    USING (
+                        SELECT content_sha256, version, sum(annotated_video_bytes) OVER (
+                            ORDER BY last_hit_at DESC, content_sha256, version
+                            ROWS UNBOUNDED PRECEDING
+                        ) AS running_bytes
+                        FROM result_cache
+                    ) ranked
+                    WHERE ranked.running_bytes > %s
+                      AND r.content_sha256 = ranked.content_sha256
+                      AND r.version = ranked.version
+                    RETURNING r.annotated_video_path
+                """, (self.max_bytes,))
+                expired = cur.fetchall()
+            self._remove_files(expired)
+            return len(expired)
+
+    def invalidate_stale(self):
+        """Drop entries produced under another version (see cache_version)."""
+        with self.db.cursor() as cur:
+            cur.execute("""
+                DELETE FROM result_cache WHERE version <> %s
+                RETURNING annotated_video_path
+            """, (self.version,))
+            entries = cur.fetchall()
+        self._remove_files(entries)
+        return len(entries)
+
+    def invalidate_all(self):
+        with self.db.cursor() as cur:
+            cur.execute("DELETE FROM result_cache RETURNING annotated_video_path")
+            entries = cur.fetchall()
+        self._remove_files(entries)
+        return len(entries)
+
+    def _delete(self, entries):
+        if not entries:
+            return
+        with self.db.cursor() as cur:
+            for entry in entries:
+                cur.execute(
+                    "DELETE FROM result_cache WHERE content_sha256 = %s AND version = %s",
+                    (entry["content_sha256"], entry["version"]),
+                )
+        self._remove_files(entries)
+
+    def _remove_files(self, entries):
+        for entry in entries:
+            try:
+                os.remove(entry["annotated_video_path"])
+            except FileNotFoundError:
+                pass
+
+    def metrics(self):
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,164 @@
+# ── Constants ────────────────────────────────────────────────────────────────
+# Metrics are rounded to this many decimals in deterministic mode to keep
+# float noise out of the stored values. Rounding is not what makes runs
+# repeatable (CPU-only inference is); a value at a rounding boundary still
+# flips if the inputs differ in the last bits.
+METRIC_DECIMALS = 6
+
+# Every scoring rule lives in one versioned config. Never edit a released
+# version: add a new one (and make it CURRENT_SCORING_VERSION), then run
+# `python -m helper.rescore` to bring stored videos up to date from their
+# saved landmarks. "phases" are JumpPhaseTracker keyword arguments.
+# Version 1 predates per-rep phase tracking and cannot be replayed.
+SCORING_CONFIGS = {
+    2: {
+        "hip_target_deg": 70.0,
+        "knee_range_deg": (83.0, 90.0),
+        "angular_velocity_target": 500.0,
+        "weights": {
+            "jump_height": 0.50,
+            "hip_normalized_score": 0.20,
+            "angular_velocity_score": 0.20,
+            "knee_normalized_score": 0.10,
+        },
+        "phases": {
+            "loading_hip_flexion_deg": 90.0,
+            "dramatic_increase_deg": 6.0,
+            "rebound_margin_deg": 4.0,
+            "landing_drop_deg": 30.0,
+            "standing_hip_flexion_deg": 150.0,
+        },
+    },
+}
+CURRENT_SCORING_VERSION = max(SCORING_CONFIGS)
+
+# Metrics of score_rep, also the per-rep metric keys of merged jump records.
+METRIC_NAMES = (
+    "hip_normalized_score",
+    "smallest_loading_min_hip_flexion",
+    "knee_normalized_score",
+    "smallest_loading_min_knee_flexion",
+    "angular_velocity",
+    "angular_velocity_score",
+)
+
+
+def get_scoring_config(version=CURRENT_SCORING_VERSION):
+    try:
+        return SCORING_CONFIGS[version]
+    except KeyError:
+        raise ValueError(
+            f"Unknown scoring version {version}; expected one of: "
+            f"{', '.join(str(v) for v in SCORING_CONFIGS)}"
+        )
+
+
+def round_metric(value, decimals=METRIC_DECIMALS):
+    return None if value is None else round(float(value), decimals)
+
+
+def normalize_target_score(value, target):
+    if value is None:
+        return None
+    return max(0.0, 100.0 - abs(value - target))
+
+
+def normalize_range_score(value, min_value, max_value):
+    if value is None:
+        return None
+    distance_from_range = max(min_value - value, value - max_value, 0.0)
+    return max(0.0, 100.0 - distance_from_range)
+
+
+def score_rep(rep, deterministic=False, config=None):
+    """Scored metrics of one JumpPhaseTracker rep; every value is None when rep is None."""
+    config = config or get_scoring_config()
+    rep = rep or {}
+    smallest_loading_min_hip_flexion = rep.get("smallest_loading_min_hip_flexion")
+    smallest_loading_min_knee_flexion = rep.get("smallest_loading_min_knee_flexion")
+    largest_loading_max_shoulder_angle = rep.get("largest_loading_max_shoulder_angle")
+    largest_takeoff_max_shoulder_angle = rep.get("largest_takeoff_max_shoulder_angle")
+    loading_max_shoulder_timestamp = rep.get("loading_max_shoulder_timestamp")
+    takeoff_max_shoulder_timestamp = rep.get("takeoff_max_shoulder_timestamp")
+
+    hip_flexion_score = normalize_target_score(
+        smallest_loading_min_hip_flexion, config["hip_target_deg"]
+    )
+    knee_flexion_score = normalize_range_score(
+        smallest_loading_min_knee_flexion, *config["knee_range_deg"]
+    )
+
+    angular_velocity = None
+    angular_velocity_score = None
+    if (
+        largest_loading_max_shoulder_angle is not None
+        and largest_takeoff_max_shoulder_angle is not None
+        and loading_max_shoulder_timestamp is not None
+        and takeoff_max_shoulder_timestamp is not None
+    ):
+        delta_angle = (
+            largest_takeoff_max_shoulder_angle - largest_loading_max_shoulder_angle
+        )
+        delta_time = takeoff_max_shoulder_timestamp - loading_max_shoulder_timestamp
+        if delta_time > 0:
+            angular_velocity = delta_angle / delta_time
+            angular_velocity_score = max(
+                0.0,
+                min(100.0, (angular_velocity / config["angular_velocity_target"]) * 100.0),
+            )
+
+    metrics = {
+        "hip_normalized_score": hip_flexion_score,
+        "smallest_loading_min_hip_flexion": smallest_loading_min_hip_flexion,
+        "knee_normalized_score": knee_flexion_score,
+        "smallest_loading_min_knee_flexion": smallest_loading_min_knee_flexion,
+        "angular_velocity": angular_velocity,
+        "angular_velocity_score": angular_velocity_score,
+    }
+    if deterministic:
+        metrics = {name: round_metric(value) for name, value in metrics.items()}
+    return metrics
+
+
+def overall_score(metrics, jump_height, config=None):
+    """Weighted 0-100 score of a video; missing metrics count as 0."""
+    weights = (config or get_scoring_config())["weights"]
+    values = {
+        **metrics,
+        "jump_height": (jump_height * 100) if jump_height is not None else 0.0,
+    }
+    score = 0.0
+    for name, weight in weights.items():
+        score += (values[name] or 0.0) * weight
+    return round(min(score, 100.0), 2)
+
+
+def score_session(records, config=None):
+    """
+    Headline result of a session from its merged jump records (see
+    jump_phases.merge_jump_records): the metrics, jump height and score of
+    its best-scoring jump, so technique and height always come from the same
+    jump. Ties go to the earliest jump. Returns {"metrics", "jump_height",
+    "score", "jump_index"}; without records every metric, the height and
+    jump_index are None.
+    """
+    best = None
+    for record in records:
+        metrics = {name: record[name] for name in METRIC_NAMES}
+        score = overall_score(metrics, record["jump_height"], config)
+        if best is None or score > best["score"]:
+            best = {
+                "metrics": metrics,
+                "jump_height": record["jump_height"],
+                "score": score,
+                "jump_index": record["jump_index"],
+            }
+    if best is None:
+        metrics = dict.fromkeys(METRIC_NAMES)
+        return {
+            "metrics": metrics,
+            "jump_height": None,
+            "score": overall_score(metrics, None, config),
+            "jump_index": None,
+        }
+    return best
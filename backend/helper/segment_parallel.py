@@ -0,0 +1,327 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from helper.analyze_scores import analyze_jump
+from helper.find_jump_height import (
+    DEFAULT_BATCH_SIZE,
+    GROUND_CALIBRATION_FRAMES,
+    HEIGHT_DECIMALS,
+    SIDE_DETECT_FRAMES,
+    SMOOTH_WINDOW,
+    YOLO_MODEL_PATH,
+    JumpHeightTracker,
+    iter_person_keypoints,
+    load_yolo_model,
+)
+from helper.frame_pipeline import open_video, run_shared_decode
+from helper.jump_phases import merge_jump_records
+from helper.scoring import CURRENT_SCORING_VERSION, get_scoring_config, score_session
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_SEGMENT_SECONDS = 30.0
+DEFAULT_OVERLAP_SECONDS = 2.0
+# Segment boundaries move to the stillest frame within this many seconds of
+# the nominal cut, so a cut rarely lands in the middle of a jump.
+DEFAULT_BOUNDARY_SEARCH_SECONDS = 3.0
+MOTION_PROBE_SIZE = (64, 36)
+# The jump tracker needs side detection and ground calibration before it can
+# see a takeoff, so every segment starts at least this many frames early.
+MIN_OVERLAP_FRAMES = SIDE_DETECT_FRAMES + GROUND_CALIBRATION_FRAMES + SMOOTH_WINDOW
+REP_FRAME_KEYS = ("start_frame", "takeoff_frame", "landing_frame", "end_frame")
+
+
+# ── Segment planning ─────────────────────────────────────────────────────────
+def video_info(video_path):
+    cap = open_video(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+    return fps, frame_count
+
+
+def motion_profile(cap, start_frame, stop_frame, size=MOTION_PROBE_SIZE):
+    """
+    Mean absolute difference between consecutive downscaled grayscale frames.
+
+    Returns (frame_index, motion) pairs for start_frame+1 .. stop_frame-1;
+    a low value means little changed from the previous frame.
+    """
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    profile = []
+    previous = None
+    for frame_index in range(start_frame, stop_frame):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        small = cv2.cvtColor(
+            cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY
+        ).astype(np.float32)
+        if previous is not None:
+            profile.append((frame_index, float(np.abs(small - previous).mean())))
+        previous = small
+    return profile
+
+
+def plan_segments(
+    video_path,
+    segment_seconds=DEFAULT_SEGMENT_SECONDS,
+    overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+    search_seconds=DEFAULT_BOUNDARY_SEARCH_SECONDS,
+):
+    """
+    Split video_path into segments of roughly segment_seconds.
+
+    Each segment owns the frames [start_frame, end_frame) and is decoded from
+    read_start to read_stop, which adds overlap_seconds (at least
+    MIN_OVERLAP_FRAMES) on both sides, so a jump that crosses a boundary is
+    seen whole by the segment that owns its takeoff.
+    """
+    fps, frame_count = video_info(video_path)
+    segment_frames = max(1, int(round(segment_seconds * fps)))
+    overlap_frames = max(MIN_OVERLAP_FRAMES, int(round(overlap_seconds * fps)))
+    search_frames = int(round(search_seconds * fps))
+
+    boundaries = [0]
+    cap = open_video(video_path)
+    try:
+        nominal = segment_frames
+        # Leave the tail in the previous segment rather than making a stub.
+        while nominal < frame_count - segment_frames // 2:
+            profile = motion_profile(
+                cap,
+                max(boundaries[-1] + 1, nominal - search_frames),
+                min(frame_count, nominal + search_frames + 1),
+            )
+            boundary = min(profile, key=lambda item: item[1])[0] if profile else nominal
+            boundaries.append(boundary)
+            nominal = boundary + segment_frames
+    finally:
+        cap.release()
+    boundaries.append(frame_count)
+
+    return fps, [
+        {
+            "index": index,
+            "start_frame": start,
+            "end_frame": end,
+            "read_start": max(0, start - overlap_frames),
+            "read_stop": min(frame_count, end + overlap_frames),
+        }
+        for index, (start, end) in enumerate(zip(boundaries, boundaries[1:]))
+    ]
+
+
+# ── Worker process ───────────────────────────────────────────────────────────
+_worker = {}
+
+
+def _init_worker(
+    pose_model_path, yolo_model_path, deterministic, inference_short_side=None, scoring=None
+):
+    # One process per core: keep each process's OpenCV and torch to a single
+    # thread so workers do not oversubscribe the CPU. Deterministic runs take
+    # the API's torch settings instead (load_yolo_model ->
+    # use_deterministic_torch), since the thread count can change results.
+    cv2.setNumThreads(1)
+    if not deterministic:
+        import torch
+        torch.set_num_threads(1)
+
+    _worker["pose_model_path"] = str(pose_model_path)
+    _worker["yolo_model"] = load_yolo_model(str(yolo_model_path), deterministic=deterministic)
+    _worker["deterministic"] = deterministic
+    _worker["inference_short_side"] = inference_short_side
+    _worker["scoring"] = scoring
+
+
+def analyze_segment(video_path, segment, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run pose analysis and jump tracking on one segment in a worker process.
+
+    The YOLO model is loaded once per process; the pose landmarker is created
+    fresh for every segment because VIDEO mode keeps per-video state. Jump
+    records (see jump_phases.merge_jump_records) use absolute frame indexes,
+    and only those whose takeoff falls inside the segment's own frames are
+    returned.
+    """
+    started = time.perf_counter()
+    read_start = segment["read_start"]
+    deterministic = _worker["deterministic"]
+
+    def track_jumps(frames, fps):
+        tracker = JumpHeightTracker(fps or 30)
+        keypoints = iter_person_keypoints(
+            frames, _worker["yolo_model"], batch_size, _worker["inference_short_side"]
+        )
+        for offset, person_kpts in enumerate(keypoints):
+            tracker.push(read_start + offset, person_kpts)
+        if deterministic:
+            return [
+                {**jump, "height": round(jump["height"], HEIGHT_DECIMALS)}
+                for jump in tracker.jumps
+            ]
+        return tracker.jumps
+
+    def analyze(frames, fps):
+        return analyze_jump(
+            model_path=_worker["pose_model_path"],
+            input_source=video_path,
+            output_dir=None,
+            frames=frames,
+            fps=fps,
+            render=False,
+            deterministic=deterministic,
+            scoring=_worker["scoring"],
+            inference_short_side=_worker["inference_short_side"],
+        )
+
+    results = run_shared_decode(
+        video_path,
+        {"analyze": analyze, "height": track_jumps},
+        start_frame=read_start,
+        stop_frame=segment["read_stop"],
+    )
+
+    output = results["analyze"]
+    # analyze_jump counts frames from the first decoded one, i.e. read_start.
+    reps = []
+    for rep in output["reps"]:
+        rep = dict(rep)
+        for key in REP_FRAME_KEYS:
+            if rep[key] is not None:
+                rep[key] += read_start
+        reps.append(rep)
+
+    jumps = []
+    for record in merge_jump_records(reps, results["height"], output["fps"]):
+        owner_frame = record["takeoff_frame"]
+        if owner_frame is None:
+            owner_frame = record["start_frame"]
+        if segment["start_frame"] <= owner_frame < segment["end_frame"]:
+            jumps.append(record)
+    return {
+        **segment,
+        "jumps": jumps,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# ── Merge ────────────────────────────────────────────────────────────────────
+def merge_segments(segment_results, fps, scoring=None):
+    """
+    Combine per-segment results into one session report, jumps in time order.
+
+    The headline metrics, jump height and score are those of the best jump
+    (scoring.score_session), as stored for an upload of the same video.
+    """
+    segment_results = sorted(segment_results, key=lambda result: result["index"])
+    jumps = [
+        {**jump, "segment": result["index"]}
+        for result in segment_results
+        for jump in result["jumps"]
+    ]
+    for jump_index, jump in enumerate(jumps):
+        jump["jump_index"] = jump_index
+    session = score_session(jumps, scoring)
+
+    return {
+        "fps": fps,
+        "segments": [
+            {
+                "index": result["index"],
+                "start_frame": result["start_frame"],
+                "end_frame": result["end_frame"],
+                "jump_count": len(result["jumps"]),
+                "seconds": result["seconds"],
+            }
+            for result in segment_results
+        ],
+        "jumps": jumps,
+        "metrics": session["metrics"],
+        "jump_height": session["jump_height"],
+        "score": session["score"],
+        "best_jump_index": session["jump_index"],
+    }
+
+
+def analyze_long_video(
+    video_path,
+    pose_model_path,
+    yolo_model_path=YOLO_MODEL_PATH,
+    workers=None,
+    segment_seconds=DEFAULT_SEGMENT_SECONDS,
+    overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+    deterministic=False,
+    inference_short_side=None,
+    scoring=None,
+):
+    """
+    Analyze a long recording by fanning overlapping segments out to a process pool.
+
+    Segments are planned on the calling process (see plan_segments), analyzed
+    independently by up to workers processes (default: one per CPU), and
+    merged into a single report with every detected jump, the segment it came
+    from, and the session's best jump and score (see merge_segments).
+    """
+    started = time.perf_counter()
+    scoring = scoring or get_scoring_config()
+    video_path = str(video_path)
+    fps, segments = plan_segments(video_path, segment_seconds, overlap_seconds)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(segments)))
+
+    # spawn: MediaPipe and torch are not fork-safe once initialized.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(pose_model_path, yolo_model_path, deterministic, inference_short_side, scoring),
+    ) as executor:
+        futures = [executor.submit(analyze_segment, video_path, segment) for segment in segments]
+        segment_results = [future.result() for future in futures]
+
+    report = merge_segments(segment_results, fps, scoring)
+    report["workers"] = workers
+    report["total_seconds"] = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a long video in parallel segments")
+    parser.add_argument("video", help="Path to the input video.")
+    parser.add_argument(
+        "--model", default="pose_landmarker_heavy.task", help="Path to the pose model file."
+    )
+    parser.add_argument("--yolo-model", default=YOLO_MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--segment-seconds", type=float, default=DEFAULT_SEGMENT_SECONDS)
+    parser.add_argument("--overlap-seconds", type=float, default=DEFAULT_OVERLAP_SECONDS)
+    parser.add_argument("--deterministic", action="store_true")
+    parser.add_argument("--inference-short-side", type=int, default=None)
+    parser.add_argument("--scoring-version", type=int, default=CURRENT_SCORING_VERSION)
+    args = parser.parse_args()
+
+    report = analyze_long_video(
+        args.video,
+        pose_model_path=args.model,
+        yolo_model_path=args.yolo_model,
+        workers=args.workers,
+        segment_seconds=args.segment_seconds,
+        overlap_seconds=args.overlap_seconds,
+        deterministic=args.deterministic,
+        inference_short_side=args.inference_short_side,
+        scoring=get_scoring_config(args.scoring_version),
+    )
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
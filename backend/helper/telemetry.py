@@ -0,0 +1,231 @@
+import bisect
+import contextvars
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# ── Constants ────────────────────────────────────────────────────────────────
+# Upper bounds (seconds) for whole-stage spans and for per-frame work.
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+FRAME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value, count=1):
+        """Record value count times (e.g. a batch average once per frame in the batch)."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += count
+            series[1] += value * count
+            series[2] += count
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, math.inf), bucket_counts):
+                    cumulative += bucket_count
+                    label_text = _format_labels(
+                        self.labelnames, labels, extra=(("le", _format_value(float(bound))),)
+                    )
+                    lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+                lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ── Process-wide metrics ─────────────────────────────────────────────────────
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "verticai_stage_seconds",
+    "Wall time of one pipeline stage for one request or job.",
+    ("stage",),
+)
+FRAME_SECONDS = REGISTRY.histogram(
+    "verticai_frame_seconds",
+    "Per-frame wall time of decode, pose inference, YOLO inference and encode.",
+    ("stage",),
+    buckets=FRAME_BUCKETS,
+)
+FRAMES_PROCESSED = REGISTRY.counter(
+    "verticai_frames_processed_total",
+    "Video frames processed.",
+    ("pipeline",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "verticai_result_cache_requests_total",
+    "Result cache lookups by outcome.",
+    ("result",),
+)
+JOBS_FINISHED = REGISTRY.counter(
+    "verticai_jobs_finished_total",
+    "Analysis jobs finished, by final status.",
+    ("status",),
+)
+ANALYSES_BY_TIER = REGISTRY.counter(
+    "verticai_analyses_by_model_tier_total",
+    "Analyses (jobs and live streams) by the model tier they ran on.",
+    ("tier",),
+)
+LIVE_FRAMES_DROPPED = REGISTRY.counter(
+    "verticai_live_frames_dropped_total",
+    "Live stream frames dropped because inference could not keep up.",
+)
+FAILURES = REGISTRY.counter(
+    "verticai_failures_total",
+    "Errors, by the stage they happened in.",
+    ("stage",),
+)
+
+
+# ── Spans and traces ─────────────────────────────────────────────────────────
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Spans of one job, dumped in Chrome trace-event format (load the file in
+    chrome://tracing or Perfetto to see each stage on its thread).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, started, seconds, **args):
+        with self._lock:
+            self.events.append({
+                "name": stage,
+                "ph": "X",
+                "ts": (started - self.started) * 1e6,
+                "dur": seconds * 1e6,
+                "pid": 0,
+                "tid": threading.current_thread().name,
+                "args": args,
+            })
+
+    def dump(self, directory):
+        path = Path(directory) / f"{self.name}.trace.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+@contextmanager
+def tracing(trace):
+    """Make trace the current trace for spans on this thread (and threads it starts via run_in_context)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def run_in_context(target):
+    """Wrap a thread target so it sees the starting thread's current trace."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(target, *args, **kwargs)
+
+
+def record_span(stage, started, seconds, **args):
+    STAGE_SECONDS.observe(stage, value=seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, started, seconds, **args)
+
+
+@contextmanager
+def span(stage, **args):
+    """Time a block as one stage: into STAGE_SECONDS and the current trace, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        FAILURES.inc(stage)
+        raise
+    finally:
+        record_span(stage, started, time.perf_counter() - started, **args)
+
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import os
+
+from helper.result_cache import link_or_copy
+
+# ── Constants ────────────────────────────────────────────────────────────────
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_BULK_UPLOAD_BYTES = 10 * DEFAULT_MAX_UPLOAD_BYTES
+# Multipart boundaries and part headers around a single uploaded file.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+async def send_too_large(send, max_bytes):
+    body = json.dumps(
+        {"detail": f"Request body exceeds the limit of {max_bytes} bytes."}
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware capping the request body of the upload routes.
+
+    Starlette spools the whole multipart body to a temp file before a route
+    runs, so the route itself cannot stop an oversized upload. limits maps a
+    POST path to its maximum body size: a larger Content-Length is answered
+    with 413 before anything is read, and a body without one (chunked) is
+    cut off with 413 as soon as it grows past the limit.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            max_bytes = self.limits.get(scope["path"])
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            await send_too_large(send, max_bytes)
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    too_large = True
+                    raise UploadTooLargeError(f"Request body exceeds {max_bytes} bytes.")
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Whatever the app answers to the aborted body is replaced by a 413.
+            if too_large and not response_started:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if not too_large:
+                raise
+        if too_large and not response_started:
+            await send_too_large(send, max_bytes)
+
+
+async def stream_upload_to_disk(
+    upload,
+    dest_path,
+    max_bytes=DEFAULT_MAX_UPLOAD_BYTES,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    Copy an UploadFile to dest_path chunk by chunk.
+
+    Only one chunk is held in memory at a time, the SHA-256 is computed as the
+    bytes go by, and the copy aborts as soon as more than max_bytes arrive.
+    The file is written to a ".part" path and renamed when complete, so a
+    failed upload never leaves a truncated video behind. By the time this
+    runs the request body has been received; UploadSizeLimitMiddleware is
+    what stops an oversized request early, this enforces the per-file limit.
+
+    Returns (file_size, sha256_hex).
+    """
+    declared_size = getattr(upload, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise UploadTooLargeError(
+            f"Upload is {declared_size} bytes; the limit is {max_bytes} bytes."
+        )
+
+    part_path = f"{dest_path}.part"
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Upload exceeds the limit of {max_bytes} bytes."
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        os.replace(part_path, dest_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return file_size, digest.hexdigest()
+
+
+def import_local_file(src_path, dest_path, max_bytes=DEFAULT_MAX_UPLOAD_BYTES, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Bring a file that is already on this machine into the upload folder.
+
+    The file is hashed in chunks and then hard-linked to dest_path (copied
+    across filesystems), so a local import never goes through HTTP.
+
+    Returns (file_size, sha256_hex).
+    """
+    file_size = os.path.getsize(src_path)
+    if file_size > max_bytes:
+        raise UploadTooLargeError(
+            f"{src_path} is {file_size} bytes; the limit is {max_bytes} bytes."
+        )
+
+    digest = hashlib.sha256()
+    with open(src_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    link_or_copy(src_path, dest_path)
+    return file_size, digest.hexdigest()
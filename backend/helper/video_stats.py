@@ -0,0 +1,217 @@
+import math
+
+from psycopg2.extras import execute_values
+
+# ── Constants ────────────────────────────────────────────────────────────────
+# Histogram range and bin width per metric. Values outside the range fall in
+# the first/last bin, and percentiles are exact to within one bin width.
+HISTOGRAM_BINS = {
+    "score": (0.0, 100.0, 1.0),
+    "jump_height": (0.0, 1.5, 0.01),
+    "hip_normalized_score": (0.0, 100.0, 1.0),
+    "knee_normalized_score": (0.0, 100.0, 1.0),
+    "angular_velocity": (-1000.0, 3000.0, 10.0),
+}
+SUMMARY_METRICS = tuple(HISTOGRAM_BINS)
+LEADERBOARD_METRICS = ("score", "jump_height")
+DEFAULT_LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 100
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+TREND_BUCKETS = ("day", "week", "month")
+
+
+def histogram_bin(metric, value):
+    low, high, width = HISTOGRAM_BINS[metric]
+    bins = int(math.ceil((high - low) / width))
+    return min(max(int(math.floor((value - low) / width)), 0), bins - 1)
+
+
+def percentile_from_histogram(metric, counts, percentile):
+    """
+    Value at percentile (0-100) of a {bin: count} histogram, interpolated
+    linearly inside the bin it falls in.
+    """
+    low, _, width = HISTOGRAM_BINS[metric]
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    target = total * percentile / 100.0
+    seen = 0
+    for bin_index in sorted(counts):
+        count = counts[bin_index]
+        if seen + count >= target:
+            fraction = (target - seen) / count if count else 0.0
+            return low + (bin_index + fraction) * width
+        seen += count
+    return low + (max(counts) + 1) * width
+
+
+class VideoStats:
+    """
+    Running summaries of output_videos for the leaderboard and stats endpoints.
+
+    Two small tables are kept up to date by record(), which
+    VideoRepository.insert_output_video calls in the same transaction as the
+    insert: a per-metric histogram (for percentiles) and per-day count / sum /
+    min / max (for trends). Reading them costs the same whatever the size of
+    output_videos. Top-N lists come straight from indexes on output_videos.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def create_tables(self):
+        with self.db.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS output_video_histograms (
+                    metric  TEXT NOT NULL,
+                    bin     INT NOT NULL,
+                    count   BIGINT NOT NULL,
+                    PRIMARY KEY (metric, bin)
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS output_video_daily_stats (
+                    day     DATE NOT NULL,
+                    metric  TEXT NOT NULL,
+                    count   BIGINT NOT NULL,
+                    sum     FLOAT NOT NULL,
+                    min     FLOAT NOT NULL,
+                    max     FLOAT NOT NULL,
+                    PRIMARY KEY (day, metric)
+                )
+            """)
+            for metric in LEADERBOARD_METRICS:
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS output_videos_{metric}_desc_idx
+                    ON output_videos ({metric} DESC NULLS LAST, id)
+                """)
+
+    def record(self, cur, record):
+        """Add one output_videos row to the summaries, on the caller's cursor."""
+        values = [
+            (metric, record[metric]) for metric in SUMMARY_METRICS
+            if record.get(metric) is not None
+        ]
+        if not values:
+            return
+        day = record["created_at"].date()
+
+        execute_values(cur, """
+            INSERT INTO output_video_histograms AS h (metric, bin, count)
+            VALUES %s
+            ON CONFLICT (metric, bin) DO UPDATE SET count = h.count + EXCLUDED.count
+        """, [(metric, histogram_bin(metric, value), 1) for metric, value in values])
+        execute_values(cur, """
+            INSERT INTO output_video_daily_stats AS d (day, metric, count, sum, min, max)
+            VALUES %s
+            ON CONFLICT (day, metric) DO UPDATE SET
+                count = d.count + EXCLUDED.count,
+                sum   = d.sum + EXCLUDED.sum,
+                min   = LEAST(d.min, EXCLUDED.min),
+                max   = GREATEST(d.max, EXCLUDED.max)
+        """, [(day, metric, 1, value, value, value) for metric, value in values])
+
+    def rebuild(self):
+        """Recompute both summaries from output_videos with one scan per metric."""
+        with self.db.cursor() as cur:
+            cur.execute("TRUNCATE output_video_histograms, output_video_daily_stats")
+            for metric, (low, high, width) in HISTOGRAM_BINS.items():
+                bins = int(math.ceil((high - low) / width))
+                cur.execute(f"""
+                    INSERT INTO output_video_histograms (metric, bin, count)
+                    SELECT %s, LEAST(GREATEST(floor(({metric} - %s) / %s)::int, 0), %s), count(*)
+                    FROM output_videos
+                    WHERE {metric} IS NOT NULL
+                    GROUP BY 2
+                """, (metric, low, width, bins - 1))
+                cur.execute(f"""
+                    INSERT INTO output_video_daily_stats (day, metric, count, sum, min, max)
+                    SELECT created_at::date, %s, count(*), sum({metric}), min({metric}), max({metric})
+                    FROM output_videos
+                    WHERE {metric} IS NOT NULL
+                    GROUP BY 1
+                """, (metric,))
+
+    def rebuild_if_empty(self):
+        """Build the summaries once for tables that predate them. Returns True if it did."""
+        with self.db.cursor() as cur:
+            cur.execute("""
+                SELECT EXISTS (SELECT 1 FROM output_videos) AS has_videos,
+                       EXISTS (SELECT 1 FROM output_video_histograms) AS has_stats
+            """)
+            state = cur.fetchone()
+        if state["has_videos"] and not state["has_stats"]:
+            self.rebuild()
+            return True
+        return False
+
+    def leaderboard(self, metric="score", limit=DEFAULT_LEADERBOARD_SIZE):
+        if metric not in LEADERBOARD_METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(LEADERBOARD_METRICS)}")
+        limit = max(1, min(limit, MAX_LEADERBOARD_SIZE))
+        with self.db.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, original_filename, score, jump_height, created_at
+                FROM output_videos
+                WHERE {metric} IS NOT NULL
+                ORDER BY {metric} DESC NULLS LAST, id
+                LIMIT %s
+            """, (limit,))
+            return [dict(r) for r in cur.fetchall()]
+
+    def distribution(self, metric, percentiles=DEFAULT_PERCENTILES):
+        if metric not in HISTOGRAM_BINS:
+            raise ValueError(f"metric must be one of: {', '.join(HISTOGRAM_BINS)}")
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+        with self.db.cursor() as cur:
+            cur.execute(
+                "SELECT bin, count FROM output_video_histograms WHERE metric = %s", (metric,)
+            )
+            counts = {r["bin"]: r["count"] for r in cur.fetchall()}
+        return {
+            "metric": metric,
+            "count": sum(counts.values()),
+            "bin_width": HISTOGRAM_BINS[metric][2],
+            "percentiles": {
+                f"p{p:g}": percentile_from_histogram(metric, counts, p) for p in percentiles
+            },
+        }
+
+    def trends(self, bucket="day", since=None, until=None, metrics=SUMMARY_METRICS):
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"bucket must be one of: {', '.join(TREND_BUCKETS)}")
+        unknown = set(metrics) - set(SUMMARY_METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+        filters, params = ["metric = ANY(%s)"], [list(metrics)]
+        if since is not None:
+            filters.append("day >= %s")
+            params.append(since)
+        if until is not None:
+            filters.append("day < %s")
+            params.append(until)
+
+        with self.db.cursor() as cur:
+            cur.execute(f"""
+                SELECT date_trunc(%s, day)::date AS bucket, metric,
+                       sum(count) AS count, sum(sum) AS sum, min(min) AS min, max(max) AS max
+                FROM output_video_daily_stats
+                WHERE {' AND '.join(filters)}
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+            """, (bucket, *params))
+            rows = cur.fetchall()
+
+        buckets = {}
+        for r in rows:
+            entry = buckets.setdefault(r["bucket"], {"bucket": r["bucket"]})
+            entry[r["metric"]] = {
+                "count": r["count"],
+                "avg": r["sum"] / r["count"] if r["count"] else None,
+                "min": r["min"],
+                "max": r["max"],
+            }
+        return list(buckets.values())
@@ -1,18 +1,90 @@
 import asyncio
+import json
+import mimetypes
 import os
+import threading
+import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 
-import psycopg2
-import psycopg2.extras
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, UploadFile
-from openai import OpenAI
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from helper.analyze_scores import analyze_jump
-from helper.find_jump_height import find_jump_height
+from helper.db import DEFAULT_MAX_CONNECTIONS, DEFAULT_MIN_CONNECTIONS, Database
+from helper.find_jump_height import DEFAULT_BATCH_SIZE, find_jumps
+from helper.frame_pipeline import DEFAULT_INFERENCE_SHORT_SIDE, run_shared_decode
+from helper.job_queue import (
+    DEFAULT_MAX_PENDING,
+    DEFAULT_WORKERS,
+    DONE,
+    FAILED,
+    FINISHED_STATUSES,
+    JobQueue,
+    JobStore,
+    QueueFullError,
+)
+from helper.jump_phases import merge_jump_records
+from helper.landmark_store import LandmarkStore
+from helper.live_analysis import (
+    DEFAULT_LIVE_FPS,
+    DEFAULT_MAX_PENDING_FRAMES as DEFAULT_LIVE_MAX_PENDING_FRAMES,
+    LiveFrameBuffer,
+    LiveSession,
+)
+from helper.llm_reports import (
+    DEFAULT_MAX_CONCURRENCY as DEFAULT_LLM_MAX_CONCURRENCY,
+    DEFAULT_MODEL as DEFAULT_LLM_MODEL,
+    ReportService,
+    create_backend,
+)
+from helper.model_registry import (
+    DEFAULT_DOWNGRADE_DEPTHS,
+    DEFAULT_MODEL_TIER,
+    DEFAULT_POOL_SIZE,
+    MODEL_TIERS,
+    ModelRegistry,
+    tier_model_paths,
+)
+from helper.render import load_overlays, render_annotated_video, save_overlays
+from helper.repository import (
+    DEFAULT_PAGE_SIZE,
+    RENDER_DONE,
+    RENDER_FAILED,
+    RENDER_PENDING,
+    VideoRepository,
+)
+from helper.result_cache import DEFAULT_MAX_CACHE_BYTES, ResultCache, cache_version
+from helper.scoring import CURRENT_SCORING_VERSION, get_scoring_config, score_session
+from helper.telemetry import ANALYSES_BY_TIER, REGISTRY, Trace, span, tracing
+from helper.uploads import (
+    DEFAULT_MAX_BULK_UPLOAD_BYTES,
+    DEFAULT_MAX_UPLOAD_BYTES,
+    MULTIPART_OVERHEAD_BYTES,
+    UploadSizeLimitMiddleware,
+    UploadTooLargeError,
+    import_local_file,
+    stream_upload_to_disk,
+)
+from helper.video_stats import (
+    DEFAULT_LEADERBOARD_SIZE,
+    DEFAULT_PERCENTILES,
+    SUMMARY_METRICS,
+    VideoStats,
+)
 
 load_dotenv()
 
@@ -22,11 +94,41 @@ app = FastAPI()
 BASE_DIR = Path(__file__).parent
 INPUT_VIDEOS_DIR = BASE_DIR / "input_videos"
 OUTPUT_VIDEOS_DIR = BASE_DIR / "output_videos"
-MODEL_PATH = BASE_DIR / "helper" / "pose_landmarker_heavy.task"
+RESULT_CACHE_DIR = BASE_DIR / "result_cache"
+LANDMARKS_DIR = BASE_DIR / "landmarks"
+POSE_MODELS_DIR = BASE_DIR / "helper"
 
 INPUT_VIDEOS_DIR.mkdir(exist_ok=True)
 OUTPUT_VIDEOS_DIR.mkdir(exist_ok=True)
 
+# ── Models (loaded once per worker process) ────────────────────────────────
+# Deterministic analysis gives identical metrics for identical videos, which
+# the result cache and any parallel/out-of-order processing rely on.
+DETERMINISTIC_ANALYSIS = os.getenv("DETERMINISTIC_ANALYSIS", "1") == "1"
+# Short side (pixels) frames are shrunk to before pose inference; 0 runs the
+# models on full-resolution frames.
+INFERENCE_SHORT_SIDE = int(os.getenv("INFERENCE_SHORT_SIDE", DEFAULT_INFERENCE_SHORT_SIDE)) or None
+# Default model tier (lite/full/heavy); uploads may ask for another one. Jobs
+# without a requested tier drop to "full" once MODEL_DOWNGRADE_FULL_DEPTH jobs
+# are pending and to "lite" at MODEL_DOWNGRADE_LITE_DEPTH (0 never
+# downgrades), if that tier's pose model is installed. YOLO_MODEL_<TIER> sets a tier's YOLO weights.
+MODEL_TIER = os.getenv("MODEL_TIER", DEFAULT_MODEL_TIER)
+MODEL_DOWNGRADE_DEPTHS = {
+    tier: int(os.getenv(f"MODEL_DOWNGRADE_{tier.upper()}_DEPTH", depth))
+    for tier, depth in DEFAULT_DOWNGRADE_DEPTHS.items()
+}
+
+model_registry = ModelRegistry(
+    tiers=tier_model_paths(
+        POSE_MODELS_DIR,
+        {tier: os.getenv(f"YOLO_MODEL_{tier.upper()}") for tier in MODEL_TIERS},
+    ),
+    default_tier=MODEL_TIER,
+    downgrade_depths=MODEL_DOWNGRADE_DEPTHS,
+    pool_size=int(os.getenv("MODEL_POOL_SIZE", DEFAULT_POOL_SIZE)),
+    deterministic=DETERMINISTIC_ANALYSIS,
+)
+
 # ── Allowed video MIME types ───────────────────────────────────────────────
 ALLOWED_CONTENT_TYPES = {
     "video/mp4",
@@ -37,91 +139,560 @@ ALLOWED_CONTENT_TYPES = {
     "video/x-msvideo",   # .avi (alternate)
     "video/mpeg",
 }
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES))
+# Cap on a whole bulk request; every file in it is still held to MAX_UPLOAD_BYTES.
+MAX_BULK_UPLOAD_BYTES = int(os.getenv("MAX_BULK_UPLOAD_BYTES", DEFAULT_MAX_BULK_UPLOAD_BYTES))
+# Oversized requests are refused before the multipart body is spooled to disk.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/input-videos": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/input-videos/bulk": MAX_BULK_UPLOAD_BYTES,
+    },
+)
+# POST /input-videos/bulk may import a directory only from inside this folder;
+# unset disables directory imports.
+BULK_IMPORT_DIR = os.getenv("BULK_IMPORT_DIR")
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+JUMP_HEIGHT_ADAPTIVE = os.getenv("JUMP_HEIGHT_ADAPTIVE", "0") == "1"
+SAVE_LANDMARKS = os.getenv("SAVE_LANDMARKS", "1") == "1"
+# With DEFERRED_RENDER=1 the analysis skips drawing/encoding and the
+# annotated video is rendered afterwards on the low-priority render pool.
+DEFERRED_RENDER = os.getenv("DEFERRED_RENDER", "0") == "1"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 1))
+RENDER_NICENESS = 10
+
+# ── DB connection pool ─────────────────────────────────────────────────────
+db = Database(
+    minconn=int(os.getenv("DB_POOL_MIN", DEFAULT_MIN_CONNECTIONS)),
+    maxconn=int(os.getenv("DB_POOL_MAX", DEFAULT_MAX_CONNECTIONS)),
+    host=os.getenv("DB_HOST"),
+    port=os.getenv("DB_PORT"),
+    dbname=os.getenv("DB_NAME"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+)
+stats = VideoStats(db)
+videos = VideoRepository(db, stats=stats)
+
+# ── Analysis jobs ──────────────────────────────────────────────────────────
+JOB_EVENTS_POLL_SECONDS = 1.0
+# Directory for one Chrome trace file per job (optional, for profiling).
+JOB_TRACE_DIR = os.getenv("JOB_TRACE_DIR")
+
+job_store = JobStore(db)
+
+# ── Result cache ───────────────────────────────────────────────────────────
+# Score weights, metric targets and phase thresholds come from a versioned
+# config (helper/scoring.py). The version is part of the cache key, so stale
+# cached results stop matching, and is stored on every output_videos row.
+# Only results of the default model tier are cached, so an analysis
+# downgraded under load is never served again once the load is gone.
+SCORING_VERSION = int(os.getenv("SCORING_VERSION", CURRENT_SCORING_VERSION))
+SCORING = get_scoring_config(SCORING_VERSION)
+
+result_cache = ResultCache(
+    db,
+    RESULT_CACHE_DIR,
+    version=cache_version(
+        *model_registry.tiers[MODEL_TIER],
+        SCORING_VERSION,
+        INFERENCE_SHORT_SIDE,
+        adaptive=JUMP_HEIGHT_ADAPTIVE,
+        deterministic=DETERMINISTIC_ANALYSIS,
+    ),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", DEFAULT_MAX_CACHE_BYTES)),
+)
+
+# ── LLM reports ────────────────────────────────────────────────────────────
+# LLM_BACKEND=stub writes placeholder reports without network access.
+# With DEFERRED_LLM_REPORT=1 the output row is stored with llm_report NULL
+# and the report is filled in once it arrives.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+DEFERRED_LLM_REPORT = os.getenv("DEFERRED_LLM_REPORT", "0") == "1"
+
+LLM_BACKEND_OPTIONS = {
+    "openai": {
+        "model": os.getenv("LLM_MODEL", DEFAULT_LLM_MODEL),
+        "api_key": os.getenv("OPENAI_API_KEY"),
+    },
+}
 
-# ── DB connection ──────────────────────────────────────────────────────────
-def get_db():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
+report_service = ReportService(
+    create_backend(LLM_BACKEND, **LLM_BACKEND_OPTIONS.get(LLM_BACKEND, {})),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_LLM_MAX_CONCURRENCY)),
+    scoring=SCORING,
+)
+
+# ── Live analysis ──────────────────────────────────────────────────────────
+# Each /ws/live stream holds a pose landmarker and a YOLO model from the
+# pools for as long as it is open, so only a few may run at once.
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", 1))
+LIVE_MAX_PENDING_FRAMES = int(
+    os.getenv("LIVE_MAX_PENDING_FRAMES", DEFAULT_LIVE_MAX_PENDING_FRAMES)
+)
+if LIVE_MAX_PENDING_FRAMES < 1:
+    raise ValueError("LIVE_MAX_PENDING_FRAMES must be at least 1")
+live_sessions = asyncio.Semaphore(LIVE_MAX_SESSIONS)
 
 # ── Create table on startup ────────────────────────────────────────────────
 @app.on_event("startup")
 def startup():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS input_videos (
-            id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            original_filename TEXT NOT NULL,
-            file_path         TEXT NOT NULL,
-            content_type      TEXT NOT NULL,
-            file_size         BIGINT NOT NULL,
-            uploaded_at       TIMESTAMP NOT NULL
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS output_videos (
-            id                              UUID PRIMARY KEY REFERENCES input_videos(id),
-            original_filename               TEXT NOT NULL,
-            file_path                       TEXT NOT NULL,
-            hip_normalized_score            FLOAT,
-            smallest_loading_min_hip_flexion FLOAT,
-            knee_normalized_score           FLOAT,
-            smallest_loading_min_knee_flexion FLOAT,
-            angular_velocity                FLOAT,
-            angular_velocity_score          FLOAT,
-            jump_height                     FLOAT,
-            llm_report                      TEXT,
-            score                           FLOAT
-        )
-    """)
-    conn.commit()
-    cur.close()
-    conn.close()
+    videos.create_tables()
+    job_store.create_table()
+    result_cache.create_table()
+    stats.create_tables()
     print("✅ Database tables ready.")
 
+    if stats.rebuild_if_empty():
+        print("✅ Built stats summaries from existing output videos.")
+
+    invalidated = result_cache.invalidate_stale()
+    if invalidated:
+        print(f"✅ Dropped {invalidated} cached results from older model versions.")
+
+    warmup_seconds = model_registry.warm_up()
+    print(
+        f"✅ Models warmed up in {warmup_seconds:.2f}s "
+        f"(tier '{MODEL_TIER}', installed: {', '.join(model_registry.available_tiers())})."
+    )
+
+    job_queue.start()
+    print(f"✅ Job queue started with {job_queue.workers} workers.")
+
+
+@app.on_event("shutdown")
+def shutdown():
+    job_queue.stop()
+    render_executor.shutdown(wait=True)
+    model_registry.close()
+    report_service.close()
+    db.close()
+
+
+# ── Analysis pipeline ──────────────────────────────────────────────────────
+def lower_thread_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), RENDER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+render_executor = ThreadPoolExecutor(
+    max_workers=RENDER_WORKERS,
+    thread_name_prefix="render",
+    initializer=lower_thread_priority,
+)
+
+
+def run_analysis(file_path, render=True, tier=None):
+    """Decode file_path once and run pose analysis and jump height on pooled models of tier."""
+
+    def analyze(frames, fps):
+        with span("analyze_jump"):
+            return analyze_jump(
+                model_path=model_registry.pose_model_path(tier),
+                input_source=str(file_path),
+                output_dir=str(OUTPUT_VIDEOS_DIR),
+                frames=frames,
+                fps=fps,
+                detector=detector,
+                render=render,
+                deterministic=DETERMINISTIC_ANALYSIS,
+                scoring=SCORING,
+                inference_short_side=INFERENCE_SHORT_SIDE,
+            )
+
+    def height(frames, fps):
+        with span("find_jump_height"):
+            return find_jumps(
+                str(file_path),
+                frames=frames,
+                fps=fps,
+                model=yolo,
+                batch_size=YOLO_BATCH_SIZE,
+                adaptive=JUMP_HEIGHT_ADAPTIVE,
+                deterministic=DETERMINISTIC_ANALYSIS,
+                inference_short_side=INFERENCE_SHORT_SIDE,
+            )
+
+    with model_registry.pose_landmarker(tier) as detector, model_registry.yolo_model(tier) as yolo:
+        return run_shared_decode(str(file_path), {"analyze": analyze, "height": height})
+
+
+def new_annotated_video_path():
+    return OUTPUT_VIDEOS_DIR / f"annotated_{uuid.uuid4().hex}.mp4"
+
+
+def render_deferred(
+    file_path, landmark_store, overlays, annotated_video_path, on_done=None, on_failed=None
+):
+    try:
+        render_annotated_video(str(file_path), landmark_store, overlays, annotated_video_path)
+    except Exception as e:
+        print(f"❌ Deferred render failed for {file_path}: {e}")
+        Path(annotated_video_path).unlink(missing_ok=True)
+        if on_failed is not None:
+            on_failed()
+        return
+    if on_done is not None:
+        try:
+            on_done()
+        except Exception as e:
+            print(f"❌ Recording the render of {file_path} failed: {e}")
+
+
+def process_upload(payload):
+    """
+    Job handler: analyze an uploaded video, score it, write the LLM report and store the result.
+
+    With JOB_TRACE_DIR set, the job's stage spans are also written there as a
+    Chrome trace named after the input video id.
+    """
+    trace = Trace(payload["input_video_id"]) if JOB_TRACE_DIR else None
+    try:
+        with tracing(trace), span("job"):
+            return analyze_upload(payload)
+    finally:
+        if trace is not None:
+            trace.dump(JOB_TRACE_DIR)
+
+
+def analyze_upload(payload):
+    input_video_id = payload["input_video_id"]
+    file_path = payload["file_path"]
+
+    # ── Requested model tier, or the default one downgraded under load ───
+    tier = model_registry.select_tier(payload.get("model_tier"), job_queue.pending())
+    ANALYSES_BY_TIER.inc(tier)
+
+    # ── Decode once, run pose analysis & jump height concurrently ────────
+    with span("analysis"):
+        results = run_analysis(file_path, render=not DEFERRED_RENDER, tier=tier)
+    output = results["analyze"]
+    jumps = merge_jump_records(output["reps"], results["height"], output["fps"])
+
+    if SAVE_LANDMARKS:
+        with span("save_landmarks"):
+            landmarks_dir = LANDMARKS_DIR / str(input_video_id)
+            output["landmarks"].save_npy(landmarks_dir)
+            save_overlays(landmarks_dir, output["overlays"])
+
+    if DEFERRED_RENDER:
+        # The row points at the path the render pool will write to.
+        annotated_video_path = str(new_annotated_video_path())
+    else:
+        annotated_video_path = output["annotated_video_path"]
+    annotated_filename = Path(annotated_video_path).name
+
+    # ── Score the best jump; metrics and height come from that one jump ──
+    session = score_session(jumps, SCORING)
+    metrics = session["metrics"]
+    jump_height = session["jump_height"]
+    score = session["score"]
+
+    # ── Generate LLM report (filled in later when deferred) ───────────
+    llm_report = None
+    if not DEFERRED_LLM_REPORT:
+        with span("llm_report"):
+            llm_report = report_service.generate(metrics, jump_height)
+    report = {"llm_report": llm_report}
+
+    # ── Insert into output_videos ──────────────────────────────────────────
+    output_record = videos.insert_output_video(
+        input_video_id,
+        annotated_filename,
+        annotated_video_path,
+        metrics,
+        jump_height,
+        llm_report,
+        score,
+        jumps,
+        scoring_version=SCORING_VERSION,
+        model_tier=tier,
+        render_status=RENDER_PENDING if DEFERRED_RENDER else RENDER_DONE,
+    )
+
+    def cache_result():
+        if payload.get("content_sha256") and tier == MODEL_TIER:
+            result_cache.put(
+                payload["content_sha256"],
+                metrics,
+                jump_height,
+                report["llm_report"],
+                score,
+                annotated_video_path,
+                jumps,
+            )
+
+    if DEFERRED_LLM_REPORT:
+        def store_report(llm_report):
+            # The cache entry may be written before or after the report lands.
+            report["llm_report"] = llm_report
+            videos.update_llm_report(input_video_id, llm_report)
+            if payload.get("content_sha256"):
+                result_cache.update_llm_report(payload["content_sha256"], llm_report)
+
+        report_service.submit(metrics, jump_height, on_done=store_report)
+
+    if DEFERRED_RENDER:
+        def render_done():
+            videos.update_render_status(input_video_id, RENDER_DONE)
+            cache_result()
+
+        render_executor.submit(
+            render_deferred,
+            file_path,
+            output["landmarks"],
+            output["overlays"],
+            annotated_video_path,
+            render_done,
+            lambda: videos.update_render_status(input_video_id, RENDER_FAILED),
+        )
+    else:
+        cache_result()
+
+    return {"output_video": output_record}
+
+
+def store_cached_result(input_record, cached):
+    annotated_video_path = result_cache.materialize(cached, OUTPUT_VIDEOS_DIR)
+    return videos.insert_output_video(
+        input_record["id"],
+        Path(annotated_video_path).name,
+        annotated_video_path,
+        cached["metrics"],
+        cached["jump_height"],
+        cached["llm_report"],
+        cached["score"],
+        cached["jumps"],
+        scoring_version=SCORING_VERSION,
+        model_tier=MODEL_TIER,
+    )
+
+
+job_queue = JobQueue(
+    job_store,
+    process_upload,
+    workers=int(os.getenv("ANALYSIS_WORKERS", DEFAULT_WORKERS)),
+    max_pending=int(os.getenv("ANALYSIS_MAX_PENDING", DEFAULT_MAX_PENDING)),
+)
+
+
 # ── Routes ─────────────────────────────────────────────────────────────────
 @app.get("/")
 def root():
     return {"message": "Verticai API is running."}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of stage/frame timings and counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/model-metrics")
+def get_model_metrics():
+    return model_registry.metrics()
+
+
+@app.get("/db-metrics")
+def get_db_metrics():
+    return db.metrics()
+
+
+@app.get("/cache-metrics")
+def get_cache_metrics():
+    return result_cache.metrics()
+
+
+@app.get("/llm-metrics")
+def get_llm_metrics():
+    return report_service.metrics()
+
+
+@app.delete("/cache")
+def clear_cache():
+    return {"invalidated": result_cache.invalidate_all()}
+
+
+def parse_fields(fields):
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+
 @app.get("/input-videos")
-def get_videos():
-    conn = get_db()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("SELECT * FROM input_videos ORDER BY uploaded_at DESC")
-    records = cur.fetchall()
-    cur.close()
-    conn.close()
+def get_videos(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: str | None = None,
+):
+    try:
+        records, next_cursor = videos.list_input_videos(
+            limit=limit, cursor=cursor, since=since, until=until, fields=parse_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "total": len(records),
-        "videos": [dict(r) for r in records]
+        "count": len(records),
+        "next_cursor": next_cursor,
+        "videos": records
     }
 
 
 @app.get("/output-videos")
-def get_output_videos():
-    conn = get_db()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("SELECT * FROM output_videos")
-    records = cur.fetchall()
-    cur.close()
-    conn.close()
+def get_output_videos(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    min_score: float | None = None,
+    max_score: float | None = None,
+    model_tier: str | None = None,
+    fields: str | None = None,
+):
+    """Newest first; pass fields=...,llm_report to include the LLM report."""
+    try:
+        records, next_cursor = videos.list_output_videos(
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until,
+            min_score=min_score,
+            max_score=max_score,
+            model_tier=model_tier,
+            fields=parse_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "total": len(records),
-        "output_videos": [dict(r) for r in records]
+        "count": len(records),
+        "next_cursor": next_cursor,
+        "output_videos": records
+    }
+
+
+@app.get("/stats/leaderboard")
+def get_leaderboard(metric: str = "score", limit: int = DEFAULT_LEADERBOARD_SIZE):
+    try:
+        return {"metric": metric, "leaders": stats.leaderboard(metric, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats/distribution")
+def get_distribution(metric: str = "score", percentiles: str | None = None):
+    """Percentiles of one metric, e.g. ?metric=angular_velocity&percentiles=10,50,90."""
+    try:
+        if percentiles:
+            percentiles = [float(p) for p in parse_fields(percentiles)]
+        return stats.distribution(metric, percentiles or DEFAULT_PERCENTILES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats/trends")
+def get_trends(
+    bucket: str = "day",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    metrics: str | None = None,
+):
+    try:
+        trends = stats.trends(bucket, since, until, parse_fields(metrics) or SUMMARY_METRICS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bucket": bucket, "trends": trends}
+
+
+@app.post("/output-videos/{output_video_id}/render", status_code=202)
+def render_output_video(output_video_id: uuid.UUID):
+    """
+    Re-render an annotated video from its stored landmarks, without pose
+    inference. The row moves to the new file once it is written; if the
+    render fails the row keeps its previous file and render_status.
+    """
+    landmarks_dir = LANDMARKS_DIR / str(output_video_id)
+    if not landmarks_dir.exists():
+        raise HTTPException(status_code=404, detail="No stored landmarks for this video.")
+    input_record = videos.get_input_video(output_video_id)
+    if input_record is None:
+        raise HTTPException(status_code=404, detail="Input video not found.")
+
+    annotated_video_path = new_annotated_video_path()
+    render_executor.submit(
+        render_deferred,
+        input_record["file_path"],
+        LandmarkStore.load_npy(landmarks_dir),
+        load_overlays(landmarks_dir),
+        annotated_video_path,
+        lambda: videos.update_output_video_file(
+            output_video_id, annotated_video_path.name, annotated_video_path
+        ),
+    )
+    return {
+        "message": "Render queued.",
+        "file_path": str(annotated_video_path),
     }
 
 
-@app.post("/input-videos")
-async def upload_video(file: UploadFile = File(...)):
+def resolve_import_directory(directory):
+    if not BULK_IMPORT_DIR:
+        raise HTTPException(status_code=400, detail="Directory imports are disabled.")
+    root = Path(BULK_IMPORT_DIR).resolve()
+    path = (root / directory).resolve()
+    if not path.is_relative_to(root) or not path.is_dir():
+        raise HTTPException(
+            status_code=400, detail=f"'{directory}' is not a directory under the import folder."
+        )
+    return path
+
+
+def new_input_video_path(filename):
+    ext = os.path.splitext(filename)[-1]
+    return INPUT_VIDEOS_DIR / f"{uuid.uuid4().hex}{ext}"
+
+
+def check_model_tier(model_tier):
+    """model_tier if it is None or installed, else HTTP 400."""
+    if model_tier is None:
+        return None
+    try:
+        return model_registry.check_tier(model_tier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def discard_uploads(input_records):
+    """Remove input rows and files the job queue refused, so a retry starts clean."""
+    videos.delete_input_videos([record["id"] for record in input_records])
+    for record in input_records:
+        Path(record["file_path"]).unlink(missing_ok=True)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/input-videos", status_code=202)
+async def upload_video(
+    response: Response,
+    file: UploadFile = File(...),
+    priority: int = 0,
+    model_tier: str | None = None,
+):
+    """
+    Upload a video and queue its analysis.
+
+    model_tier (lite/full/heavy) pins the model tier; without it the job runs
+    on MODEL_TIER, or a faster tier if the queue is backed up. Cached results
+    come from MODEL_TIER and are only served when no other tier is asked for.
+    """
+    check_model_tier(model_tier)
+
     # Validate MIME type
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
@@ -130,141 +701,302 @@ async def upload_video(file: UploadFile = File(...)):
         )
 
     # Generate a unique filename to avoid collisions
-    ext = os.path.splitext(file.filename)[-1]
-    unique_filename = f"{uuid.uuid4().hex}{ext}"
-    file_path = INPUT_VIDEOS_DIR / unique_filename
-
-    # Save file to disk
-    contents = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    file_path = new_input_video_path(file.filename)
 
-    file_size = len(contents)
-    uploaded_at = datetime.utcnow()
-
-    # ── Insert into input_videos ───────────────────────────────────────────
-    conn = get_db()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("""
-        INSERT INTO input_videos (original_filename, file_path, content_type, file_size, uploaded_at)
-        VALUES (%s, %s, %s, %s, %s)
-        RETURNING *
-    """, (file.filename, str(file_path), file.content_type, file_size, uploaded_at))
-    input_record = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
-
-    # ── Run pose analysis & jump height concurrently ──────────────────────
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_analyze = loop.run_in_executor(
-            executor,
-            lambda: analyze_jump(
-                model_path=str(MODEL_PATH),
-                input_source=str(file_path),
-                output_dir=str(OUTPUT_VIDEOS_DIR),
+    # Stream file to disk, hashing as we go
+    try:
+        with span("upload_write"):
+            file_size, content_sha256 = await stream_upload_to_disk(
+                file, file_path, max_bytes=MAX_UPLOAD_BYTES
             )
-        )
-        future_height = loop.run_in_executor(
-            executor,
-            lambda: find_jump_height(str(file_path))
-        )
-        try:
-            output, jump_height = await asyncio.gather(future_analyze, future_height)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
-
-    metrics = output["metrics"]
-    annotated_video_path = output["annotated_video_path"]
-    annotated_filename = Path(annotated_video_path).name
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    uploaded_at = datetime.utcnow()
 
-    # ── Calculate overall score ─────────────────────────────────────────────
-    normalized_jump_height = (jump_height * 100) if jump_height is not None else 0.0
-    score = (
-        normalized_jump_height                          * 0.50 +
-        (metrics["hip_normalized_score"]   or 0.0)     * 0.20 +
-        (metrics["angular_velocity_score"] or 0.0)     * 0.20 +
-        (metrics["knee_normalized_score"]  or 0.0)     * 0.10
+    # ── Insert into input_videos (off the event loop) ─────────────────────
+    input_record = await asyncio.to_thread(
+        videos.insert_input_video,
+        file.filename, file_path, file.content_type, file_size, content_sha256, uploaded_at,
     )
-    score = round(min(score, 100.0), 2)
 
-    # ── Generate LLM report ───────────────────────────────────────────
+    # ── Same video analyzed before with the same models? ──────────────────
+    cached = None
+    if model_tier in (None, MODEL_TIER):
+        with span("cache_lookup"):
+            cached = await asyncio.to_thread(result_cache.get, content_sha256)
+    if cached is not None:
+        output_record = await asyncio.to_thread(store_cached_result, input_record, cached)
+        response.status_code = 200
+        return {
+            "message": "Video uploaded. Analysis served from cache.",
+            "cached": True,
+            "input_video": input_record,
+            "output_video": output_record,
+        }
+
+    # ── Queue the analysis and return immediately ────────────────────────
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        prompt = f"""
-## Here is the reference to ideal ranges of 3 metrics:
-smallest_loading_min_hip_flexion: 70° exactly
-smallest_loading_min_knee_flexion: 83° – 90°
-angular_velocity: ≥ 500
-
-## Athlete's Metrics:
-- smallest_loading_min_hip_flexion: {metrics['smallest_loading_min_hip_flexion']}
-- hip_normalized_score: {metrics['hip_normalized_score']}
-- smallest_loading_min_knee_flexion: {metrics['smallest_loading_min_knee_flexion']}
-- knee_normalized_score: {metrics['knee_normalized_score']}
-- angular_velocity: {metrics['angular_velocity']}
-- angular_velocity_score: {metrics['angular_velocity_score']}
-- jump_height: {jump_height}
-
-## Instruction: Write me a report that includes:
-
-### 1. Performance Summary (2–3 sentences)
-Brief, encouraging overview of this jump's performance.
-
-### 2. Top 3 Strengths
-What the jumper is doing well biomechanically.
-
-### 3. Top 3 Areas to Improve (Priority Order)
-Be specific — reference exact metrics and what the ideal looks like.
-
-### 4. Drill Recommendations
-For each improvement area, give 1–2 specific drills or exercises (name them, explain briefly).
-
-Keep the tone motivational but honest. Be specific, not generic.
-"""
-        response = client.responses.create(
-            model="gpt-4.1-mini",
-            input=prompt
+        job = await asyncio.to_thread(
+            job_queue.submit,
+            {
+                "input_video_id": str(input_record["id"]),
+                "file_path": str(file_path),
+                "content_sha256": content_sha256,
+                "model_tier": model_tier,
+            },
+            priority=priority,
+            input_video_id=str(input_record["id"]),
         )
-        llm_report = response.output_text
-    except Exception as e:
-        print(f"❌ LLM report failed: {e}")
-        llm_report = None
-
-    # ── Insert into output_videos ──────────────────────────────────────────
-    conn = get_db()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("""
-        INSERT INTO output_videos (
-            id, original_filename, file_path,
-            hip_normalized_score, smallest_loading_min_hip_flexion,
-            knee_normalized_score, smallest_loading_min_knee_flexion,
-            angular_velocity, angular_velocity_score, jump_height, llm_report, score
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING *
-    """, (
-        input_record["id"],
-        annotated_filename,
-        annotated_video_path,
-        metrics["hip_normalized_score"],
-        metrics["smallest_loading_min_hip_flexion"],
-        metrics["knee_normalized_score"],
-        metrics["smallest_loading_min_knee_flexion"],
-        metrics["angular_velocity"],
-        metrics["angular_velocity_score"],
-        jump_height,
-        llm_report,
-        score,
-    ))
-    output_record = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+    except QueueFullError as e:
+        await asyncio.to_thread(discard_uploads, [input_record])
+        raise HTTPException(status_code=503, detail=str(e))
 
     return {
-        "message": "Video uploaded and analyzed successfully.",
-        "input_video": dict(input_record),
-        "output_video": dict(output_record),
+        "message": "Video uploaded. Analysis queued.",
+        "cached": False,
+        "job_id": str(job["id"]),
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "input_video": input_record,
     }
+
+
+@app.post("/input-videos/bulk", status_code=202)
+async def upload_videos_bulk(
+    files: list[UploadFile] = File(default=[]),
+    directory: str | None = Form(None),
+    priority: int = 0,
+    model_tier: str | None = None,
+):
+    """
+    Upload many videos (or import a local directory) and analyze them together.
+
+    Input rows and jobs are each inserted with one statement, the jobs share
+    the worker pool and pooled models, and progress is streamed back as
+    server-sent events: one "accepted"/"cached"/"rejected" event per file,
+    then one event per job status change, then "finished". model_tier
+    applies to every file, as for POST /input-videos.
+    """
+    check_model_tier(model_tier)
+    sources = [(file.filename, file.content_type, file) for file in files]
+    if directory:
+        import_dir = resolve_import_directory(directory)
+        for path in sorted(import_dir.iterdir()):
+            if path.is_file():
+                sources.append((path.name, mimetypes.guess_type(path.name)[0], path))
+    if not sources:
+        raise HTTPException(status_code=400, detail="No files or directory given.")
+
+    # ── Stream / import every file to disk ───────────────────────────────
+    rejected = []
+    rows = []
+    for filename, content_type, source in sources:
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            rejected.append({
+                "filename": filename,
+                "detail": f"Invalid file type: '{content_type}'. Only video files are allowed.",
+            })
+            continue
+        file_path = new_input_video_path(filename)
+        try:
+            with span("upload_write"):
+                if isinstance(source, Path):
+                    file_size, content_sha256 = await asyncio.to_thread(
+                        import_local_file, source, file_path, MAX_UPLOAD_BYTES
+                    )
+                else:
+                    file_size, content_sha256 = await stream_upload_to_disk(
+                        source, file_path, max_bytes=MAX_UPLOAD_BYTES
+                    )
+        except UploadTooLargeError as e:
+            rejected.append({"filename": filename, "detail": str(e)})
+            continue
+        rows.append(
+            (filename, file_path, content_type, file_size, content_sha256, datetime.utcnow())
+        )
+
+    # ── One insert for all input rows, then cache lookups ────────────────
+    input_records = await asyncio.to_thread(videos.insert_input_videos, rows)
+
+    def split_cached():
+        cached_outputs, uncached = [], []
+        use_cache = model_tier in (None, MODEL_TIER)
+        for record in input_records:
+            cached = result_cache.get(record["content_sha256"]) if use_cache else None
+            if cached is not None:
+                cached_outputs.append((record, store_cached_result(record, cached)))
+            else:
+                uncached.append(record)
+        return cached_outputs, uncached
+
+    cached_outputs, uncached = await asyncio.to_thread(split_cached)
+
+    # ── One insert for all jobs ──────────────────────────────────────────
+    try:
+        jobs = await asyncio.to_thread(job_queue.submit_many, [
+            (
+                {
+                    "input_video_id": str(record["id"]),
+                    "file_path": record["file_path"],
+                    "content_sha256": record["content_sha256"],
+                    "model_tier": model_tier,
+                },
+                priority,
+                str(record["id"]),
+            )
+            for record in uncached
+        ])
+    except QueueFullError as e:
+        # Cache hits already have their output rows and stay.
+        await asyncio.to_thread(discard_uploads, uncached)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def events():
+        for item in rejected:
+            yield sse_event("rejected", item)
+        for input_record, output_record in cached_outputs:
+            yield sse_event("cached", {"input_video": input_record, "output_video": output_record})
+        for input_record, job in zip(uncached, jobs):
+            yield sse_event("accepted", {
+                "input_video": input_record,
+                "job_id": str(job["id"]),
+                "status": job["status"],
+                "status_url": f"/jobs/{job['id']}",
+            })
+
+        last_status = {str(job["id"]): job["status"] for job in jobs}
+        while any(status not in FINISHED_STATUSES for status in last_status.values()):
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            for job in await asyncio.to_thread(job_store.get_many, list(last_status)):
+                job_id = str(job["id"])
+                if job["status"] != last_status[job_id]:
+                    last_status[job_id] = job["status"]
+                    yield sse_event(job["status"], dict(job))
+
+        statuses = list(last_status.values())
+        yield sse_event("finished", {
+            "total": len(sources),
+            "rejected": len(rejected),
+            "cached": len(cached_outputs),
+            "done": statuses.count(DONE),
+            "failed": statuses.count(FAILED),
+        })
+
+    return StreamingResponse(events(), status_code=202, media_type="text/event-stream")
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: uuid.UUID):
+    job = job_store.get(str(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return dict(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: uuid.UUID):
+    if await asyncio.to_thread(job_store.get, str(job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def events():
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(job_store.get, str(job_id))
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield sse_event(last_status, dict(job))
+            if last_status in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.websocket("/ws/live")
+async def live_analysis(
+    websocket: WebSocket, fps: float = DEFAULT_LIVE_FPS, model_tier: str | None = None
+):
+    """
+    Real-time analysis of a live camera stream.
+
+    The client sends every frame as one binary message (an encoded image,
+    e.g. JPEG) at fps, and may send the text message "end" to finish. The
+    server answers with JSON events: "frame" (phase, angles) for every
+    analyzed frame, "jump" for every completed jump and a final "summary".
+    Each event carries latency_ms (arrival to send) and the frames dropped
+    so far: while inference is busy at most LIVE_MAX_PENDING_FRAMES frames
+    wait, and older ones are dropped to keep latency bounded. The model tier
+    is chosen as for uploads and reported in the summary.
+    """
+    await websocket.accept()
+    if fps <= 0:
+        await websocket.close(code=1008, reason="fps must be positive")
+        return
+    try:
+        tier = model_registry.select_tier(model_tier, job_queue.pending())
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    if live_sessions.locked():
+        await websocket.close(code=1013, reason="Too many live sessions, try again later")
+        return
+
+    async with live_sessions:
+        frames = LiveFrameBuffer(LIVE_MAX_PENDING_FRAMES)
+        connected = True
+
+        async def receive_frames():
+            nonlocal connected
+            try:
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        connected = False
+                        return
+                    if message.get("bytes"):
+                        frames.put(message["bytes"])
+                    elif message.get("text") == "end":
+                        return
+            finally:
+                frames.close()
+
+        reader = asyncio.create_task(receive_frames())
+        with ExitStack() as models:
+            detector = await asyncio.to_thread(
+                models.enter_context, model_registry.pose_landmarker(tier)
+            )
+            yolo = await asyncio.to_thread(
+                models.enter_context, model_registry.yolo_model(tier)
+            )
+            ANALYSES_BY_TIER.inc(tier)
+            session = LiveSession(
+                detector,
+                yolo,
+                fps=fps,
+                scoring=SCORING,
+                deterministic=DETERMINISTIC_ANALYSIS,
+                inference_short_side=INFERENCE_SHORT_SIDE,
+            )
+            try:
+                while (item := await frames.get()) is not None:
+                    frame_index, data, received_at = item
+                    events = await asyncio.to_thread(session.process, frame_index, data)
+                    latency_ms = (time.perf_counter() - received_at) * 1000
+                    for event in events:
+                        await websocket.send_json(
+                            {**event, "latency_ms": latency_ms, "dropped": frames.dropped}
+                        )
+                if connected:
+                    await websocket.send_json({
+                        "type": "summary",
+                        "frames_received": frames.received,
+                        "frames_dropped": frames.dropped,
+                        "model_tier": tier,
+                        **session.summary(),
+                    })
+                    await websocket.close()
+            except (WebSocketDisconnect, RuntimeError):
+                # The client went away mid-send; nothing left to deliver.
+                pass
+            finally:
+                reader.cancel()
@@ -0,0 +1,35 @@
+"""
+Adaptive (stride + ROI) jump height mode against full-rate tracking on the
+bundled sample videos. Needs the YOLO pose model; skipped without it.
+"""
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+from benchmarks.adaptive_jump_height import air_time, run_adaptive, run_full
+from benchmarks.yolo_batch import SAMPLE_VIDEOS_DIR, load_frames
+from helper.find_jump_height import (
+    ADAPTIVE_AIR_TIME_TOLERANCE_FRAMES,
+    ADAPTIVE_STRIDE,
+    load_yolo_model,
+)
+
+SAMPLE_VIDEOS = sorted(SAMPLE_VIDEOS_DIR.glob("*.mp4"))
+
+
+@pytest.fixture(scope="module")
+def yolo_model():
+    return load_yolo_model()
+
+
+@pytest.mark.parametrize("video_path", SAMPLE_VIDEOS, ids=lambda path: path.name)
+def test_adaptive_air_time_matches_full_rate(video_path, yolo_model):
+    frames, fps = load_frames(video_path)
+    full_height = run_full(frames, fps, yolo_model)
+    adaptive_height = run_adaptive(frames, fps, yolo_model, ADAPTIVE_STRIDE)
+
+    assert (full_height is None) == (adaptive_height is None)
+    if full_height is not None:
+        diff_frames = abs(air_time(full_height) - air_time(adaptive_height)) * fps
+        assert diff_frames <= ADAPTIVE_AIR_TIME_TOLERANCE_FRAMES
@@ -0,0 +1,36 @@
+"""calculate_frame_angles against the original per-joint calculate_angle code."""
+import math
+
+import numpy as np
+import pytest
+
+from benchmarks.angle_calculation import per_joint_angles, random_landmarks
+from helper.angle_calculation import JOINT_ANGLES, VISIBILITY, calculate_frame_angles
+
+LEFT_KNEE = 25
+
+
+@pytest.fixture
+def landmarks():
+    landmarks = random_landmarks(500)
+    # Landmarks MediaPipe did not place and points that coincide.
+    landmarks[::7, LEFT_KNEE, :2] = np.nan
+    landmarks[1::11, LEFT_KNEE, :2] = landmarks[1::11, 23, :2]
+    landmarks[2::13, :, VISIBILITY] = 0.0
+    return landmarks
+
+
+def test_frame_angles_match_per_joint(landmarks):
+    for frame in landmarks:
+        with np.errstate(invalid="ignore"):
+            expected = [np.nan if value is None else value for value in per_joint_angles(frame.tolist())]
+        row = calculate_frame_angles(frame)
+        assert len(row) == len(JOINT_ANGLES)
+        np.testing.assert_array_equal(np.isnan(row), np.isnan(expected))
+        np.testing.assert_allclose(row, expected, rtol=0, atol=1e-9, equal_nan=True)
+
+
+def test_frame_angles_of_a_missing_pose_are_nan():
+    landmarks = np.zeros((33, 4))
+    assert all(math.isnan(angle) for angle in calculate_frame_angles(landmarks))
+    assert all(math.isnan(angle) for angle in calculate_frame_angles(landmarks.tolist()))
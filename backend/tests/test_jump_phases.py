@@ -0,0 +1,49 @@
+"""Pairing phase reps with airborne jumps, all at once and as jumps land."""
+from helper.jump_phases import JumpRecordMerger, merge_jump_records
+
+FPS = 30
+
+
+def rep(start_frame, takeoff_frame, hip=80.0):
+    return {
+        "start_frame": start_frame,
+        "takeoff_frame": takeoff_frame,
+        "landing_frame": None if takeoff_frame is None else takeoff_frame + 10,
+        "end_frame": start_frame + 40,
+        "smallest_loading_min_hip_flexion": hip,
+    }
+
+
+def jump(takeoff_frame, height=0.4):
+    return {
+        "takeoff_frame": takeoff_frame,
+        "landing_frame": takeoff_frame + 10,
+        "air_time": 0.33,
+        "height": height,
+    }
+
+
+def test_a_rep_is_paired_with_one_jump_only():
+    # Both jumps are within the window of the single rep.
+    records = merge_jump_records([rep(80, 100)], [jump(102), jump(120)], FPS)
+
+    assert [record["smallest_loading_min_hip_flexion"] for record in records] == [80.0, None]
+    assert [record["jump_index"] for record in records] == [0, 1]
+
+
+def test_incremental_indexes_match_the_final_records():
+    # A rep that never leaves the ground comes before the first jump.
+    all_reps = [rep(10, None, hip=95.0), rep(60, 80), rep(150, 170), rep(250, None)]
+    all_jumps = [jump(81), jump(171, height=0.5)]
+    merger = JumpRecordMerger(FPS)
+
+    reported = []
+    for jump_record, reps_so_far in zip(all_jumps, (all_reps[:2], all_reps[:3])):
+        position = merger.add_jump(reps_so_far, jump_record)
+        reported.append(merger.jump_record(reps_so_far, position))
+
+    records = merger.records(all_reps)
+    assert records == merge_jump_records(all_reps, all_jumps, FPS)
+    for record in reported:
+        assert records[record["jump_index"]] == record
+    assert [record["jump_index"] for record in reported] == [1, 2]
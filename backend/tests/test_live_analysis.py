@@ -0,0 +1,66 @@
+"""Live jump events carry the jump_index the session summary reports."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+pytest.importorskip("ultralytics")
+
+from benchmarks.phase_tracker import synthetic_session  # noqa: E402
+from helper import live_analysis  # noqa: E402
+from helper.jump_phases import JumpPhaseTracker  # noqa: E402
+
+FPS = 30.0
+
+
+class ScriptedHeightTracker:
+    """Reports each scripted jump on its landing frame, like JumpHeightTracker."""
+
+    def __init__(self, jumps):
+        self.pending = list(jumps)
+        self.jumps = []
+
+    def push(self, frame_index, person_kpts):
+        while self.pending and self.pending[0]["landing_frame"] == frame_index:
+            self.jumps.append(self.pending.pop(0))
+
+
+def test_jump_events_match_summary(monkeypatch):
+    rows = synthetic_session(np.random.default_rng(3), jumps=3)
+    tracker = JumpPhaseTracker()
+    for frame_index, row in enumerate(rows.tolist()):
+        tracker.push_row(frame_index / FPS, row, frame_index)
+    takeoffs = [rep["takeoff_frame"] for rep in tracker.reps if rep["takeoff_frame"] is not None]
+    assert len(takeoffs) >= 2
+    jumps = [
+        {"takeoff_frame": takeoff + 1, "landing_frame": takeoff + 9, "air_time": 8 / FPS, "height": 0.3 + 0.1 * i}
+        for i, takeoff in enumerate(takeoffs)
+    ]
+
+    monkeypatch.setattr(live_analysis, "decode_frame", lambda data: np.zeros((8, 8, 3), np.uint8))
+    monkeypatch.setattr(live_analysis, "landmarks_to_array", lambda landmarks, h, w: landmarks)
+    monkeypatch.setattr(live_analysis, "calculate_frame_angles", lambda row: row)
+    monkeypatch.setattr(live_analysis, "detect_person_keypoints", lambda *args, **kwargs: None)
+    detector = SimpleNamespace(
+        detect_for_video=lambda image, timestamp_ms: SimpleNamespace(
+            pose_landmarks=[rows[round(timestamp_ms * FPS / 1000)].tolist()]
+        )
+    )
+    session = live_analysis.LiveSession(detector, yolo_model=None, fps=FPS)
+    session.height_tracker = ScriptedHeightTracker(jumps)
+
+    events = [
+        event
+        for frame_index in range(len(rows))
+        for event in session.process(frame_index, b"")
+        if event["type"] == "jump"
+    ]
+    summary = session.summary()
+
+    assert len(events) == len(jumps)
+    for event in events:
+        record = summary["jumps"][event["jump_index"]]
+        assert {key: value for key, value in event.items() if key != "type"} == record
+    assert summary["best_jump_index"] in {event["jump_index"] for event in events}
@@ -0,0 +1,18 @@
+"""Report prompts follow the active scoring config."""
+from helper.llm_reports import build_report_prompt
+from helper.scoring import METRIC_NAMES, get_scoring_config
+
+
+def test_prompt_targets_come_from_the_scoring_config():
+    config = {
+        **get_scoring_config(),
+        "hip_target_deg": 75.0,
+        "knee_range_deg": (80.0, 95.5),
+        "angular_velocity_target": 450.0,
+    }
+    prompt = build_report_prompt(dict.fromkeys(METRIC_NAMES, 1.0), 0.4, config)
+
+    assert "smallest_loading_min_hip_flexion: 75° exactly" in prompt
+    assert "smallest_loading_min_knee_flexion: 80° – 95.5°" in prompt
+    assert "angular_velocity: ≥ 450" in prompt
+    assert "70°" not in prompt
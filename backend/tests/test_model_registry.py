@@ -0,0 +1,48 @@
+"""DetectorPool keeps its size when building a model fails."""
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+pytest.importorskip("ultralytics")
+
+from helper import model_registry  # noqa: E402
+from helper.model_registry import DetectorPool  # noqa: E402
+
+
+class FlakyFactory:
+    def __init__(self, failures):
+        self.failures = failures
+        self.built = 0
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("model file not readable")
+        self.built += 1
+        return object()
+
+
+def test_failed_warm_up_is_retried():
+    pool = DetectorPool("test", FlakyFactory(failures=1), size=2)
+    with pytest.raises(RuntimeError):
+        pool.warm_up()
+    pool.warm_up()
+    assert pool.metrics()["available"] == 2
+    assert pool.metrics()["build_failures"] == 1
+    pool.close()
+
+
+def test_failed_refill_is_retried(monkeypatch):
+    monkeypatch.setattr(model_registry, "REFILL_RETRY_SECONDS", 0.01)
+    factory = FlakyFactory(failures=0)
+    pool = DetectorPool("test", factory, size=1, recycle=True)
+    pool.warm_up()
+    factory.failures = 2
+
+    with pool.checkout():
+        pass
+    with pool.checkout(timeout=5):
+        pass
+
+    assert pool.metrics()["build_failures"] == 2
+    pool.close()
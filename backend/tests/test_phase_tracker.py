@@ -0,0 +1,60 @@
+"""The __slots__ JumpPhaseTracker reproduces the original dict-based tracker."""
+import numpy as np
+import pytest
+
+from benchmarks.phase_tracker import run_dict, run_reference, run_row, synthetic_session
+from helper.angle_calculation import JOINT_ANGLES
+
+SHOULDER_COLUMNS = {
+    side: next(
+        column
+        for column, (joint_side, name, _) in enumerate(JOINT_ANGLES)
+        if joint_side == side and name == "shoulder_angle"
+    )
+    for side in ("left", "right")
+}
+
+
+def with_side_switch(rows, rng):
+    """
+    Only the right shoulder is seen for the first frames of the approach,
+    then only the left, then (usually after the side has locked) the right again.
+    """
+    rows = rows.copy()
+    first = int(rng.integers(2, 8))
+    second = int(rng.integers(first + 1, len(rows) - 5))
+    rows[:first, SHOULDER_COLUMNS["left"]] = np.nan
+    rows[first:second, SHOULDER_COLUMNS["right"]] = np.nan
+    rows[second:, SHOULDER_COLUMNS["left"]] = np.nan
+    return rows
+
+
+def with_dropouts(rows, rng):
+    """Whole frames where no pose was detected, in short runs."""
+    rows = rows.copy()
+    for start in rng.integers(0, len(rows), size=5):
+        rows[start : start + int(rng.integers(1, 6))] = np.nan
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_trackers_agree(seed):
+    rng = np.random.default_rng(seed)
+    sessions = [
+        synthetic_session(rng),
+        with_side_switch(synthetic_session(rng), rng),
+        with_dropouts(synthetic_session(rng), rng),
+        with_dropouts(with_side_switch(synthetic_session(rng), rng), rng),
+    ]
+    for rows in sessions:
+        expected_trace, expected_reps = run_reference(rows)
+        assert expected_reps
+
+        assert run_dict(rows) == (expected_trace, expected_reps)
+        assert run_row(rows.tolist()) == (expected_trace, expected_reps)
+
+
+def test_side_switch_changes_display_side():
+    rng = np.random.default_rng(0)
+    trace, _ = run_reference(with_side_switch(synthetic_session(rng), rng))
+    assert {"left", "right"} <= {display_side for _, display_side in trace}
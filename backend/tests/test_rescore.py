@@ -0,0 +1,52 @@
+"""Re-scoring from saved landmarks reproduces the live metrics."""
+import numpy as np
+
+from benchmarks.phase_tracker import synthetic_session
+from helper.jump_phases import JumpPhaseTracker
+from helper.landmark_store import LANDMARK_FIELDS, NUM_KEYPOINTS, LandmarkStore
+from helper.pose_extraction import angles_to_dict
+from helper.rescore import landmark_dirs, replay_landmarks, replay_video
+from helper.scoring import CURRENT_SCORING_VERSION, get_scoring_config, score_rep
+
+FPS = 29.97
+
+
+def live_reps(rows, scoring):
+    # What analyze_jump does per frame, minus pose inference.
+    tracker = JumpPhaseTracker(**scoring["phases"])
+    for frame_index, row in enumerate(rows):
+        tracker.push(frame_index / FPS, angles_to_dict(row), frame_index)
+    return [{**rep, **score_rep(rep, True, scoring)} for rep in tracker.reps]
+
+
+def saved_store(rows, directory):
+    store = LandmarkStore(fps=FPS)
+    landmarks = np.zeros((NUM_KEYPOINTS, len(LANDMARK_FIELDS)))
+    for frame_index, row in enumerate(rows):
+        store.append(frame_index, frame_index / FPS, landmarks, row)
+    return store.save_npy(directory)
+
+
+def test_replay_matches_live_metrics(tmp_path):
+    scoring = get_scoring_config()
+    rng = np.random.default_rng(0)
+    for session in range(20):
+        rows = synthetic_session(rng)
+        directory = saved_store(rows, tmp_path / str(session))
+
+        replay = replay_landmarks(LandmarkStore.load_npy(directory, mmap_mode="r"), scoring)
+
+        expected = live_reps(rows, scoring)
+        assert expected
+        assert replay["reps"] == expected
+
+
+def test_cache_hit_replays_the_source_upload(tmp_path):
+    rows = synthetic_session(np.random.default_rng(1))
+    saved_store(rows, tmp_path / "source")
+    video = {"id": "cache-hit", "source_ids": ["missing", "source"]}
+
+    replay = replay_video(landmark_dirs(tmp_path, video), CURRENT_SCORING_VERSION, True)
+
+    assert replay["reps"] == live_reps(rows, get_scoring_config())
+    assert replay_video(landmark_dirs(tmp_path, {"id": "cache-hit"}), CURRENT_SCORING_VERSION, True) is None
@@ -0,0 +1,15 @@
+"""Every setting that changes stored results changes the cache version."""
+from helper.result_cache import cache_version
+
+
+def test_modes_change_the_version():
+    base = ("pose_landmarker_heavy.task", "yolo11n-pose.pt", 2, 720)
+    versions = {
+        cache_version(*base),
+        cache_version(*base, adaptive=True),
+        cache_version(*base, deterministic=False),
+        cache_version(*base, adaptive=True, deterministic=False),
+        cache_version(*base[:3], None),
+        cache_version(*base[:2], 3, 720),
+    }
+    assert len(versions) == 6
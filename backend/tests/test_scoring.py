@@ -0,0 +1,64 @@
+"""Session scoring: the headline metrics and jump height come from one jump."""
+from helper.jump_phases import merge_jump_records
+from helper.scoring import METRIC_NAMES, overall_score, score_rep, score_session
+
+
+def rep(takeoff_frame, hip, knee):
+    phases = {
+        "start_frame": takeoff_frame - 20,
+        "end_frame": takeoff_frame + 20,
+        "takeoff_frame": takeoff_frame,
+        "landing_frame": takeoff_frame + 10,
+        "smallest_loading_min_hip_flexion": hip,
+        "smallest_loading_min_knee_flexion": knee,
+    }
+    return {**phases, **score_rep(phases)}
+
+
+def jump(takeoff_frame, height):
+    return {
+        "takeoff_frame": takeoff_frame,
+        "landing_frame": takeoff_frame + 10,
+        "air_time": 0.3,
+        "height": height,
+    }
+
+
+def test_metrics_and_height_come_from_the_same_jump():
+    # Rep 1 has the better technique, rep 2 the higher jump.
+    reps = [rep(30, hip=70.0, knee=85.0), rep(130, hip=95.0, knee=110.0)]
+    jumps = [jump(30, 0.30), jump(130, 0.60)]
+    records = merge_jump_records(reps, jumps, fps=30)
+
+    session = score_session(records)
+
+    best = records[session["jump_index"]]
+    assert session["jump_height"] == best["jump_height"]
+    assert session["metrics"] == {name: best[name] for name in METRIC_NAMES}
+    assert session["score"] == max(
+        overall_score({name: r[name] for name in METRIC_NAMES}, r["jump_height"])
+        for r in records
+    )
+
+
+def test_unpaired_rep_and_jump_are_not_mixed():
+    # The rep and the jump are too far apart to be the same jump.
+    records = merge_jump_records([rep(30, hip=70.0, knee=85.0)], [jump(300, 0.50)], fps=30)
+    session = score_session(records)
+
+    best = records[session["jump_index"]]
+    assert session["jump_height"] == best["jump_height"]
+    assert session["metrics"]["smallest_loading_min_hip_flexion"] == (
+        best["smallest_loading_min_hip_flexion"]
+    )
+    assert (session["jump_height"] is None) != (
+        session["metrics"]["smallest_loading_min_hip_flexion"] is None
+    )
+
+
+def test_no_jumps():
+    session = score_session([])
+    assert session["jump_height"] is None
+    assert session["jump_index"] is None
+    assert all(value is None for value in session["metrics"].values())
+    assert session["score"] == 0.0